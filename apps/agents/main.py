@@ -1,16 +1,41 @@
-from typing import Any, Dict, List
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from bson import ObjectId
 
+from config.config import settings
+from config.redis import get_redis
+from libs.agents.cache import cache_stats
+from libs.agents.locks import claim_inflight
+from libs.agents.orchestrator import job_progress, start_channel_job
+from libs.agents.comments_analyzer.comments_analyzer import _comment_lines, prepare_threads
+from libs.agents.comments_analyzer.estimate import estimate_analysis
+from libs.agents.comments_analyzer.labels import ABOUT, SENTIMENTS, TIERS as LABEL_TIERS
+from libs.agents.extractors.sentiment import local_sentiments
+from libs.agents.routing import route_stats
+from libs.agents.progress import SECTIONS, TERMINAL as RUN_TERMINAL
+from libs.agents.progress import channel_name as progress_channel
+from libs.agents.usage import utc_day
+from libs.database.youtube.analysis_jobs import get_job
+from libs.database.youtube.comment_labels import count_labels, query_labels
+from libs.database.youtube.analysis_runs import create_run, get_latest_run, get_run
+from libs.database.usage import get_daily_usage, get_video_usage
 from libs.analysis.dashboard import build_homepage_summary
 from libs.database.youtube.analysis import get_analysis_by_comment_id
 from libs.database.youtube.channels import get_channel_by_id
-from libs.tasks_agents import enqueue_analyze_comments
+from libs.tasks_agents import (
+    enqueue_analysis_batch,
+    enqueue_analyze_comments,
+    enqueue_label_comments,
+)
 from libs.database.youtube.videos import get_video_by_id
 from libs.database.youtube.comments import get_comments_by_video_id
 from libs.users.service import get_my_channels
-from apps.users.main import get_current_user_id  # JWT auth
+from apps.users.main import get_admin_user_id, get_current_user_id  # JWT auth
 from libs.schema.youtube.analysis_schema import (
     DiscussionItem,
     SentimentBreakdown,
@@ -18,15 +43,25 @@ from libs.schema.youtube.analysis_schema import (
 
 app = FastAPI(title="Agents Service")
 
+# SSE: keepalive comment interval and max stream length
+EVENTS_KEEPALIVE_S = 15.0
+EVENTS_MAX_S = 15 * 60
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 class AnalyzeResponse(BaseModel):
     result: str
+    run_id: Optional[str] = None
 
 
 class VideoAnalysisResponse(BaseModel):
     id: str
     comment_id: str
-    sentiments: Dict[str, SentimentBreakdown]
+    # docs left by earlier progressive writes may lack some sections
+    sentiments: Optional[Dict[str, SentimentBreakdown]] = None
     headline: str
     discussions: Dict[str, List[DiscussionItem]]
     people: List[Dict[str, Any]]
@@ -34,6 +69,10 @@ class VideoAnalysisResponse(BaseModel):
     video_requests: List[str]
 
 
+class BatchAnalyzeRequest(BaseModel):
+    video_ids: List[str]
+
+
 class DashboardQuery(BaseModel):
     period_days: int = 30
     trend_count: int = 10
@@ -79,6 +118,33 @@ async def _verify_video_access(user_id: str, video_id: str) -> None:
         )
 
 
+async def _verify_channel_access(user_id: str, channel_id: str) -> None:
+    """
+    Throws an HTTPException unless the channel exists and the user owns it.
+    """
+    try:
+        ObjectId(channel_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid channel_id {channel_id!r}",
+        )
+
+    if not await get_channel_by_id(channel_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel {channel_id!r} not found",
+        )
+
+    my_channels = await get_my_channels(user_id)
+    owners = {c["channel_id"] for c in my_channels}
+    if channel_id not in owners:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorised: you do not own this channel.",
+        )
+
+
 @app.post(
     "/analyze-comments/{video_id}",
     response_model=AnalyzeResponse,
@@ -87,14 +153,106 @@ async def _verify_video_access(user_id: str, video_id: str) -> None:
 async def analyze_comments_route(
     video_id: str,
     background: BackgroundTasks,
+    refresh: bool = False,
+    full: bool = False,
+    deep: bool = False,
     user_id: str = Depends(get_current_user_id),
 ):
     # perform all our checks
     await _verify_video_access(user_id, video_id)
 
-    # enqueue and return
-    background.add_task(enqueue_analyze_comments, video_id)
-    return {"result": f"analysis queued for {video_id}"}
+    # a video already queued or running joins that run instead of paying
+    # for a second one (its options win; ask again once it has finished)
+    run_id = str(ObjectId())
+    existing = await claim_inflight(video_id, run_id)
+    if existing:
+        return {"result": f"analysis already queued for {video_id}", "run_id": existing}
+
+    # the run doc exists before the task does, so clients can subscribe
+    # to /analysis/{video_id}/events straight away
+    await create_run(video_id, SECTIONS, user_id, run_id=run_id)
+
+    # enqueue and return (refresh=true bypasses the LLM response cache,
+    # full=true re-analyses every comment instead of only the new ones,
+    # deep=true never settles for the local sentiment estimate)
+    background.add_task(
+        enqueue_analyze_comments,
+        video_id,
+        use_cache=not refresh,
+        full=full,
+        deep=deep,
+        user_id=user_id,
+        run_id=run_id,
+    )
+    return {"result": f"analysis queued for {video_id}", "run_id": run_id}
+
+
+@app.post(
+    "/analysis-batches",
+    response_model=AnalyzeResponse,
+    status_code=202,
+)
+async def analysis_batch_route(
+    body: BatchAnalyzeRequest,
+    background: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Re-analyse many videos offline through the OpenAI Batch API.  Cheaper
+    and not rate-limited, but results land within the batch window
+    (hours), not seconds.
+    """
+    if not body.video_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="video_ids is empty"
+        )
+    for video_id in body.video_ids:
+        await _verify_video_access(user_id, video_id)
+
+    background.add_task(enqueue_analysis_batch, body.video_ids, user_id)
+    return {"result": f"batch analysis queued for {len(body.video_ids)} videos"}
+
+
+@app.post("/channels/{channel_id}/analyze", status_code=202)
+async def analyze_channel_route(
+    channel_id: str,
+    refresh: bool = False,
+    full: bool = False,
+    deep: bool = False,
+    force: bool = False,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Analyse every video of the channel whose analysis is missing or stale
+    (`force=true`: all videos with comments).  Ownership is checked once;
+    the videos run a few at a time per channel (CHANNEL_ANALYSIS_CONCURRENCY)
+    so other channels' requests are not starved.  Poll the returned job.
+    """
+    await _verify_channel_access(user_id, channel_id)
+    return await start_channel_job(
+        channel_id, user_id, use_cache=not refresh, full=full, deep=deep, force=force
+    )
+
+
+@app.get("/channels/{channel_id}/analysis-jobs/{job_id}")
+async def channel_job_route(
+    channel_id: str,
+    job_id: str,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Aggregate progress of a channel-wide analysis job; per-video detail is
+    on /analysis/{video_id}/status?run_id=….
+    """
+    await _verify_channel_access(user_id, channel_id)
+    job = await get_job(job_id) if ObjectId.is_valid(job_id) else None
+    if not job or str(job["channel_id"]) != channel_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No such analysis job"
+        )
+    out = await job_progress(job)
+    out["runs"] = job["runs"]
+    return out
 
 
 @app.get(
@@ -135,6 +293,215 @@ async def get_analysis_route(
     }
 
 
+def _run_out(run: dict) -> dict:
+    out = {k: v for k, v in run.items() if k not in ("_id", "video_id", "user_id")}
+    out["run_id"] = str(run["_id"])
+    out["video_id"] = str(run["video_id"])
+    return out
+
+
+async def _find_run(video_id: str, run_id: Optional[str]) -> dict:
+    if run_id and not ObjectId.is_valid(run_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid run_id {run_id!r}"
+        )
+    run = await get_run(run_id) if run_id else await get_latest_run(video_id)
+    if not run or str(run["video_id"]) != video_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No analysis run found"
+        )
+    return run
+
+
+@app.get("/analysis/{video_id}/status")
+async def analysis_status_route(
+    video_id: str,
+    run_id: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Per-section status of a run (default: the latest one).
+    """
+    await _verify_video_access(user_id, video_id)
+    return _run_out(await _find_run(video_id, run_id))
+
+
+@app.get("/analysis/{video_id}/events")
+async def analysis_events_route(
+    video_id: str,
+    run_id: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Server-Sent Events for one run (default: the latest).  The first event
+    ("snapshot") is the run status doc; then one "section" event per
+    finished / failed section, a "timing" event with the extractor DAG
+    timing, and a final "run" event.  Sections carry their value, so a
+    client can render each part of the dashboard as it lands.
+    """
+    await _verify_video_access(user_id, video_id)
+    run = await _find_run(video_id, run_id)
+    rid = str(run["_id"])
+
+    async def _stream():
+        pubsub = get_redis().pubsub()
+        # subscribe before reading the snapshot so no update falls in between
+        await pubsub.subscribe(progress_channel(rid))
+        try:
+            snapshot = _run_out(await get_run(rid))
+            yield _sse("snapshot", snapshot)
+            if snapshot["status"] in RUN_TERMINAL:
+                return
+            deadline = time.monotonic() + EVENTS_MAX_S
+            while time.monotonic() < deadline:
+                msg = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=EVENTS_KEEPALIVE_S
+                )
+                if msg is None:
+                    # quiet: keep the connection open and catch a dead worker
+                    current = await get_run(rid)
+                    if current["status"] in RUN_TERMINAL:
+                        yield _sse("run", {"run_status": current["status"]})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                event = json.loads(msg["data"])
+                if "section" in event:
+                    yield _sse("section", event)
+                elif event.get("event") == "timing":
+                    yield _sse("timing", {"timing": event["timing"]})
+                else:
+                    yield _sse("run", event)
+                    if event.get("run_status") in RUN_TERMINAL:
+                        return
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/analysis/{video_id}/provisional")
+async def provisional_analysis_route(
+    video_id: str,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Instant lexicon-based sentiment estimate straight from the stored
+    comments – no LLM call.  `confidence` says how far to trust it.
+    """
+    await _verify_video_access(user_id, video_id)
+
+    comments_doc = await get_comments_by_video_id(video_id)
+    threads, _ = prepare_threads(video_id, comments_doc["comments"])
+    sentiments, confidence = local_sentiments("\n".join(_comment_lines(threads)))
+    return {
+        "comment_id": video_id,
+        "sentiments": sentiments,
+        "confidence": confidence,
+        "provisional": True,
+    }
+
+
+@app.get("/analysis/{video_id}/estimate")
+async def estimate_analysis_route(
+    video_id: str,
+    full: bool = False,
+    mode: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Estimated tokens, cost and latency of analysing the video now, per
+    extractor and in total – prompts are tokenized locally, no LLM call.
+    """
+    await _verify_video_access(user_id, video_id)
+    try:
+        estimate = await estimate_analysis(video_id, full=full, mode=mode)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    if estimate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No comments stored"
+        )
+    return estimate
+
+
+@app.post("/analysis/{video_id}/labels", status_code=202)
+async def label_comments_route(
+    video_id: str,
+    background: BackgroundTasks,
+    tier: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Queue per-comment sentiment / about / theme labels for the video
+    (tier "local" or "llm", default LABELS_TIER).
+    """
+    await _verify_video_access(user_id, video_id)
+    if tier is not None and tier not in LABEL_TIERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown tier {tier!r}"
+        )
+    background.add_task(enqueue_label_comments, video_id, tier=tier, user_id=user_id)
+    return {"result": f"labelling queued for {video_id}"}
+
+
+@app.get("/analysis/{video_id}/comments")
+async def labelled_comments_route(
+    video_id: str,
+    sentiment: Optional[str] = None,
+    about: Optional[str] = None,
+    theme: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Labelled comments of the video, most liked first, filtered by
+    sentiment, about (video / creator / topic / other) and theme.  Pass
+    `next_cursor` back as `cursor` for the next page.
+    """
+    await _verify_video_access(user_id, video_id)
+    if sentiment is not None and sentiment not in SENTIMENTS.values():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sentiment {sentiment!r}",
+        )
+    if about is not None and about not in ABOUT.values():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown about {about!r}"
+        )
+    try:
+        items, next_cursor = await query_labels(
+            video_id,
+            {"sentiment": sentiment, "about": about, "theme": theme},
+            cursor=cursor,
+            limit=max(1, min(limit, 200)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"video_id": video_id, "items": items, "next_cursor": next_cursor}
+
+
+@app.get("/analysis/{video_id}/comments/summary")
+async def labelled_comments_summary_route(
+    video_id: str,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Thread counts per sentiment, about and theme – the values the comment
+    filters accept.
+    """
+    await _verify_video_access(user_id, video_id)
+    return {"video_id": video_id, **await count_labels(video_id)}
+
+
 @app.post("/dashboard/summary")
 async def dashboard_summary(
     query: DashboardQuery,
@@ -176,34 +543,81 @@ async def dashboard_summary_one_channel(
     Same roll-up as /dashboard/summary but limited to **one** channel.
     Caller *must* own the channel (is_owner=True).
     """
-    # 1) validate ObjectId and existence
-    try:
-        ObjectId(channel_id)
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid channel_id {channel_id!r}",
-        )
+    # 1) validate the channel and that the caller owns it
+    await _verify_channel_access(user_id, channel_id)
 
-    if not await get_channel_by_id(channel_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Channel {channel_id!r} not found",
-        )
-
-    # 2) make sure caller owns it
-    my_channels = await get_my_channels(user_id)
-    owners = {c["channel_id"] for c in my_channels}
-    if channel_id not in owners:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorised: you do not own this channel.",
-        )
-
-    # 3) build and return the summary
+    # 2) build and return the summary
     summary = await build_homepage_summary(
         [channel_id],
         period_days=max(query.period_days, 1),
         trend_count=max(query.trend_count, 1),
     )
     return summary
+
+
+@app.get("/llm-cache/stats")
+async def llm_cache_stats(user_id: str = Depends(get_admin_user_id)):
+    """
+    Hit / miss counters and current size of the extractor LLM cache
+    (admins only).
+    """
+    return await cache_stats()
+
+
+@app.get("/llm-routes/stats")
+async def llm_route_stats(user_id: str = Depends(get_admin_user_id)):
+    """
+    Calls, error rate, mean latency and cost per model route, with the
+    number of fallback and hedged attempts and the governor's current
+    concurrency limit, buckets and pause (admins only).
+    """
+    return await route_stats()
+
+
+@app.get("/usage")
+async def usage_route(
+    days: int = 7,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    LLM tokens / cost per UTC day for the caller and each channel they own,
+    with the configured daily budgets.
+    """
+    if not 1 <= days <= 90:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="days must be 1-90"
+        )
+    today = datetime.now(timezone.utc)
+    day_keys = [utc_day(today - timedelta(days=i)) for i in range(days)][::-1]
+
+    owned = [c["channel_id"] for c in await get_my_channels(user_id) if c["is_owner"]]
+    return {
+        "days": day_keys,
+        "user": await get_daily_usage("user", user_id, day_keys),
+        "channels": {
+            cid: await get_daily_usage("channel", cid, day_keys) for cid in owned
+        },
+        "budgets_usd": {
+            "user_daily": settings.USER_DAILY_BUDGET_USD,
+            "channel_daily": settings.CHANNEL_DAILY_BUDGET_USD,
+        },
+    }
+
+
+@app.get("/usage/videos/{video_id}")
+async def video_usage_route(
+    video_id: str,
+    limit: int = 20,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Recent analysis runs of one video with per-extractor token, cost,
+    latency and retry totals.
+    """
+    await _verify_video_access(user_id, video_id)
+    runs = await get_video_usage(video_id, limit=max(1, min(limit, 100)))
+    for r in runs:
+        for k in ("_id", "video_id", "channel_id", "user_id"):
+            if r.get(k) is not None:
+                r[k] = str(r[k])
+    return {"video_id": video_id, "runs": runs}
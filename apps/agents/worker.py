@@ -1,7 +1,16 @@
 import asyncio
 from celery import Celery
+from celery.schedules import crontab
 from config.config import settings
+from libs.agents.batch import DONE, poll_batch, submit_batch
 from libs.agents.comments_analyzer.comments_analyzer import analyze_and_store_comments
+from libs.agents.comments_analyzer.labels import label_video
+from libs.agents.governor import RateLimited
+from libs.agents.locks import LeaseBusy
+from libs.agents.orchestrator import resume_channel
+from libs.agents.usage import BudgetExceeded
+from libs.database.youtube.analysis_runs import get_run
+from libs.database.youtube.comments import get_commented_video_ids
 
 broker = (
     settings.CELERY_BROKER_URL
@@ -13,9 +22,146 @@ backend = (
 )
 
 celery = Celery("agents_worker", broker=broker, backend=backend)
-celery.conf.update(task_track_started=True, task_serializer="json")
+celery.conf.update(
+    task_track_started=True,
+    task_serializer="json",
+    # budget-deferred runs carry an ETA of up to a day; with the default 1 h
+    # visibility timeout the Redis broker would redeliver them every hour
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_S},
+)
+
+if settings.BATCH_NIGHTLY_HOUR is not None:
+    celery.conf.beat_schedule = {
+        "nightly-analysis-batch": {
+            "task": "agents.reanalyze_all_batch",
+            "schedule": crontab(hour=settings.BATCH_NIGHTLY_HOUR, minute=0),
+            "options": {"queue": "agents_queue"},
+        }
+    }
+
+
+# One event loop per worker process, reused across tasks, so the pooled
+# async OpenAI client (libs/agents/llm.py) and Mongo connections survive
+# between jobs instead of being rebuilt by every asyncio.run().
+_loop = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+def _in_channel_queue(run_id: str) -> bool:
+    # a deferred run of a channel job is re-queued by the orchestrator
+    run = _run(get_run(run_id)) if run_id else None
+    return bool(run and (run.get("channel_job") or {}).get("payload"))
 
 
 @celery.task(name="agents.analyze_comments")
-def analyze_comments_task(video_id: str):
-    asyncio.run(analyze_and_store_comments(video_id))
+def analyze_comments_task(
+    video_id: str,
+    use_cache: bool = True,
+    full: bool = False,
+    deep: bool = False,
+    user_id: str = None,
+    run_id: str = None,
+):
+    try:
+        _run(
+            analyze_and_store_comments(
+                video_id,
+                use_cache=use_cache,
+                full=full,
+                deep=deep,
+                user_id=user_id,
+                run_id=run_id,
+            )
+        )
+    except BudgetExceeded as e:
+        if _in_channel_queue(run_id):
+            return f"deferred in channel queue: {e}"
+        # over today's LLM budget: try again once the day rolls over
+        analyze_comments_task.apply_async(
+            args=[video_id, use_cache, full, deep, user_id, run_id],
+            eta=e.retry_at,
+            queue="agents_queue",
+        )
+        return f"deferred: {e}"
+    except LeaseBusy:
+        # another worker is on this video; run after it lets go
+        analyze_comments_task.apply_async(
+            args=[video_id, use_cache, full, deep, user_id, run_id],
+            countdown=settings.ANALYSIS_LOCK_RETRY_S,
+            queue="agents_queue",
+        )
+        return "busy: retrying"
+    except RateLimited as e:
+        if _in_channel_queue(run_id):
+            return f"deferred in channel queue: {e}"
+        # the provider kept rate limiting; come back once it should have eased
+        analyze_comments_task.apply_async(
+            args=[video_id, use_cache, full, deep, user_id, run_id],
+            countdown=max(e.retry_after_s, settings.ANALYSIS_LOCK_RETRY_S),
+            queue="agents_queue",
+        )
+        return f"deferred: {e}"
+
+
+@celery.task(name="agents.resume_channel")
+def resume_channel_task(channel_id: str):
+    return _run(resume_channel(channel_id))
+
+
+@celery.task(name="agents.label_comments")
+def label_comments_task(video_id: str, tier: str = None, user_id: str = None):
+    try:
+        return _run(label_video(video_id, tier=tier, user_id=user_id))
+    except RateLimited as e:
+        label_comments_task.apply_async(
+            args=[video_id, tier, user_id],
+            countdown=max(e.retry_after_s, settings.ANALYSIS_LOCK_RETRY_S),
+            queue="agents_queue",
+        )
+        return f"deferred: {e}"
+
+
+@celery.task(name="agents.submit_analysis_batch")
+def submit_analysis_batch_task(video_ids: list, user_id: str = None):
+    batch_ids = _run(submit_batch(video_ids, user_id))
+    for batch_id in batch_ids:
+        poll_analysis_batch_task.apply_async(
+            args=[batch_id],
+            countdown=settings.BATCH_POLL_INTERVAL_S,
+            queue="agents_queue",
+        )
+    return batch_ids
+
+
+@celery.task(name="agents.poll_analysis_batch")
+def poll_analysis_batch_task(batch_id: str):
+    status = _run(poll_batch(batch_id))
+    if status not in DONE:
+        poll_analysis_batch_task.apply_async(
+            args=[batch_id],
+            countdown=settings.BATCH_POLL_INTERVAL_S,
+            queue="agents_queue",
+        )
+    return status
+
+
+@celery.task(name="agents.reanalyze_all_batch")
+def reanalyze_all_batch_task():
+    """
+    Nightly: every video with comments, in groups of videos; submit_batch
+    splits each group into as many batch files as the request-count and
+    file-size limits need.
+    """
+    video_ids = _run(get_commented_video_ids())
+    step = max(settings.BATCH_MAX_REQUESTS // 4, 1)
+    for i in range(0, len(video_ids), step):
+        submit_analysis_batch_task.apply_async(
+            args=[video_ids[i : i + step]], queue="agents_queue"
+        )
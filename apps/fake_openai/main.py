@@ -0,0 +1,489 @@
+# apps/fake_openai/main.py
+#
+# Local stand-in for the slice of the OpenAI API the agents use: chat
+# completions plus the files + batches endpoints behind libs/agents/batch.py.
+# Replies are synthetic but deterministic per prompt: when a json_schema
+# response_format is given the reply is generated from the schema (so the
+# fused extractor validates), the per-extractor prompts get canned replies
+# in the shape each extractor parses, built from the words of the comments
+# (so people grounding keeps them), anything else gets a short text.
+#
+# Chat calls can be slowed down (log-normal latency, per-token decode time)
+# and rate limited (RPM / TPM windows, random 429s) to exercise retries;
+# usage is tiktoken-counted when available and tallied per extractor.
+#
+# Batches move validating → in_progress → completed once FAKE_OPENAI_BATCH_S
+# seconds have passed since creation, then expose output/error files the
+# same way the real API does.
+#
+# Point the agents at it with OPENAI_BASE_URL=http://127.0.0.1:8091/v1
+# and run:  uvicorn apps.fake_openai.main:app --port 8091
+
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+
+from libs.agents.prompts.discussions_prompt import DISCUSSIONS_PROMPT, DISCUSSION_LABEL_PROMPT
+from libs.agents.prompts.headline_prompt import HEADLINE_PROMPT
+from libs.agents.prompts.labels_prompt import COMMENT_LABELS_PROMPT
+from libs.agents.prompts.other_prompts import OTHER_INSIGHTS_PROMPT, VIDEO_REQUESTS_PROMPT
+from libs.agents.prompts.people_prompt import PEOPLE_PROMPT
+from libs.agents.prompts.sentiment_prompt import SENTIMENT_PROMPT
+from libs.agents.tokens import count_tokens
+
+_ids = itertools.count(1)
+_WORD = re.compile(r"[a-z]+")
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}-{next(_ids):06d}"
+
+
+def _error(
+    code: int,
+    message: str,
+    kind: str = "invalid_request_error",
+    headers: Optional[Dict[str, str]] = None,
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=code,
+        content={"error": {"message": message, "type": kind, "code": None}},
+        headers=headers,
+    )
+
+
+def _breakdown(rng: random.Random) -> Dict[str, int]:
+    pos = rng.randint(20, 80)
+    neg = rng.randint(0, 100 - pos)
+    return {"positive": pos, "neutral": 100 - pos - neg, "negative": neg}
+
+
+def _fill(schema: Dict, rng: random.Random, key: str = ""):
+    """
+    Smallest plausible value for a (strict) JSON schema.  Sentiment
+    breakdowns – objects with positive/neutral/negative – sum to 100.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        props = schema.get("properties", {})
+        if set(props) == {"positive", "neutral", "negative"}:
+            return _breakdown(rng)
+        return {k: _fill(v, rng, k) for k, v in props.items()}
+    if kind == "array":
+        return [_fill(schema.get("items", {}), rng, key) for _ in range(rng.randint(1, 3))]
+    if kind == "integer":
+        return rng.randint(1, 40)
+    if kind == "number":
+        return round(rng.random(), 3)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return f"{key or 'text'} {rng.randint(1, 999)}"
+
+
+def _top_words(prompt: str, k: int) -> List[str]:
+    """Most frequent longer words of the comment lines in the prompt."""
+    counts = Counter(
+        w
+        for line in prompt.splitlines()
+        if line.startswith(("[COMMENT]", "[REPLY]"))
+        for w in _WORD.findall(line.split("] ", 1)[-1].lower())
+        if len(w) > 4
+    )
+    return [w for w, _ in counts.most_common(k)] or ["editing"]
+
+
+def _sentiments(rng, prompt):
+    return json.dumps({c: _breakdown(rng) for c in ("video", "creator", "topic")})
+
+
+def _headline(rng, prompt):
+    return json.dumps({"headline": "Viewers mostly enjoyed this one."})
+
+
+def _discussions(rng, prompt):
+    words = _top_words(prompt, 9)
+    return json.dumps(
+        {
+            cat: [
+                {"name": w, "mentions": rng.randint(1, 60), "sentiment": _breakdown(rng)}
+                for w in words[i::3]
+            ]
+            for i, cat in enumerate(("video", "creator", "topic"))
+        }
+    )
+
+
+def _discussion_labels(rng, prompt):
+    # name every cluster after its first listed word
+    clusters = re.findall(r"^Cluster (\d+) .*\nWords: ([^,\n]*)", prompt, re.MULTILINE)
+    cats = ("video", "creator", "topic")
+    return json.dumps(
+        [
+            {"cluster": int(i), "name": word or f"theme {i}", "category": cats[int(i) % 3]}
+            for i, word in clusters
+        ]
+    )
+
+
+def _comment_labels(rng, prompt):
+    # one random label per numbered comment after the "Comments:" header
+    comments = prompt.rpartition("\nComments:\n")[2]
+    themes = len(re.findall(r"^\d+\. ", prompt.partition("\nComments:\n")[0], re.MULTILINE))
+    return json.dumps(
+        [
+            [int(i), rng.choice("pun"), rng.choice("vcto"), rng.randrange(themes) if themes else None]
+            for i in re.findall(r"^(\d+): ", comments, re.MULTILINE)
+        ]
+    )
+
+
+def _people(rng, prompt):
+    # frequent comment words, so the people grounding keeps them
+    return json.dumps(
+        [
+            {"name": w, "sentiment": _breakdown(rng), "remarks": [f"{w} comes up a lot"]}
+            for w in _top_words(prompt, 2)
+        ]
+    )
+
+
+def _other_insights(rng, prompt):
+    return "\n".join(f"Viewers keep mentioning {w}" for w in _top_words(prompt, 3))
+
+
+def _video_requests(rng, prompt):
+    return "\n".join(f"A video about {w}" for w in _top_words(prompt, 2))
+
+
+# canned replies for the per-extractor prompts, matched on the prompt prefix
+_EXTRACTORS = (
+    ("sentiments", SENTIMENT_PROMPT, _sentiments),
+    ("headline", HEADLINE_PROMPT, _headline),
+    ("discussions", DISCUSSIONS_PROMPT, _discussions),
+    ("discussions", DISCUSSION_LABEL_PROMPT, _discussion_labels),
+    ("people", PEOPLE_PROMPT, _people),
+    ("labels", COMMENT_LABELS_PROMPT, _comment_labels),
+    ("other_insights", OTHER_INSIGHTS_PROMPT, _other_insights),
+    ("video_requests", VIDEO_REQUESTS_PROMPT, _video_requests),
+)
+
+
+def _prompt(body: Dict) -> str:
+    return "".join(m.get("content") or "" for m in body.get("messages", []))
+
+
+def extractor_of(body: Dict) -> str:
+    """
+    Which extractor sent the request: its name, the json_schema name for
+    structured requests (the fused extractor: "comment_analysis"), or "other".
+    """
+    fmt = body.get("response_format") or {}
+    if fmt.get("type") == "json_schema":
+        return fmt["json_schema"].get("name", "json_schema")
+    prompt = _prompt(body)
+    for name, prefix, _ in _EXTRACTORS:
+        if prompt.startswith(prefix):
+            return name
+    return "other"
+
+
+def completion_text(body: Dict) -> str:
+    prompt = _prompt(body)
+    rng = random.Random(hashlib.sha1(prompt.encode("utf-8")).hexdigest())
+    fmt = body.get("response_format") or {}
+    if fmt.get("type") == "json_schema":
+        return json.dumps(_fill(fmt["json_schema"]["schema"], rng))
+    if fmt.get("type") == "json_object":
+        return "{}"
+    for _, prefix, reply in _EXTRACTORS:
+        if prompt.startswith(prefix):
+            return reply(rng, prompt)
+    return "Viewers mostly enjoyed this one."
+
+
+def completion(body: Dict) -> Dict:
+    prompt = _prompt(body)
+    content = completion_text(body)
+    model = body.get("model", "gpt-4o-mini")
+    prompt_tokens = max(count_tokens(prompt, model), 1)
+    completion_tokens = max(count_tokens(content, model), 1)
+    return {
+        "id": _new_id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def create_app(
+    batch_seconds: float = 2.0,
+    latency_ms: float = 0.0,
+    latency_sigma: float = 0.0,
+    ms_per_token: float = 0.0,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    error_rate: float = 0.0,
+) -> FastAPI:
+    """
+    Chat completions take latency_ms (the median; log-normal with shape
+    `latency_sigma`, 0 = fixed) plus ms_per_token per completion token.
+    More than `rpm` requests or `tpm` tokens in any 60 s window, and a
+    random `error_rate` share of requests, get a 429 with Retry-After.
+    All of these can be changed at runtime through POST /_fake/config.
+    """
+    app = FastAPI(title="Fake OpenAI API")
+    cfg = {
+        "latency_ms": latency_ms,
+        "latency_sigma": latency_sigma,
+        "ms_per_token": ms_per_token,
+        "rpm": rpm,
+        "tpm": tpm,
+        "error_rate": error_rate,
+    }
+    files: Dict[str, Dict] = {}
+    batches: Dict[str, Dict] = {}
+    calls: Counter = Counter()
+    usage: Dict[str, Counter] = defaultdict(Counter)  # per extractor
+    window: deque = deque()  # (time, tokens) of accepted requests, last 60 s
+
+    def _throttle(tokens: int) -> Optional[JSONResponse]:
+        now = time.time()
+        while window and window[0][0] <= now - 60:
+            window.popleft()
+        used = sum(t for _, t in window)
+        retry_after = None
+        if cfg["rpm"] is not None and len(window) >= cfg["rpm"]:
+            retry_after = window[0][0] + 60 - now
+        elif cfg["tpm"] is not None and window and used + tokens > cfg["tpm"]:
+            retry_after = window[0][0] + 60 - now
+        elif cfg["error_rate"] and random.random() < cfg["error_rate"]:
+            retry_after = 1.0
+        if retry_after is None:
+            window.append((now, tokens))
+            return None
+        calls["rate_limited"] += 1
+        headers = {"retry-after": str(max(math.ceil(retry_after), 1))}
+        if cfg["rpm"] is not None:
+            headers["x-ratelimit-limit-requests"] = str(cfg["rpm"])
+            headers["x-ratelimit-remaining-requests"] = str(max(cfg["rpm"] - len(window), 0))
+        if cfg["tpm"] is not None:
+            headers["x-ratelimit-limit-tokens"] = str(cfg["tpm"])
+            headers["x-ratelimit-remaining-tokens"] = str(max(cfg["tpm"] - used, 0))
+        return _error(
+            429,
+            "Rate limit reached for requests",
+            kind="rate_limit_exceeded",
+            headers=headers,
+        )
+
+    def _latency_s(completion_tokens: int) -> float:
+        ms = cfg["latency_ms"]
+        if cfg["latency_sigma"]:
+            ms *= math.exp(random.gauss(0.0, cfg["latency_sigma"]))
+        return (ms + cfg["ms_per_token"] * completion_tokens) / 1000.0
+
+    def _store_file(name: str, data: bytes, purpose: str) -> Dict:
+        f = {
+            "id": _new_id("file"),
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": name,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        files[f["id"]] = {"meta": f, "data": data}
+        return f
+
+    def _run_batch(b: Dict) -> None:
+        out, err = [], []
+        for line in files[b["input_file_id"]]["data"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            if req.get("url") != b["endpoint"]:
+                err.append(
+                    {
+                        "id": _new_id("batch_req"),
+                        "custom_id": req.get("custom_id"),
+                        "response": None,
+                        "error": {"code": "invalid_url", "message": req.get("url")},
+                    }
+                )
+                continue
+            out.append(
+                {
+                    "id": _new_id("batch_req"),
+                    "custom_id": req["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": _new_id("req"),
+                        "body": completion(req["body"]),
+                    },
+                    "error": None,
+                }
+            )
+        dump = lambda rows: "".join(json.dumps(r) + "\n" for r in rows).encode("utf-8")
+        if out:
+            b["output_file_id"] = _store_file("output.jsonl", dump(out), "batch_output")["id"]
+        if err:
+            b["error_file_id"] = _store_file("errors.jsonl", dump(err), "batch_output")["id"]
+        b["request_counts"] = {
+            "total": len(out) + len(err),
+            "completed": len(out),
+            "failed": len(err),
+        }
+        b["status"] = "completed"
+        b["completed_at"] = int(time.time())
+
+    def _advance(b: Dict) -> Dict:
+        if b["status"] in ("validating", "in_progress"):
+            elapsed = time.time() - b["created_at"]
+            if elapsed >= batch_seconds:
+                _run_batch(b)
+            elif elapsed >= batch_seconds / 2:
+                b["status"] = "in_progress"
+        return b
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        calls["chat"] += 1
+        body = await request.json()
+        resp = completion(body)
+        tokens = resp["usage"]["total_tokens"]
+        if err := _throttle(tokens):
+            return err
+        delay = _latency_s(resp["usage"]["completion_tokens"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+        u = usage[extractor_of(body)]
+        u["calls"] += 1
+        u["prompt_tokens"] += resp["usage"]["prompt_tokens"]
+        u["completion_tokens"] += resp["usage"]["completion_tokens"]
+        return resp
+
+    @app.post("/v1/files")
+    async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        calls["files.create"] += 1
+        return _store_file(file.filename or "upload.jsonl", await file.read(), purpose)
+
+    @app.get("/v1/files/{file_id}")
+    async def get_file(file_id: str):
+        if file_id not in files:
+            return _error(404, f"No such File object: {file_id}")
+        return files[file_id]["meta"]
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        calls["files.content"] += 1
+        if file_id not in files:
+            return _error(404, f"No such File object: {file_id}")
+        return Response(files[file_id]["data"], media_type="application/octet-stream")
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        calls["batches.create"] += 1
+        body = await request.json()
+        if body.get("input_file_id") not in files:
+            return _error(400, "input_file_id not found")
+        b = {
+            "id": _new_id("batch"),
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "validating",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "completed_at": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": body.get("metadata"),
+        }
+        batches[b["id"]] = b
+        return b
+
+    @app.get("/v1/batches/{batch_id}")
+    async def get_batch(batch_id: str):
+        calls["batches.retrieve"] += 1
+        if batch_id not in batches:
+            return _error(404, f"No such Batch object: {batch_id}")
+        return _advance(batches[batch_id])
+
+    @app.post("/v1/batches/{batch_id}/cancel")
+    async def cancel_batch(batch_id: str):
+        b = batches.get(batch_id)
+        if not b:
+            return _error(404, f"No such Batch object: {batch_id}")
+        if b["status"] in ("validating", "in_progress"):
+            b["status"] = "cancelled"
+        return b
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {
+            "calls": dict(calls),
+            "by_extractor": {k: dict(v) for k, v in usage.items()},
+            "files": len(files),
+            "batches": len(batches),
+            "config": cfg,
+        }
+
+    @app.post("/_fake/config")
+    async def configure(request: Request):
+        body = await request.json()
+        unknown = set(body) - set(cfg)
+        if unknown:
+            return _error(400, f"Unknown settings {sorted(unknown)}")
+        cfg.update(body)
+        return cfg
+
+    @app.post("/_fake/reset")
+    async def reset():
+        calls.clear()
+        usage.clear()
+        window.clear()
+        files.clear()
+        batches.clear()
+        return {"detail": "reset"}
+
+    return app
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+app = create_app(
+    batch_seconds=float(os.getenv("FAKE_OPENAI_BATCH_S", 2.0)),
+    latency_ms=float(os.getenv("FAKE_OPENAI_LATENCY_MS", 0.0)),
+    latency_sigma=float(os.getenv("FAKE_OPENAI_LATENCY_SIGMA", 0.0)),
+    ms_per_token=float(os.getenv("FAKE_OPENAI_MS_PER_TOKEN", 0.0)),
+    rpm=_env_int("FAKE_OPENAI_RPM"),
+    tpm=_env_int("FAKE_OPENAI_TPM"),
+    error_rate=float(os.getenv("FAKE_OPENAI_429_RATE", 0.0)),
+)
@@ -0,0 +1,281 @@
+# apps/fake_youtube/dataset.py
+#
+# In-memory data behind the fake YouTube Data API.  Channels can come from
+# recorded fixture files (raw API resources) or be generated synthetically.
+# Synthetic videos / comment threads are derived on demand from
+# (seed, channel, index), so a 100k-video channel costs almost no memory.
+
+import json
+import random
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+_WORDS = (
+    "great video love this editing music camera funny honestly best part "
+    "finally someone explained why does nobody talk about that moment when "
+    "please make more tutorials collab next week audio too quiet thumbnail "
+    "clickbait underrated channel deserves subscribers intro skip ad"
+).split()
+
+_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(zlib.crc32(":".join(map(str, parts)).encode()))
+
+
+def _sentence(rng: random.Random, lo: int = 4, hi: int = 18) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+class SyntheticChannel:
+    """
+    A channel whose uploads and comments are generated deterministically.
+    """
+
+    def __init__(
+        self, handle: str, video_count: int, comments_per_video: int, seed: int
+    ):
+        self.handle = handle.lstrip("@")
+        self.id = "UC" + format(zlib.crc32(self.handle.encode()), "022x")
+        self.uploads_playlist_id = "UU" + self.id[2:]
+        self.video_count = video_count
+        self.comments_per_video = comments_per_video
+        self.seed = seed
+
+    # -- ids ---------------------------------------------------------------
+    def video_id(self, index: int) -> str:
+        return f"{self.id[-6:]}{index:07d}"
+
+    def video_index(self, video_id: str) -> Optional[int]:
+        if not video_id.startswith(self.id[-6:]):
+            return None
+        try:
+            index = int(video_id[6:])
+        except ValueError:
+            return None
+        return index if 0 <= index < self.video_count else None
+
+    # -- resources ---------------------------------------------------------
+    def channel_resource(self) -> Dict:
+        thumb = {"url": f"https://example.invalid/{self.id}.jpg", "width": 88, "height": 88}
+        return {
+            "kind": "youtube#channel",
+            "etag": f"etag-{self.id}",
+            "id": self.id,
+            "snippet": {
+                "title": self.handle,
+                "description": f"Synthetic channel {self.handle}",
+                "customUrl": f"@{self.handle}",
+                "publishedAt": _EPOCH.isoformat().replace("+00:00", "Z"),
+                "thumbnails": {"default": thumb, "medium": thumb, "high": thumb},
+                "localized": {
+                    "title": self.handle,
+                    "description": f"Synthetic channel {self.handle}",
+                },
+            },
+            "contentDetails": {
+                "relatedPlaylists": {"likes": "", "uploads": self.uploads_playlist_id}
+            },
+            "statistics": {
+                "viewCount": str(self.video_count * 1000),
+                "subscriberCount": str(self.video_count * 10),
+                "hiddenSubscriberCount": False,
+                "videoCount": str(self.video_count),
+            },
+        }
+
+    def thread_count(self, index: int) -> int:
+        return _rng(self.seed, self.id, index, "n").randint(0, self.comments_per_video)
+
+    def video_resource(self, index: int) -> Dict:
+        rng = _rng(self.seed, self.id, index)
+        published = _EPOCH + timedelta(hours=index * 6)
+        return {
+            "kind": "youtube#video",
+            "id": self.video_id(index),
+            "snippet": {
+                "title": _sentence(rng, 3, 8).title(),
+                "description": _sentence(rng, 10, 60),
+                "publishedAt": published.isoformat().replace("+00:00", "Z"),
+                "channelId": self.id,
+            },
+            "statistics": {
+                "viewCount": str(rng.randint(100, 5_000_000)),
+                "likeCount": str(rng.randint(0, 100_000)),
+                "commentCount": str(self.thread_count(index)),
+            },
+            "contentDetails": {
+                "duration": f"PT{rng.randint(1, 59)}M{rng.randint(0, 59)}S"
+            },
+        }
+
+    def thread_resource(self, index: int, n: int) -> Dict:
+        rng = _rng(self.seed, self.id, index, "c", n)
+        video_id = self.video_id(index)
+        published = _EPOCH + timedelta(hours=index * 6, minutes=n)
+
+        def _comment(cid: str, text: str) -> Dict:
+            return {
+                "kind": "youtube#comment",
+                "id": cid,
+                "snippet": {
+                    "videoId": video_id,
+                    "textDisplay": text,
+                    "textOriginal": text,
+                    "authorDisplayName": f"viewer{rng.randint(1, 99999)}",
+                    "likeCount": rng.randint(0, 5000),
+                    "publishedAt": published.isoformat().replace("+00:00", "Z"),
+                },
+            }
+
+        thread_id = f"Ug{video_id}{n:05d}"
+        replies = [
+            _comment(f"{thread_id}.r{r}", _sentence(rng))
+            for r in range(rng.choice((0, 0, 0, 1, 2)))
+        ]
+        thread = {
+            "kind": "youtube#commentThread",
+            "id": thread_id,
+            "snippet": {
+                "channelId": self.id,
+                "videoId": video_id,
+                "topLevelComment": _comment(thread_id, _sentence(rng)),
+                "totalReplyCount": len(replies),
+            },
+        }
+        if replies:
+            thread["replies"] = {"comments": replies}
+        return thread
+
+    # -- listings ----------------------------------------------------------
+    def playlist_page(self, offset: int, limit: int) -> List[Dict]:
+        end = min(offset + limit, self.video_count)
+        return [
+            {
+                "kind": "youtube#playlistItem",
+                "snippet": {
+                    "playlistId": self.uploads_playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": self.video_id(i)},
+                },
+            }
+            for i in range(offset, end)
+        ]
+
+    def threads_for_video(self, index: int) -> List[Dict]:
+        return [self.thread_resource(index, n) for n in range(self.thread_count(index))]
+
+
+class RecordedChannel:
+    """
+    A channel replayed from a fixture file written by `apps.fake_youtube.record`.
+    """
+
+    def __init__(self, fixture: Dict):
+        self.channel = fixture["channel"]
+        self.id = self.channel["id"]
+        self.handle = (self.channel["snippet"].get("customUrl") or "").lstrip("@")
+        self.uploads_playlist_id = self.channel["contentDetails"]["relatedPlaylists"][
+            "uploads"
+        ]
+        self.videos: List[Dict] = fixture.get("videos", [])
+        self._by_id = {v["id"]: i for i, v in enumerate(self.videos)}
+        self.threads: Dict[str, List[Dict]] = fixture.get("commentThreads", {})
+        self.video_count = len(self.videos)
+
+    def video_id(self, index: int) -> str:
+        return self.videos[index]["id"]
+
+    def video_index(self, video_id: str) -> Optional[int]:
+        return self._by_id.get(video_id)
+
+    def channel_resource(self) -> Dict:
+        return self.channel
+
+    def video_resource(self, index: int) -> Dict:
+        return self.videos[index]
+
+    def playlist_page(self, offset: int, limit: int) -> List[Dict]:
+        return [
+            {
+                "kind": "youtube#playlistItem",
+                "snippet": {
+                    "playlistId": self.uploads_playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": v["id"]},
+                },
+            }
+            for v in self.videos[offset : offset + limit]
+        ]
+
+    def threads_for_video(self, index: int) -> List[Dict]:
+        return self.threads.get(self.video_id(index), [])
+
+
+class FakeDataset:
+    """
+    Lookup tables the server routes query.  Build with `add_synthetic()` /
+    `add_fixture()` or from env via `from_env()`.
+    """
+
+    def __init__(self):
+        self.channels: Dict[str, object] = {}  # youtube channel id → channel
+        self._by_handle: Dict[str, str] = {}
+        self._by_playlist: Dict[str, str] = {}
+
+    def _add(self, ch) -> None:
+        self.channels[ch.id] = ch
+        if ch.handle:
+            self._by_handle[ch.handle.lower()] = ch.id
+        self._by_playlist[ch.uploads_playlist_id] = ch.id
+
+    def add_synthetic(
+        self,
+        handle: str,
+        video_count: int,
+        comments_per_video: int = 20,
+        seed: int = 0,
+    ) -> SyntheticChannel:
+        ch = SyntheticChannel(handle, video_count, comments_per_video, seed)
+        self._add(ch)
+        return ch
+
+    def add_fixture(self, path: str) -> RecordedChannel:
+        with open(path, encoding="utf-8") as fh:
+            ch = RecordedChannel(json.load(fh))
+        self._add(ch)
+        return ch
+
+    # -- lookups -----------------------------------------------------------
+    def by_handle(self, handle: str):
+        cid = self._by_handle.get(handle.lstrip("@").lower())
+        return self.channels.get(cid) if cid else None
+
+    def by_playlist(self, playlist_id: str):
+        cid = self._by_playlist.get(playlist_id)
+        return self.channels.get(cid) if cid else None
+
+    def find_video(self, video_id: str):
+        """Return (channel, index) for a video id, or (None, None)."""
+        for ch in self.channels.values():
+            index = ch.video_index(video_id)
+            if index is not None:
+                return ch, index
+        return None, None
+
+    @classmethod
+    def from_env(cls, environ: Dict[str, str]) -> "FakeDataset":
+        """
+        FAKE_YT_CHANNELS  "handle:videos[:comments],…"  e.g. "bench100:100:20"
+        FAKE_YT_FIXTURES  comma-separated fixture JSON paths
+        FAKE_YT_SEED      int seed for synthetic content
+        """
+        ds = cls()
+        seed = int(environ.get("FAKE_YT_SEED", 0))
+        for spec in filter(None, environ.get("FAKE_YT_CHANNELS", "").split(",")):
+            parts = spec.strip().split(":")
+            comments = int(parts[2]) if len(parts) > 2 else 20
+            ds.add_synthetic(parts[0], int(parts[1]), comments, seed)
+        for path in filter(None, environ.get("FAKE_YT_FIXTURES", "").split(",")):
+            ds.add_fixture(path.strip())
+        return ds
@@ -0,0 +1,223 @@
+# apps/fake_youtube/main.py
+#
+# Local stand-in for the slice of the YouTube Data API v3 our crawlers use:
+# channels, search, playlistItems, videos and commentThreads.  Models
+# pageToken pagination, per-method quota cost with quotaExceeded errors and
+# configurable latency, and counts every call so benchmarks can report
+# API calls per crawl.
+#
+# Point the crawlers at it with YOUTUBE_API_ENDPOINT=http://127.0.0.1:8090/
+# and run:  uvicorn apps.fake_youtube.main:app --port 8090
+
+import asyncio
+import os
+import random
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from apps.fake_youtube.dataset import FakeDataset
+
+# real API costs (units) for the methods we serve
+QUOTA_COST = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "commentThreads": 1,
+    "search": 100,
+}
+
+
+def _error(code: int, reason: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=code,
+        content={
+            "error": {
+                "code": code,
+                "message": message,
+                "errors": [{"message": message, "domain": "youtube", "reason": reason}],
+            }
+        },
+    )
+
+
+def _page(items, offset: int, limit: int, total: int) -> Dict:
+    body = {
+        "items": items,
+        "pageInfo": {"totalResults": total, "resultsPerPage": limit},
+    }
+    if offset + limit < total:
+        body["nextPageToken"] = str(offset + limit)
+    return body
+
+
+def _offset(token: Optional[str]) -> int:
+    try:
+        return max(int(token), 0) if token else 0
+    except ValueError:
+        return 0
+
+
+def _limit(value: Optional[str], default: int, cap: int) -> int:
+    try:
+        return max(1, min(int(value), cap)) if value else default
+    except ValueError:
+        return default
+
+
+def create_app(
+    dataset: FakeDataset,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    daily_quota: Optional[int] = None,
+) -> FastAPI:
+    """
+    Build the fake API around `dataset`.  `daily_quota=None` means unlimited.
+    """
+    app = FastAPI(title="Fake YouTube Data API")
+    calls: Counter = Counter()
+    state = {"units": 0}
+
+    async def _charge(method: str) -> Optional[JSONResponse]:
+        delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        calls[method] += 1
+        cost = QUOTA_COST[method]
+        if daily_quota is not None and state["units"] + cost > daily_quota:
+            return _error(
+                403,
+                "quotaExceeded",
+                "The request cannot be completed because you have exceeded your quota.",
+            )
+        state["units"] += cost
+        return None
+
+    @app.get("/youtube/v3/channels")
+    async def channels(request: Request):
+        if err := await _charge("channels"):
+            return err
+        q = request.query_params
+        items = []
+        if q.get("id"):
+            items = [
+                dataset.channels[cid].channel_resource()
+                for cid in q["id"].split(",")
+                if cid in dataset.channels
+            ]
+        elif q.get("forUsername"):
+            ch = dataset.by_handle(q["forUsername"])
+            # real API only resolves legacy usernames here, never @handles
+            if ch and not q["forUsername"].startswith("@"):
+                items = [ch.channel_resource()]
+        return {"kind": "youtube#channelListResponse", "items": items}
+
+    @app.get("/youtube/v3/search")
+    async def search(request: Request):
+        if err := await _charge("search"):
+            return err
+        ch = dataset.by_handle(request.query_params.get("q", ""))
+        items = (
+            [{"kind": "youtube#searchResult", "snippet": {"channelId": ch.id}}]
+            if ch
+            else []
+        )
+        return {"kind": "youtube#searchListResponse", "items": items}
+
+    @app.get("/youtube/v3/playlistItems")
+    async def playlist_items(request: Request):
+        if err := await _charge("playlistItems"):
+            return err
+        q = request.query_params
+        ch = dataset.by_playlist(q.get("playlistId", ""))
+        if not ch:
+            return _error(404, "playlistNotFound", "Playlist not found")
+        offset = _offset(q.get("pageToken"))
+        limit = _limit(q.get("maxResults"), 5, 50)
+        return _page(ch.playlist_page(offset, limit), offset, limit, ch.video_count)
+
+    @app.get("/youtube/v3/videos")
+    async def videos(request: Request):
+        if err := await _charge("videos"):
+            return err
+        items = []
+        for vid in request.query_params.get("id", "").split(",")[:50]:
+            ch, index = dataset.find_video(vid)
+            if ch is not None:
+                items.append(ch.video_resource(index))
+        return {"kind": "youtube#videoListResponse", "items": items}
+
+    @app.get("/youtube/v3/commentThreads")
+    async def comment_threads(request: Request):
+        if err := await _charge("commentThreads"):
+            return err
+        q = request.query_params
+        offset = _offset(q.get("pageToken"))
+        limit = _limit(q.get("maxResults"), 20, 100)
+
+        if q.get("videoId"):
+            ch, index = dataset.find_video(q["videoId"])
+            if ch is None:
+                return _error(404, "videoNotFound", "Video not found")
+            threads = ch.threads_for_video(index)
+            return _page(threads[offset : offset + limit], offset, limit, len(threads))
+
+        if q.get("allThreadsRelatedToChannelId"):
+            ch = dataset.channels.get(q["allThreadsRelatedToChannelId"])
+            if ch is None:
+                return _error(404, "channelNotFound", "Channel not found")
+            # walk videos newest-first; the token is "<video index>.<thread n>"
+            index, n = ch.video_count - 1, 0
+            if q.get("pageToken"):
+                try:
+                    index, n = map(int, q["pageToken"].split("."))
+                except ValueError:
+                    return _error(400, "invalidPageToken", "Invalid page token.")
+            page = []
+            while index >= 0 and len(page) < limit:
+                threads = ch.threads_for_video(index)
+                take = threads[n : n + limit - len(page)]
+                page.extend(take)
+                n += len(take)
+                if n >= len(threads):
+                    index, n = index - 1, 0
+            body = {"items": page}
+            if index >= 0:
+                body["nextPageToken"] = f"{index}.{n}"
+            return body
+
+        return _error(400, "missingRequiredParameter", "No filter selected.")
+
+    # -- introspection for benchmarks --------------------------------------
+    @app.get("/_fake/stats")
+    async def stats():
+        return {
+            "calls": dict(calls),
+            "total_calls": sum(calls.values()),
+            "quota_units": state["units"],
+            "daily_quota": daily_quota,
+        }
+
+    @app.post("/_fake/reset")
+    async def reset():
+        calls.clear()
+        state["units"] = 0
+        return {"detail": "reset"}
+
+    return app
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+app = create_app(
+    FakeDataset.from_env(os.environ),
+    latency_ms=_env_float("FAKE_YT_LATENCY_MS", 0),
+    jitter_ms=_env_float("FAKE_YT_JITTER_MS", 0),
+    daily_quota=int(os.environ["FAKE_YT_DAILY_QUOTA"])
+    if os.getenv("FAKE_YT_DAILY_QUOTA")
+    else None,
+)
@@ -0,0 +1,87 @@
+# apps/fake_youtube/record.py
+#
+# Record a real channel into a fixture file the fake server can replay:
+#
+#   python -m apps.fake_youtube.record @ludwig fixtures/ludwig.json \
+#       --max-videos 50 --max-threads 100
+#
+# Uses the real API (and real quota) exactly once; replays are free.
+
+import argparse
+import json
+import os
+
+from libs.youtube.client import build_youtube
+from libs.youtube.get_youtube_channel_info import get_channel_info_by_handle
+
+
+def record_channel(api_key: str, handle: str, max_videos: int, max_threads: int) -> dict:
+    youtube = build_youtube(api_key)
+    channel = get_channel_info_by_handle(handle, api_key=api_key)
+    uploads = channel["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    videos, threads, page = [], {}, None
+    while len(videos) < max_videos:
+        resp = (
+            youtube.playlistItems()
+            .list(part="snippet", playlistId=uploads, maxResults=50, pageToken=page)
+            .execute()
+        )
+        ids = [i["snippet"]["resourceId"]["videoId"] for i in resp.get("items", [])]
+        if not ids:
+            break
+        details = (
+            youtube.videos()
+            .list(part="snippet,statistics,contentDetails", id=",".join(ids))
+            .execute()
+        )
+        videos.extend(details.get("items", [])[: max_videos - len(videos)])
+        page = resp.get("nextPageToken")
+        if not page:
+            break
+
+    for v in videos:
+        items, page = [], None
+        while len(items) < max_threads:
+            try:
+                resp = (
+                    youtube.commentThreads()
+                    .list(
+                        part="snippet,replies",
+                        videoId=v["id"],
+                        maxResults=min(100, max_threads),
+                        pageToken=page,
+                        textFormat="plainText",
+                    )
+                    .execute()
+                )
+            except Exception:  # comments disabled, etc.
+                break
+            items.extend(resp.get("items", []))
+            page = resp.get("nextPageToken")
+            if not page:
+                break
+        threads[v["id"]] = items[:max_threads]
+
+    return {"channel": channel, "videos": videos, "commentThreads": threads}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(
+        description="Record a real channel into a fixture for the fake YouTube server."
+    )
+    ap.add_argument("handle")
+    ap.add_argument("out")
+    ap.add_argument("--max-videos", type=int, default=50)
+    ap.add_argument("--max-threads", type=int, default=100)
+    args = ap.parse_args()
+
+    fixture = record_channel(
+        os.environ["YOUTUBE_API_KEY"], args.handle, args.max_videos, args.max_threads
+    )
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(fixture, fh)
+    print(
+        f"recorded {len(fixture['videos'])} videos, "
+        f"{sum(map(len, fixture['commentThreads'].values()))} threads → {args.out}"
+    )
@@ -70,6 +70,17 @@ def get_current_user_id(
     return payload["sub"]
 
 
+def get_admin_user_id(user_id: str = Depends(get_current_user_id)) -> str:
+    """
+    Like get_current_user_id, but only for users in ADMIN_USER_IDS.
+    """
+    if user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admins only"
+        )
+    return user_id
+
+
 # ---------------------------------------------------------------------------
 # public endpoints
 # ---------------------------------------------------------------------------
@@ -17,8 +17,22 @@ from libs.database.youtube.comments import (
     delete_comments_by_video_id,
     get_comments_by_video_id,
 )
+from libs.database.youtube.comment_labels import delete_labels_by_video_id
 from libs.database.youtube.videos import get_videos_by_channel_id
-from libs.tasks_youtube import enqueue_sync_channel, enqueue_grab_comments
+from libs.database.youtube.stats import (
+    get_channel_stats_series,
+    get_video_stats_series,
+)
+from libs.database.youtube.monitors import get_monitor, request_stop, start_monitor
+from libs.database.youtube.videos import get_video_by_id
+from libs.tasks_youtube import (
+    enqueue_grab_channel_comments,
+    enqueue_grab_comments,
+    enqueue_monitor_video,
+    enqueue_sync_channel,
+)
+from libs.youtube.monitor import QUEUED_HEARTBEAT_S, heartbeat, monitor_alive
+from libs.youtube.quota import remaining_today
 from libs.youtube.service import get_channel_info  # Celery wrappers
 
 app = FastAPI(title="YouTube Service")
@@ -94,6 +108,36 @@ async def list_videos(channel_id: str):
     return {"videos": videos}
 
 
+def _validate_series_query(oid: str, unit: str, days: int) -> None:
+    try:
+        ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid id {oid!r}")
+    if unit not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="unit must be 'hour' or 'day'")
+    if not 1 <= days <= 365:
+        raise HTTPException(status_code=400, detail="days must be within 1..365")
+
+
+@app.get("/channels/{channel_id}/stats")
+async def channel_stats(channel_id: str, unit: str = "day", days: int = 90):
+    """
+    Downsampled statistics history (subscribers, views, video count) plus
+    per-point and overall growth deltas.
+    """
+    _validate_series_query(channel_id, unit, days)
+    return await get_channel_stats_series(channel_id, days=days, unit=unit)
+
+
+@app.get("/videos/{video_id}/stats")
+async def video_stats(video_id: str, unit: str = "day", days: int = 90):
+    """
+    Downsampled view / like / comment history plus growth deltas.
+    """
+    _validate_series_query(video_id, unit, days)
+    return await get_video_stats_series(video_id, days=days, unit=unit)
+
+
 @app.post("/videos/{video_id}/comments", status_code=202)
 async def grab_comments(
     video_id: str, limit: int = 100, background: BackgroundTasks = None
@@ -107,6 +151,26 @@ async def grab_comments(
     return {"detail": "comment crawl queued", "video_id": video_id}
 
 
+@app.post("/channels/{channel_id}/comments", status_code=202)
+async def grab_channel_comments(
+    channel_id: str, limit: int = 10_000, background: BackgroundTasks = None
+):
+    """
+    Queue one channel-wide crawl that refreshes comments for all synced
+    videos (allThreadsRelatedToChannelId) instead of one task per video.
+    """
+    try:
+        ObjectId(channel_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid channel_id")
+    if background is None:
+        background = BackgroundTasks()
+    background.add_task(
+        enqueue_grab_channel_comments, channel_id=channel_id, limit=limit
+    )
+    return {"detail": "channel comment crawl queued", "channel_id": channel_id}
+
+
 @app.get("/videos/{video_id}/comments")
 async def get_comments(video_id: str):
     """
@@ -135,4 +199,74 @@ async def delete_comments(video_id: str):
         )
 
     await delete_comments_by_video_id(video_id)
+    await delete_labels_by_video_id(video_id)
     return {"detail": "comments deleted", "video_id": video_id}
+
+
+# ---------------------------------------------------------------------------
+# live / premiere monitoring
+# ---------------------------------------------------------------------------
+
+MAX_MONITOR_MINUTES = 360
+
+
+@app.post("/videos/{video_id}/monitor", status_code=202)
+async def start_video_monitor(
+    video_id: str, minutes: int = 60, background: BackgroundTasks = None
+):
+    """
+    Start polling a live stream / premiere for new comments or chat messages.
+    """
+    try:
+        ObjectId(video_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid video_id")
+    if not 1 <= minutes <= MAX_MONITOR_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"minutes must be within 1..{MAX_MONITOR_MINUTES}",
+        )
+    if not await get_video_by_id(video_id):
+        raise HTTPException(status_code=404, detail=f"Video {video_id!r} not found")
+
+    current = await get_monitor(video_id)
+    # a hard-killed monitor stays "running" in Mongo but its heartbeat expires
+    if (
+        current
+        and current.get("status") in ("queued", "running")
+        and await monitor_alive(video_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A monitor is already active for this video.",
+        )
+    if await remaining_today() <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="YouTube quota for today is exhausted.",
+        )
+
+    await start_monitor(video_id, {"minutes": minutes})
+    await heartbeat(video_id, QUEUED_HEARTBEAT_S)
+    if background is None:
+        background = BackgroundTasks()
+    background.add_task(enqueue_monitor_video, video_id=video_id, minutes=minutes)
+    return {"detail": "monitor queued", "video_id": video_id, "minutes": minutes}
+
+
+@app.get("/videos/{video_id}/monitor")
+async def read_video_monitor(video_id: str):
+    """
+    Current rolling aggregates (rate, sentiment), interval and spend.
+    """
+    doc = await get_monitor(video_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="No monitor for this video")
+    return sanitize_mongo_document(doc)
+
+
+@app.delete("/videos/{video_id}/monitor")
+async def stop_video_monitor(video_id: str):
+    if not await request_stop(video_id):
+        raise HTTPException(status_code=404, detail="No active monitor for this video")
+    return {"detail": "stop requested", "video_id": video_id}
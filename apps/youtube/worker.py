@@ -5,6 +5,8 @@ from config.config import settings
 import asyncio
 from libs.youtube.get_all_videos_from_channel import get_all_videos_from_channel
 from libs.youtube.get_youtube_comments import get_youtube_comments
+from libs.youtube.get_channel_comments import get_channel_comments
+from libs.youtube.monitor import monitor_video
 
 # only one Celery app here—no second override!
 broker_url = (
@@ -40,3 +42,26 @@ def grab_comments_task(video_id: str, limit: int):
             max_comments=limit,
         )
     )
+
+
+@celery.task(name="youtube.grab_channel_comments")
+def grab_channel_comments_task(channel_id: str, limit: int):
+    return asyncio.run(
+        get_channel_comments(
+            api_key=settings.YOUTUBE_API_KEY,
+            channel_id=channel_id,
+            max_threads=limit,
+        )
+    )
+
+
+@celery.task(name="youtube.monitor_video")
+def monitor_video_task(video_id: str, minutes: int):
+    # long-running on purpose: holds one worker slot for the watch duration
+    return asyncio.run(
+        monitor_video(
+            api_key=settings.YOUTUBE_API_KEY,
+            video_id=video_id,
+            minutes=minutes,
+        )
+    )
@@ -0,0 +1,98 @@
+# benchmarks/analysis_modes.py
+#
+# Side-by-side comparison of the per-extractor and fused analysis modes on
+# real stored comments.  Nothing is written to the analysis collection.
+#
+#   python -m benchmarks.analysis_modes <video_id> [<video_id> …] [--json]
+#
+# Reports, per video and mode: input/output tokens, wall-clock latency and
+# number of LLM calls, plus parity between the two outputs (mean absolute
+# sentiment difference, Jaccard overlap of discussion themes and people).
+# LLM cache reads are bypassed so every call is actually made and timed.
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from libs.agents.cache import bypass_cache
+from libs.agents.comments_analyzer.comments_analyzer import build_blob, run_extractors
+from libs.agents.llm import capture_usage
+
+MODES = ("per_extractor", "fused")
+
+
+def _jaccard(a, b) -> float:
+    a, b = {x.lower() for x in a}, {x.lower() for x in b}
+    return round(len(a & b) / len(a | b), 3) if a | b else 1.0
+
+
+def parity(x: Dict, y: Dict) -> Dict:
+    diffs = [
+        abs(x["sentiments"][cat][k] - y["sentiments"][cat][k])
+        for cat in ("video", "creator", "topic")
+        for k in ("positive", "neutral", "negative")
+    ]
+    themes = lambda r: [d["name"] for cat in r["discussions"].values() for d in cat]
+    return {
+        "sentiment_mae": round(sum(diffs) / len(diffs), 2),
+        "discussion_jaccard": _jaccard(themes(x), themes(y)),
+        "people_jaccard": _jaccard(
+            [p["name"] for p in x["people"]], [p["name"] for p in y["people"]]
+        ),
+        "other_insights": (len(x["other_insights"]), len(y["other_insights"])),
+        "video_requests": (len(x["video_requests"]), len(y["video_requests"])),
+    }
+
+
+async def bench_video(video_id: str) -> Dict:
+    built = await build_blob(video_id)
+    if not built:
+        return {"video_id": video_id, "error": "no comments"}
+    blob, comments_text = built
+
+    row: Dict = {"video_id": video_id, "blob_chars": len(blob)}
+    outputs = {}
+    for mode in MODES:
+        with bypass_cache(), capture_usage() as calls:
+            t0 = time.perf_counter()
+            outputs[mode] = await run_extractors(video_id, blob, comments_text, mode)
+            elapsed = time.perf_counter() - t0
+        row[mode] = {
+            "latency_s": round(elapsed, 2),
+            "calls": len(calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        }
+    row["parity"] = parity(outputs["per_extractor"], outputs["fused"])
+    return row
+
+
+def _print(rows: List[Dict]) -> None:
+    for r in rows:
+        if "error" in r:
+            print(f"{r['video_id']}: {r['error']}")
+            continue
+        print(f"{r['video_id']}  ({r['blob_chars']} chars)")
+        for mode in MODES:
+            m = r[mode]
+            print(
+                f"  {mode:<14} {m['latency_s']:>7}s  calls={m['calls']}  "
+                f"in={m['prompt_tokens']}  out={m['completion_tokens']}"
+            )
+        print(f"  parity         {r['parity']}")
+
+
+async def main(video_ids: List[str]) -> List[Dict]:
+    return [await bench_video(v) for v in video_ids]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="per-extractor vs fused analysis")
+    ap.add_argument("video_ids", nargs="+")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rows = asyncio.run(main(args.video_ids))
+    print(json.dumps(rows, indent=2)) if args.json else _print(rows)
@@ -0,0 +1,231 @@
+# benchmarks/analysis_pipeline.py
+#
+# End-to-end analyze_and_store_comments throughput against the local fake
+# OpenAI API (apps/fake_openai) – no tokens are spent.
+#
+#   MONGO_DB=vibecast_bench python -m benchmarks.analysis_pipeline \
+#       --sizes 100,1000,10000,100000 --videos 5 --concurrency 4 \
+#       --latency-ms 400 --latency-sigma 0.5 --rpm 500
+#
+# For every comment count it seeds `--videos` synthetic videos (threads from
+# apps/fake_youtube's generator), analyses them `--concurrency` at a time
+# and reports:
+#   * analyses/minute and p50 / p99 per-video latency
+#   * LLM calls, prompt and completion tokens per extractor (from the usage
+#     records the pipeline stores) and the fake server's 429 count
+#
+# Needs Mongo and Redis.  Everything the run writes is deleted afterwards,
+# but point MONGO_DB at a scratch database anyway.
+
+import argparse
+import asyncio
+import json
+import math
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from bson import ObjectId
+
+from apps.fake_openai.main import create_app
+from apps.fake_youtube.dataset import SyntheticChannel
+from config.config import settings
+from config.database import db
+from libs.agents.comments_analyzer.comments_analyzer import analyze_and_store_comments
+from libs.database.usage import get_video_usage
+from libs.database.youtube.channels import upsert_channel
+from libs.database.youtube.comments import create_comments
+from libs.database.youtube.videos import create_video
+from libs.youtube.get_youtube_comments import thread_to_entry
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def synthetic_threads(ch: SyntheticChannel, index: int, count: int) -> List[Dict]:
+    # only what the analyser reads: 100k full entries would pass Mongo's
+    # 16 MB document limit
+    return [
+        {k: e[k] for k in ("id", "text", "replies")}
+        for e in (thread_to_entry(ch.thread_resource(index, n)) for n in range(count))
+    ]
+
+
+async def _seed(channel_id: str, ch: SyntheticChannel, size: int, videos: int) -> List[str]:
+    ids = []
+    for i in range(videos):
+        vid = await create_video(
+            name=f"bench {size} #{i}",
+            youtube_video_id=f"bench{size:07d}{i:04d}",
+            channel_id=channel_id,
+            publish_time="2024-01-01T00:00:00Z",
+            view_count=1000,
+        )
+        await create_comments(vid, synthetic_threads(ch, i, size))
+        ids.append(vid)
+    return ids
+
+
+async def _cleanup(channel_id: str) -> None:
+    oid = ObjectId(channel_id)
+    vids = [v["_id"] async for v in db.videos.find({"channel_id": oid}, {"_id": 1})]
+    await db.comments.delete_many({"video_id": {"$in": vids}})
+    await db.comment_analysis.delete_many({"comment_id": {"$in": vids}})
+    await db.analysis_coverage.delete_many({"comment_id": {"$in": vids}})
+    await db.analysis_runs.delete_many({"video_id": {"$in": vids}})
+    await db.llm_usage.delete_many({"video_id": {"$in": vids}})
+    await db.llm_usage_daily.delete_many({"scope": "channel", "key": oid})
+    await db.videos.delete_many({"channel_id": oid})
+    await db.channels.delete_one({"_id": oid})
+
+
+async def bench_size(size: int, args, fake_base: str) -> Dict:
+    ch = SyntheticChannel(f"analysisbench{size}", 1, 0, args.seed)
+    channel_id = await upsert_channel(
+        {"name": ch.handle, "youtube_channel_id": ch.id, "kind": "youtube#channel"}
+    )
+    httpx.post(f"{fake_base}/_fake/reset")
+    try:
+        video_ids = await _seed(channel_id, ch, size, args.videos)
+        latencies: List[float] = []
+        failures = Counter()
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def _one(vid: str) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    await analyze_and_store_comments(vid, use_cache=False, full=True)
+                except Exception as e:
+                    failures[type(e).__name__] += 1
+                    return
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_one(v) for v in video_ids))
+        wall = time.perf_counter() - t0
+
+        by_label: Dict[str, Counter] = defaultdict(Counter)
+        for vid in video_ids:
+            for run in await get_video_usage(vid, limit=1):
+                for label, t in run["by_label"].items():
+                    for k in ("calls", "prompt_tokens", "completion_tokens", "retries"):
+                        by_label[label][k] += t.get(k, 0)
+        stats = httpx.get(f"{fake_base}/_fake/stats").json()
+    finally:
+        await _cleanup(channel_id)
+
+    return {
+        "comments": size,
+        "videos": len(video_ids),
+        "ok": len(latencies),
+        "failed": dict(failures),
+        "wall_s": round(wall, 2),
+        "analyses_per_min": round(len(latencies) * 60.0 / wall, 2) if wall else None,
+        "p50_s": round(percentile(latencies, 50), 2),
+        "p99_s": round(percentile(latencies, 99), 2),
+        "by_extractor": {k: dict(v) for k, v in sorted(by_label.items())},
+        "rate_limited": stats["calls"].get("rate_limited", 0),
+    }
+
+
+def _print(rows: List[Dict]) -> None:
+    print(
+        f"{'comments':>8} {'ok':>4} {'fail':>4} | {'an/min':>8} {'p50 s':>7} "
+        f"{'p99 s':>7} | {'calls':>6} {'in tok':>10} {'out tok':>8} {'429s':>5}"
+    )
+    for r in rows:
+        totals = Counter()
+        for t in r["by_extractor"].values():
+            totals.update(t)
+        print(
+            f"{r['comments']:>8} {r['ok']:>4} {sum(r['failed'].values()):>4} | "
+            f"{r['analyses_per_min']!s:>8} {r['p50_s']:>7} {r['p99_s']:>7} | "
+            f"{totals['calls']:>6} {totals['prompt_tokens']:>10} "
+            f"{totals['completion_tokens']:>8} {r['rate_limited']:>5}"
+        )
+        for label, t in r["by_extractor"].items():
+            print(
+                f"{'':>8}   {label:<16} calls={t.get('calls', 0)} "
+                f"in={t.get('prompt_tokens', 0)} out={t.get('completion_tokens', 0)} "
+                f"retries={t.get('retries', 0)}"
+            )
+
+
+async def main(args) -> List[Dict]:
+    port = _free_port()
+    server = _start_server(
+        create_app(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            ms_per_token=args.ms_per_token,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            error_rate=args.error_rate,
+        ),
+        port,
+    )
+    base = f"http://127.0.0.1:{port}"
+    # the pooled client is built lazily, so this takes effect for the run
+    settings.OPENAI_BASE_URL = f"{base}/v1"
+    settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "fake-key"
+    settings.LLM_CACHE_ENABLED = False
+    if args.mode:
+        settings.ANALYSIS_MODE = args.mode
+    if args.sentiment_tier:
+        settings.SENTIMENT_TIER = args.sentiment_tier
+
+    rows = []
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            rows.append(await bench_size(size, args, base))
+    finally:
+        server.should_exit = True
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="analysis pipeline benchmark")
+    ap.add_argument("--sizes", default="100,1000,10000,100000")
+    ap.add_argument("--videos", type=int, default=5)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--mode", choices=("per_extractor", "fused"))
+    ap.add_argument("--sentiment-tier", choices=("llm", "local", "auto"))
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--latency-sigma", type=float, default=0.4)
+    ap.add_argument("--ms-per-token", type=float, default=0.0)
+    ap.add_argument("--rpm", type=int)
+    ap.add_argument("--tpm", type=int)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="print raw JSON rows")
+    args = ap.parse_args()
+
+    rows = asyncio.run(main(args))
+    print(json.dumps(rows, indent=2)) if args.json else _print(rows)
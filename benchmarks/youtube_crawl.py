@@ -0,0 +1,252 @@
+# benchmarks/youtube_crawl.py
+#
+# Crawl throughput against the local fake YouTube API (apps/fake_youtube).
+#
+#   MONGO_DB=vibecast_bench python -m benchmarks.youtube_crawl \
+#       --sizes 100,10000,100000 --comment-videos 50 --latency-ms 20
+#
+# For every synthetic channel size it reports:
+#   * videos/s and API calls for get_all_videos_from_channel
+#   * comments/s and API calls for get_youtube_comments over a sample
+#   * the same for one channel-wide get_channel_comments crawl
+#   * handle lookups/s for get_channel_info_by_handle
+#   * peak Python heap (tracemalloc) per phase
+#
+# Everything the run writes to Mongo is deleted afterwards, but point
+# MONGO_DB at a scratch database anyway.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from bson import ObjectId
+
+from apps.fake_youtube.dataset import FakeDataset
+from apps.fake_youtube.main import create_app
+from config.database import db
+from libs.database.youtube.channels import upsert_channel
+from libs.youtube.get_all_videos_from_channel import get_all_videos_from_channel
+from libs.youtube.get_channel_comments import get_channel_comments
+from libs.youtube.get_youtube_channel_info import get_channel_info_by_handle
+from libs.youtube.get_youtube_comments import get_youtube_comments
+
+API_KEY = "fake-key"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+class _Fake:
+    """Thin client for the fake server's introspection endpoints."""
+
+    def __init__(self, base: str):
+        self.base = base
+
+    def reset(self) -> None:
+        httpx.post(f"{self.base}_fake/reset")
+
+    def stats(self) -> Dict:
+        return httpx.get(f"{self.base}_fake/stats").json()
+
+
+async def _measure(coro_fn, trace: bool):
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = await coro_fn()
+    elapsed = time.perf_counter() - t0
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+async def _bench_size(
+    ch, fake: _Fake, comment_videos: int, lookups: int, trace: bool
+) -> Dict:
+    resource = ch.channel_resource()
+    channel_id = await upsert_channel(
+        {
+            "name": resource["snippet"]["title"],
+            "youtube_channel_id": resource["id"],
+            "kind": resource["kind"],
+            "etag": resource["etag"],
+            "snippet": resource["snippet"],
+            "contentDetails": resource["contentDetails"],
+            "statistics": {
+                k: (v if isinstance(v, bool) else int(v))
+                for k, v in resource["statistics"].items()
+            },
+        }
+    )
+    row: Dict = {"videos": ch.video_count}
+
+    try:
+        # -- channel sync ---------------------------------------------------
+        fake.reset()
+        videos, secs, peak = await _measure(
+            lambda: get_all_videos_from_channel(api_key=API_KEY, channel_id=channel_id),
+            trace,
+        )
+        row["sync"] = {
+            "seconds": round(secs, 3),
+            "videos_per_s": round(len(videos) / secs, 1) if secs else None,
+            "api_calls": fake.stats()["total_calls"],
+            "peak_mem_mb": round(peak / 2**20, 2),
+        }
+
+        # -- comment crawl over a sample of the synced videos ---------------
+        stored = [
+            str(v["_id"])
+            async for v in db.videos.find(
+                {"channel_id": ObjectId(channel_id)}, {"_id": 1}
+            ).limit(comment_videos)
+        ]
+
+        async def _crawl_comments() -> int:
+            total = 0
+            for vid in stored:
+                threads = await get_youtube_comments(
+                    api_key=API_KEY, video_id=vid, max_comments=100
+                )
+                total += len(threads) + sum(len(t["replies"]) for t in threads)
+            return total
+
+        fake.reset()
+        n_comments, secs, peak = await _measure(_crawl_comments, trace)
+        row["comments"] = {
+            "videos": len(stored),
+            "comments": n_comments,
+            "seconds": round(secs, 3),
+            "comments_per_s": round(n_comments / secs, 1) if secs else None,
+            "api_calls": fake.stats()["total_calls"],
+            "peak_mem_mb": round(peak / 2**20, 2),
+        }
+
+        # -- one channel-wide crawl for roughly the same thread budget ------
+        fake.reset()
+        crawl, secs, peak = await _measure(
+            lambda: get_channel_comments(
+                api_key=API_KEY,
+                channel_id=channel_id,
+                max_threads=max(row["comments"]["comments"], 1),
+            ),
+            trace,
+        )
+        row["channel_comments"] = {
+            "videos": crawl.get("videos", 0),
+            "threads": crawl.get("threads", 0),
+            "seconds": round(secs, 3),
+            "threads_per_s": round(crawl.get("threads", 0) / secs, 1) if secs else None,
+            "api_calls": fake.stats()["total_calls"],
+            "peak_mem_mb": round(peak / 2**20, 2),
+        }
+
+        # -- handle lookups (blocking client, as used by subscribe) ---------
+        fake.reset()
+        t0 = time.perf_counter()
+        for _ in range(lookups):
+            get_channel_info_by_handle(ch.handle, api_key=API_KEY)
+        secs = time.perf_counter() - t0
+        row["lookup"] = {
+            "lookups": lookups,
+            "lookups_per_s": round(lookups / secs, 1) if secs else None,
+            "api_calls": fake.stats()["total_calls"],
+            "quota_units": fake.stats()["quota_units"],
+        }
+    finally:
+        oid = ObjectId(channel_id)
+        vids = [v["_id"] async for v in db.videos.find({"channel_id": oid}, {"_id": 1})]
+        await db.comments.delete_many({"video_id": {"$in": vids}})
+        await db.video_stats.delete_many({"meta.video_id": {"$in": vids}})
+        await db.channel_stats.delete_many({"meta.channel_id": oid})
+        await db.videos.delete_many({"channel_id": oid})
+        await db.channels.delete_one({"_id": oid})
+
+    return row
+
+
+def _print_table(rows: List[Dict]) -> None:
+    print(
+        f"{'videos':>8} | {'sync s':>8} {'vid/s':>9} {'calls':>6} {'MB':>7} | "
+        f"{'comments':>8} {'com/s':>9} {'calls':>6} {'MB':>7} | "
+        f"{'ch thr':>7} {'thr/s':>9} {'calls':>6} | {'lookup/s':>8}"
+    )
+    for r in rows:
+        s, c, cc, l = r["sync"], r["comments"], r["channel_comments"], r["lookup"]
+        print(
+            f"{r['videos']:>8} | {s['seconds']:>8} {s['videos_per_s']!s:>9} "
+            f"{s['api_calls']:>6} {s['peak_mem_mb']:>7} | {c['comments']:>8} "
+            f"{c['comments_per_s']!s:>9} {c['api_calls']:>6} {c['peak_mem_mb']:>7} | "
+            f"{cc['threads']:>7} {cc['threads_per_s']!s:>9} {cc['api_calls']:>6} | "
+            f"{l['lookups_per_s']!s:>8}"
+        )
+
+
+async def main(args) -> List[Dict]:
+    sizes = [int(s) for s in args.sizes.split(",")]
+    dataset = FakeDataset()
+    channels = [
+        dataset.add_synthetic(f"bench{n}", n, args.comments_per_video, args.seed)
+        for n in sizes
+    ]
+
+    port = _free_port()
+    server = _start_server(
+        create_app(dataset, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms),
+        port,
+    )
+    base = f"http://127.0.0.1:{port}/"
+    os.environ["YOUTUBE_API_ENDPOINT"] = base
+    fake = _Fake(base)
+
+    rows = []
+    try:
+        for ch in channels:
+            rows.append(
+                await _bench_size(
+                    ch, fake, args.comment_videos, args.lookups, not args.no_memory
+                )
+            )
+    finally:
+        server.should_exit = True
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="YouTube crawl benchmark")
+    ap.add_argument("--sizes", default="100,10000,100000")
+    ap.add_argument("--comments-per-video", type=int, default=20)
+    ap.add_argument("--comment-videos", type=int, default=50)
+    ap.add_argument("--lookups", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    ap.add_argument("--json", action="store_true", help="print raw JSON rows")
+    args = ap.parse_args()
+
+    rows = asyncio.run(main(args))
+    print(json.dumps(rows, indent=2)) if args.json else _print_table(rows)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict, EmailStr
 from openai import OpenAI
@@ -22,6 +22,8 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     OPENAI_API_KEY: str
+    # point at a local stand-in (apps/fake_openai) for tests / benchmarks
+    OPENAI_BASE_URL: Optional[str] = None
 
     # MAILER config
     MAILER_API_KEY: str
@@ -30,10 +32,128 @@ class Settings(BaseSettings):
     # JWT and session keys
     JWT_SECRET_KEY: str
     SESSION_SECRET_KEY: str
+    # users allowed on the cluster-wide ops endpoints (LLM cache / route stats)
+    ADMIN_USER_IDS: List[str] = []
 
     # Celery broker/backend
     CELERY_BROKER_URL: Optional[str] = None
     CELERY_BACKEND_URL: Optional[str] = None
+    # Redis broker redelivers unacked / ETA tasks after this long; keep it
+    # above the longest ETA we set (budget deferral to the next UTC midnight)
+    CELERY_VISIBILITY_TIMEOUT_S: int = 26 * 3600
+
+    # LLM calls: in-flight cap per worker process, connection pool, timeouts
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_TIMEOUT_S: float = 60.0
+    LLM_MAX_RETRIES: int = 2
+    # model routes (libs/agents/routing.py) – "model" or "model@endpoint":
+    # named endpoints {name: {"base_url", "api_key"}}, fallback chains per
+    # route, and the delay after which a slow call is hedged on the next route
+    LLM_ENDPOINTS: Dict[str, Dict[str, str]] = {}
+    LLM_FALLBACKS: Dict[str, List[str]] = {}
+    LLM_HEDGE_AFTER_S: Optional[float] = None
+    # cluster-wide governor (libs/agents/governor.py): AIMD concurrency per
+    # route, cut on 429s and on calls slower than LLM_GOV_LATENCY_TARGET_S;
+    # request / token buckets per route or model, e.g.
+    # {"gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}}.  429s wait out their
+    # Retry-After for up to LLM_RATE_LIMIT_MAX_WAIT_S, then the run is deferred
+    LLM_GOVERNOR_ENABLED: bool = True
+    LLM_GOV_MIN_CONCURRENCY: int = 2
+    LLM_GOV_MAX_CONCURRENCY: int = 64
+    LLM_GOV_LATENCY_TARGET_S: Optional[float] = None
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    LLM_RATE_LIMIT_MAX_WAIT_S: float = 120.0
+
+    # "per_extractor" (six focused calls) or "fused" (one structured call)
+    ANALYSIS_MODE: str = "per_extractor"
+    # comment tokens per prompt; bigger comment sets are map-reduced in chunks
+    ANALYSIS_CHUNK_TOKENS: int = 12_000
+    # incremental re-analysis: only new threads are sent, with a periodic
+    # full recompute (libs/agents/comments_analyzer/incremental.py)
+    ANALYSIS_INCREMENTAL: bool = True
+    ANALYSIS_FULL_EVERY_RUNS: int = 24
+    ANALYSIS_FULL_MAX_AGE_H: int = 7 * 24
+    # one run per video at a time (libs/agents/locks.py): repeat requests
+    # within ANALYSIS_DEDUP_TTL_S join the queued run; a worker holds a
+    # renewed lease on the video and busy tasks retry after ANALYSIS_LOCK_RETRY_S
+    ANALYSIS_DEDUP_TTL_S: int = 30 * 60
+    ANALYSIS_LEASE_S: float = 60.0
+    ANALYSIS_LOCK_RETRY_S: int = 30
+    # channel-wide jobs (libs/agents/orchestrator.py): runs per channel in
+    # the queue at once, and videos per job
+    CHANNEL_ANALYSIS_CONCURRENCY: int = 3
+    CHANNEL_ANALYSIS_MAX_VIDEOS: int = 500
+
+    # per-extractor defaults for the DAG scheduler (extractors/registry.py);
+    # EXTRACTOR_MODELS maps a section name to the model (or route) its calls use
+    EXTRACTOR_TIMEOUT_S: Optional[float] = 180.0
+    EXTRACTOR_RETRIES: int = 1
+    EXTRACTOR_MODELS: Dict[str, str] = {}
+
+    # comment clean-up before prompting (comments_analyzer/preprocess.py)
+    PREPROCESS_ENABLED: bool = True
+    PREPROCESS_MAX_CHARS: int = 500
+    PREPROCESS_SIMHASH_DISTANCE: int = 4  # max differing bits for near dups
+    # above ANALYSIS_SAMPLE_TOKENS comment tokens an engagement-weighted,
+    # sentiment-stratified sample is analysed and weighted back to all
+    # comments (comments_analyzer/sampling.py).  Lossy, so opt-in;
+    # None = analyse everything
+    ANALYSIS_SAMPLE_TOKENS: Optional[int] = None
+    SAMPLE_HALF_LIFE_DAYS: float = 7.0
+
+    # sentiments: "llm", "local" (lexicon only) or "auto" (lexicon unless
+    # its confidence is below SENTIMENT_MIN_CONFIDENCE).  The lexicon tiers
+    # can't separate "video" from "topic" (both get the overall split), so
+    # they are opt-in
+    SENTIMENT_TIER: str = "llm"
+    SENTIMENT_MIN_CONFIDENCE: float = 0.6
+
+    # discussions: "llm" (the model finds and counts themes) or "clustered"
+    # (comments are clustered locally with exact counts, the model only
+    # names DISCUSSIONS_EXEMPLARS exemplars per cluster, theme sentiment
+    # comes from the lexicon).  "clustered" changes the section's output,
+    # so it is opt-in
+    DISCUSSIONS_MODE: str = "llm"
+    DISCUSSIONS_MIN_COMMENTS: int = 30
+    DISCUSSIONS_MAX_CLUSTERS: int = 15
+    DISCUSSIONS_EXEMPLARS: int = 3
+    DISCUSSIONS_HASH_DIM: int = 256
+
+    # per-comment labels (comments_analyzer/labels.py): "local" (lexicon +
+    # clusters) or "llm" (LABELS_BATCH_SIZE comments per call)
+    LABELS_TIER: str = "local"
+    LABELS_BATCH_SIZE: int = 100
+
+    # daily LLM spend limits in USD (libs/agents/usage.py); None = unlimited.
+    # Over budget: "defer" to the next UTC day, or "downgrade" to the fused
+    # mode until BUDGET_HARD_FACTOR × budget, then defer
+    USER_DAILY_BUDGET_USD: Optional[float] = None
+    CHANNEL_DAILY_BUDGET_USD: Optional[float] = None
+    BUDGET_ACTION: str = "defer"
+    BUDGET_HARD_FACTOR: float = 1.5
+
+    # LLM response cache (libs/agents/cache.py)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_PROMPT_VERSION: str = "1"  # bump to invalidate cached answers
+    LLM_CACHE_TTL_S: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_DIR: Optional[str] = None
+    LLM_CACHE_DISK_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # offline re-analysis through the OpenAI Batch API (libs/agents/batch.py)
+    BATCH_MAX_REQUESTS: int = 50_000  # API limit per batch file
+    BATCH_MAX_FILE_BYTES: int = 190 * 1024 * 1024  # API limit is 200 MB per file
+    BATCH_POLL_INTERVAL_S: int = 300
+    BATCH_COMPLETION_WINDOW: str = "24h"
+    BATCH_NIGHTLY_HOUR: Optional[int] = None  # UTC hour for the beat job; None = off
+
+    # YouTube Data API quota (units per Pacific-time day) and live monitoring
+    YOUTUBE_DAILY_QUOTA: int = 10_000
+    MONITOR_MIN_INTERVAL_S: float = 5.0
+    MONITOR_MAX_INTERVAL_S: float = 120.0
+    MONITOR_MAX_UNITS_PER_MINUTE: int = 12
+    MONITOR_WINDOW_S: int = 300
 
     # Service URLs
     USERS_SERVICE_URL: str
@@ -47,4 +167,4 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+openai_client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
@@ -0,0 +1,23 @@
+import asyncio
+import weakref
+
+import redis.asyncio as aioredis
+from config.config import settings
+
+# Celery tasks run each job under a fresh asyncio.run() loop, and asyncio
+# connections cannot cross loops, so keep one client per running loop.
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_redis() -> aioredis.Redis:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+        )
+        _clients[loop] = client
+    return client
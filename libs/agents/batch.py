@@ -0,0 +1,368 @@
+# libs/agents/batch.py
+"""
+Offline bulk re-analysis through the OpenAI Batch API.
+
+submit_batch(video_ids)
+    builds one fused-extractor request per video (videos over
+    ANALYSIS_CHUNK_TOKENS get one request per chunk, custom_id
+    "<video_id>:<chunk>"), packs them into JSONL files under
+    BATCH_MAX_REQUESTS requests and BATCH_MAX_FILE_BYTES each (a video never
+    spans two files), uploads them and creates one batch per file.  An
+    analysis_batches doc tracks each; the submitted thread keys per video
+    go to analysis_batch_parts, so ingest analyses exactly what was sent.
+    Videos with a run in flight (locks.py) or over their LLM budget
+    (usage.py) are left out.
+
+poll_batch(batch_id)
+    checks the batch; once it is finished the output file is parsed,
+    validated like the synchronous fused path, chunked videos are merged
+    (merge.py) and get a fresh headline.  Each analysis is stored under the
+    video's lease, and only if no analysis was stored since the batch was
+    submitted – results can be up to a day old and must not replace a
+    newer interactive or incremental run.
+
+Batches are billed at the discounted batch rate and are not subject to the
+per-minute rate limits of the synchronous path.  Celery drives the polling
+(apps/agents/worker.py); OPENAI_BASE_URL can point at apps/fake_openai.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import chunk_threads, line_keys
+from libs.agents.comments_analyzer.comments_analyzer import (
+    _comment_lines,
+    _meta_block,
+    prepare_threads,
+)
+from libs.agents.comments_analyzer.incremental import RunPlan, build_coverage, comment_key
+from libs.agents.comments_analyzer.merge import merge_partials
+from libs.agents.extractors.fused import fused_request, parse_fused
+from libs.agents.extractors.headline import extract_headline
+from libs.agents.llm import DEFAULT_MODEL, get_async_client
+from libs.agents.pricing import cost_usd
+from libs.agents.tokens import count_tokens
+from libs.agents.locks import LeaseBusy, inflight_run, video_lease
+from libs.agents.usage import BudgetExceeded, check_budget, record_run
+from libs.database.youtube.analysis import bulk_upsert_analyses, get_analysis_by_comment_id
+from libs.database.youtube.analysis_batches import (
+    create_batch,
+    get_batch,
+    get_batch_keys,
+    save_batch_parts,
+    update_batch,
+)
+from libs.database.youtube.comments import get_comments_by_video_id
+from libs.database.youtube.videos import get_video_by_id
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = "/v1/chat/completions"
+# batch states after which nothing changes any more
+TERMINAL = {"completed", "failed", "expired", "cancelled"}
+# our own states: TERMINAL minus "completed", plus "ingested" once stored
+DONE = (TERMINAL - {"completed"}) | {"ingested"}
+
+
+async def build_requests(video_ids: List[str], user_id: Optional[str] = None) -> tuple:
+    """
+    Returns (requests, parts, keys): the JSONL lines per video_id, parts
+    mapping video_id → {"chunks": n, "threads": number of threads
+    submitted}, and the submitted thread keys per video_id.
+    """
+    requests, parts, keys = {}, {}, {}
+    for video_id in video_ids:
+        if await inflight_run(video_id):
+            logger.info("video %s: analysis in flight, left out of the batch", video_id)
+            continue
+        video = await get_video_by_id(video_id)
+        try:
+            await check_budget(user_id, str(video["channel_id"]) if video else None)
+        except BudgetExceeded as e:
+            logger.info("video %s: %s, left out of the batch", video_id, e)
+            continue
+        doc = await get_comments_by_video_id(video_id)
+        if not doc or not doc.get("comments"):
+            continue
+        threads = doc["comments"]
+        cleaned, _ = prepare_threads(video_id, threads)
+        if not cleaned:
+            continue  # nothing but spam
+        meta = await _meta_block(video_id) or ""
+        text = "\n".join(_comment_lines(cleaned))
+        if count_tokens(text) > settings.ANALYSIS_CHUNK_TOKENS:
+            texts = [c.text for c in chunk_threads(cleaned, settings.ANALYSIS_CHUNK_TOKENS)]
+        else:
+            texts = [text]
+        requests[video_id] = [
+            json.dumps(
+                {
+                    "custom_id": f"{video_id}:{i}",
+                    "method": "POST",
+                    "url": ENDPOINT,
+                    "body": fused_request(meta + t),
+                }
+            )
+            for i, t in enumerate(texts)
+        ]
+        parts[video_id] = {"chunks": len(texts), "threads": len(threads)}
+        keys[video_id] = [comment_key(t) for t in threads]
+    return requests, parts, keys
+
+
+def pack_files(requests: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Group the videos of `requests` into batch files under
+    BATCH_MAX_REQUESTS lines and BATCH_MAX_FILE_BYTES bytes; returns the
+    video_ids per file.  A video that alone exceeds a limit is skipped.
+    """
+    files: List[List[str]] = []
+    current: List[str] = []
+    count = size = 0
+    for video_id, lines in requests.items():
+        n_bytes = sum(len(line.encode("utf-8")) + 1 for line in lines)
+        if len(lines) > settings.BATCH_MAX_REQUESTS or n_bytes > settings.BATCH_MAX_FILE_BYTES:
+            logger.warning(
+                "video %s: %d requests / %d bytes exceed one batch file, skipped",
+                video_id,
+                len(lines),
+                n_bytes,
+            )
+            continue
+        if current and (
+            count + len(lines) > settings.BATCH_MAX_REQUESTS
+            or size + n_bytes > settings.BATCH_MAX_FILE_BYTES
+        ):
+            files.append(current)
+            current, count, size = [], 0, 0
+        current.append(video_id)
+        count += len(lines)
+        size += n_bytes
+    if current:
+        files.append(current)
+    return files
+
+
+async def submit_batch(video_ids: List[str], user_id: Optional[str] = None) -> List[str]:
+    """
+    Upload + create the batches; returns their analysis_batches ids (empty
+    when none of the videos has comments).  Usage is charged to `user_id`
+    (if any) and each video's channel.
+    """
+    requests, parts, keys = await build_requests(video_ids, user_id)
+    client = get_async_client()
+    batch_ids = []
+    for file_videos in pack_files(requests):
+        lines = [line for v in file_videos for line in requests[v]]
+        upload = await client.files.create(
+            file=("analysis.jsonl", ("\n".join(lines) + "\n").encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=upload.id,
+            endpoint=ENDPOINT,
+            completion_window=settings.BATCH_COMPLETION_WINDOW,
+        )
+        batch_id = await create_batch(batch.id, upload.id, file_videos)
+        await save_batch_parts(batch_id, {v: keys[v] for v in file_videos})
+        await update_batch(
+            batch_id,
+            parts={v: parts[v] for v in file_videos},
+            request_count=len(lines),
+            user_id=user_id,
+        )
+        logger.info(
+            "analysis batch %s: %d videos, %d requests", batch.id, len(file_videos), len(lines)
+        )
+        batch_ids.append(batch_id)
+    return batch_ids
+
+
+def _parse_line(line: str):
+    """
+    → (video_id, chunk index, reply text or None, error or None, usage record)
+    """
+    row = json.loads(line)
+    video_id, _, idx = row["custom_id"].rpartition(":")
+    resp = row.get("response") or {}
+    if row.get("error") or resp.get("status_code") != 200:
+        return video_id, int(idx), None, row.get("error") or resp.get("body"), None
+    body = resp["body"]
+    usage = body.get("usage") or {}
+    model = body.get("model", DEFAULT_MODEL)
+    record = {
+        "label": "fused",
+        "model": model,
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "latency_s": 0.0,
+        "retries": 0,
+        "cost_usd": cost_usd(
+            model,
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
+            batch=True,
+        ),
+        "cached": False,
+    }
+    return video_id, int(idx), body["choices"][0]["message"]["content"], None, record
+
+
+async def _collect(batch_doc: Dict, output_text: str) -> tuple:
+    """
+    Turn the output file into {video_id: fields} plus coverage and failures.
+    """
+    parts = batch_doc.get("parts", {})
+    replies: Dict[str, Dict[int, str]] = defaultdict(dict)
+    usage: Dict[str, List[Dict]] = defaultdict(list)
+    failed: Dict[str, str] = {}
+    for line in output_text.splitlines():
+        if not line.strip():
+            continue
+        video_id, idx, content, err, record = _parse_line(line)
+        if err is not None:
+            failed[video_id] = str(err)[:500]
+        else:
+            replies[video_id][idx] = content
+            usage[video_id].append(record)
+
+    for video_id, calls in usage.items():
+        video = await get_video_by_id(video_id)
+        await record_run(
+            video_id,
+            str(video["channel_id"]) if video else None,
+            batch_doc.get("user_id"),
+            calls,
+            kind="batch",
+            batch_id=str(batch_doc["_id"]),
+        )
+
+    analyses, coverage = {}, {}
+    for video_id, chunks in replies.items():
+        info = parts.get(video_id)
+        if not info or video_id in failed or len(chunks) != info["chunks"]:
+            failed.setdefault(video_id, "missing chunk results")
+            continue
+        doc = await get_comments_by_video_id(video_id)
+        keys = await get_batch_keys(str(batch_doc["_id"]), video_id)
+        if not doc or keys is None:
+            failed[video_id] = "comments or submitted thread keys missing"
+            continue
+        # the threads as submitted: stored lists are rewritten by crawls
+        by_key = {comment_key(t): t for t in doc["comments"]}
+        threads = [by_key[k] for k in keys if k in by_key]
+        if len(threads) != len(keys):
+            failed[video_id] = "threads removed since submit"
+            continue
+        cleaned, report = prepare_threads(video_id, threads)
+        # same split as at submit time; each chunk is grounded against the
+        # comments it was sent
+        if info["chunks"] > 1:
+            pieces = chunk_threads(cleaned, settings.ANALYSIS_CHUNK_TOKENS)
+            texts, chunk_keys = [c.text for c in pieces], [c.keys for c in pieces]
+        else:
+            texts, chunk_keys = ["\n".join(_comment_lines(cleaned))], [line_keys(cleaned)]
+        try:
+            results = [
+                parse_fused(chunks[i], texts[i], video_id, chunk_keys[i])
+                for i in range(info["chunks"])
+            ]
+        except ValueError as e:
+            failed[video_id] = str(e)[:500]
+            continue
+
+        if len(results) == 1:
+            fields = results[0]
+        else:
+            fields = merge_partials([(r, c.comments) for r, c in zip(results, pieces)])
+            meta = await _meta_block(video_id) or ""
+            fields["headline"] = await extract_headline(
+                meta + pieces[0].text, fields["sentiments"]
+            )
+        analyses[video_id] = fields
+        coverage[video_id] = build_coverage(threads, RunPlan("full", threads, "batch"), None)
+        if report:
+            coverage[video_id]["preprocess"] = report.as_dict()
+    return analyses, coverage, failed
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+async def _store(
+    batch_doc: Dict, analyses: Dict[str, Dict], coverage: Dict[str, Dict], failed: Dict
+) -> int:
+    """
+    Store the analyses that are still the newest for their video, each
+    under the video's lease; the others go to `failed`.
+    """
+    submitted = _utc(batch_doc["created_at"])
+    stored = 0
+    for video_id, fields in analyses.items():
+        try:
+            async with video_lease(video_id):
+                prev = await get_analysis_by_comment_id(video_id)
+                updated = ((prev or {}).get("coverage") or {}).get("updated_at")
+                if updated and _utc(updated) > submitted:
+                    failed[video_id] = "a newer analysis was stored after submit"
+                    continue
+                stored += await bulk_upsert_analyses(
+                    {video_id: fields}, {video_id: coverage[video_id]}
+                )
+        except LeaseBusy:
+            failed[video_id] = "video was being analysed"
+    return stored
+
+
+async def poll_batch(batch_id: str) -> str:
+    """
+    Refresh one batch; ingests the results once it finished.
+    Returns the stored status; anything in DONE needs no more polling.
+    """
+    doc = await get_batch(batch_id)
+    if not doc:
+        raise ValueError(f"Unknown analysis batch {batch_id!r}")
+    if doc["status"] in DONE:
+        return doc["status"]
+
+    client = get_async_client()
+    batch = await client.batches.retrieve(doc["openai_batch_id"])
+    counts = batch.request_counts.model_dump() if batch.request_counts else None
+    if batch.status not in TERMINAL:
+        await update_batch(batch_id, status=batch.status, request_counts=counts)
+        return batch.status
+
+    # expired batches still return whatever finished in time
+    stored, failed = 0, {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        analyses, coverage, failed = await _collect(doc, output.text)
+        stored = await _store(doc, analyses, coverage, failed)
+    if batch.error_file_id:
+        errors = await client.files.content(batch.error_file_id)
+        for line in errors.text.splitlines():
+            if line.strip():
+                video_id, _, _, err, _ = _parse_line(line)
+                failed[video_id] = str(err)[:500]
+
+    status = "ingested" if batch.status == "completed" else batch.status
+    await update_batch(
+        batch_id,
+        status=status,
+        request_counts=counts,
+        stored=stored,
+        failed=failed,
+    )
+    logger.info(
+        "analysis batch %s: %s, %d stored, %d failed",
+        batch.id,
+        batch.status,
+        stored,
+        len(failed),
+    )
+    return status
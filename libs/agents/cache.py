@@ -0,0 +1,251 @@
+# libs/agents/cache.py
+"""
+Content-addressed cache in front of extractor LLM calls.
+
+The key is a SHA-256 over (PROMPT_VERSION, model, full prompt, request
+kwargs), so identical work – a re-run on unchanged comments, a retry after
+a crash – is answered without touching the API.  The prompt's video header
+only carries rounded view / like counts (comments_analyzer._meta_block), so
+a stats sync alone doesn't change the key.  Bump LLM_PROMPT_VERSION to
+invalidate everything after changing prompt semantics.
+
+Tiers
+  redis  values under llmcache:v:<key> with a TTL; a sorted set records last
+         access and a hash records value sizes so the least recently used
+         entries are evicted once LLM_CACHE_MAX_BYTES is exceeded.
+  disk   optional (LLM_CACHE_DIR): one JSON file per key, read on a Redis
+         miss and promoted back; pruned oldest-first past
+         LLM_CACHE_DISK_MAX_BYTES.
+
+Callers that parse the reply pass chat(parse=...): a reply is only stored
+once it parses, and a stored one that no longer does is invalidated.
+
+Hit / miss counters are kept per process and in the llmcache:stats hash.
+Cache failures are logged and treated as misses – they never fail a call.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from config.config import settings
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+_VALUE = "llmcache:v:"
+_INDEX = "llmcache:index"  # zset key → last access ts
+_SIZES = "llmcache:sizes"  # hash key → bytes
+_BYTES = "llmcache:bytes"  # running total
+_STATS = "llmcache:stats"
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+local_stats: Counter = Counter()
+_disk_writes = 0
+
+
+@contextmanager
+def bypass_cache(active: bool = True):
+    """
+    Skip cache reads (fresh answers are still stored) inside the block.
+    """
+    token = _bypass.set(active)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_key(model: str, prompt: str, kwargs: Dict) -> str:
+    payload = json.dumps(
+        {
+            "v": settings.LLM_PROMPT_VERSION,
+            "model": model,
+            "prompt": prompt,
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _enabled() -> bool:
+    return settings.LLM_CACHE_ENABLED
+
+
+async def _count(field: str) -> None:
+    local_stats[field] += 1
+    try:
+        await get_redis().hincrby(_STATS, field, 1)
+    except Exception:
+        pass
+
+
+# -- disk tier ---------------------------------------------------------------
+def _disk_path(key: str) -> Optional[str]:
+    if not settings.LLM_CACHE_DIR:
+        return None
+    return os.path.join(settings.LLM_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _disk_read(key: str) -> Optional[str]:
+    path = _disk_path(key)
+    if not path or not os.path.exists(path):
+        return None
+    if time.time() - os.path.getmtime(path) > settings.LLM_CACHE_TTL_S:
+        os.remove(path)
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return fh.read()
+
+
+def _disk_prune() -> None:
+    files = []
+    for root, _, names in os.walk(settings.LLM_CACHE_DIR):
+        for n in names:
+            p = os.path.join(root, n)
+            st = os.stat(p)
+            files.append((st.st_mtime, st.st_size, p))
+    total = sum(f[1] for f in files)
+    for _, size, p in sorted(files):
+        if total <= settings.LLM_CACHE_DISK_MAX_BYTES:
+            break
+        os.remove(p)
+        total -= size
+
+
+def _disk_write(key: str, value: str) -> None:
+    global _disk_writes
+    path = _disk_path(key)
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(value)
+    os.replace(tmp, path)
+    _disk_writes += 1
+    if _disk_writes % 100 == 0:
+        _disk_prune()
+
+
+# -- redis tier --------------------------------------------------------------
+async def _redis_evict(r) -> None:
+    while int(await r.get(_BYTES) or 0) > settings.LLM_CACHE_MAX_BYTES:
+        oldest = await r.zpopmin(_INDEX, 50)
+        if not oldest:
+            break
+        keys = [k for k, _ in oldest]
+        sizes = await r.hmget(_SIZES, keys)
+        pipe = r.pipeline()
+        pipe.delete(*[_VALUE + k for k in keys])
+        pipe.hdel(_SIZES, *keys)
+        pipe.decrby(_BYTES, sum(int(s or 0) for s in sizes))
+        await pipe.execute()
+
+
+async def _redis_put(key: str, value: str) -> None:
+    r = get_redis()
+    size = len(value.encode("utf-8"))
+    prev = await r.hget(_SIZES, key)
+    pipe = r.pipeline()
+    pipe.set(_VALUE + key, value, ex=settings.LLM_CACHE_TTL_S)
+    pipe.zadd(_INDEX, {key: time.time()})
+    pipe.hset(_SIZES, key, size)
+    pipe.incrby(_BYTES, size - int(prev or 0))
+    await pipe.execute()
+    await _redis_evict(r)
+
+
+# -- public ------------------------------------------------------------------
+async def cache_get(key: str) -> Optional[Dict]:
+    if not _enabled() or _bypass.get():
+        return None
+    value = None
+    try:
+        r = get_redis()
+        value = await r.get(_VALUE + key)
+        if value is not None:
+            await r.zadd(_INDEX, {key: time.time()})
+            await _count("hits")
+            return json.loads(value)
+    except Exception as e:
+        logger.warning("llm cache redis read failed: %s", e)
+
+    try:
+        value = await asyncio.to_thread(_disk_read, key)
+    except OSError as e:
+        logger.warning("llm cache disk read failed: %s", e)
+    if value is not None:
+        await _count("disk_hits")
+        try:
+            await _redis_put(key, value)
+        except Exception:
+            pass
+        return json.loads(value)
+
+    await _count("misses")
+    return None
+
+
+async def cache_put(key: str, entry: Dict) -> None:
+    if not _enabled():
+        return
+    value = json.dumps(entry)
+    try:
+        await _redis_put(key, value)
+        await _count("stores")
+    except Exception as e:
+        logger.warning("llm cache redis write failed: %s", e)
+    try:
+        await asyncio.to_thread(_disk_write, key, value)
+    except OSError as e:
+        logger.warning("llm cache disk write failed: %s", e)
+
+
+async def cache_invalidate(key: str) -> None:
+    """Drop one entry from both tiers (a reply its caller rejected)."""
+    await _count("invalidated")
+    try:
+        r = get_redis()
+        size = await r.hget(_SIZES, key)
+        pipe = r.pipeline()
+        pipe.delete(_VALUE + key)
+        pipe.zrem(_INDEX, key)
+        pipe.hdel(_SIZES, key)
+        if size:
+            pipe.decrby(_BYTES, int(size))
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("llm cache redis delete failed: %s", e)
+    path = _disk_path(key)
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("llm cache disk delete failed: %s", e)
+
+
+async def cache_stats() -> Dict:
+    """
+    Cluster-wide counters (from Redis) plus this process's own.
+    """
+    r = get_redis()
+    shared = {k: int(v) for k, v in (await r.hgetall(_STATS)).items()}
+    return {
+        "shared": shared,
+        "process": dict(local_stats),
+        "entries": await r.zcard(_INDEX),
+        "bytes": int(await r.get(_BYTES) or 0),
+        "max_bytes": settings.LLM_CACHE_MAX_BYTES,
+    }
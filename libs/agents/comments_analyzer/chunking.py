@@ -0,0 +1,81 @@
+# libs/agents/comments_analyzer/chunking.py
+"""
+Split stored comment threads into token-budgeted chunks.  A thread (comment
+plus its replies) is never split across chunks so replies keep their
+context.
+"""
+
+import hashlib
+import re
+from typing import Dict, List
+
+from libs.agents.tokens import count_tokens
+
+# everything str.splitlines() breaks on
+_BREAKS = re.compile(r"\s*[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]+\s*")
+
+
+def comment_key(thread: Dict) -> str:
+    """YouTube thread id when we have it, else a content hash (legacy docs)."""
+    if thread.get("id"):
+        return thread["id"]
+    raw = thread["text"] + "\x1f" + "\x1f".join(thread.get("replies", []))
+    return "h:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _one_line(text: str) -> str:
+    return _BREAKS.sub(" ", text)
+
+
+def thread_lines(thread: Dict) -> List[str]:
+    # one line per comment / reply whatever their text holds, so rendered
+    # lines, line_keys() and parse_comment_lines() stay aligned
+    # `count` > 1: near-identical comments collapsed by preprocess.py
+    count = thread.get("count", 1)
+    suffix = f" (x{count})" if count > 1 else ""
+    lines = [f"[COMMENT] {_one_line(thread['text'])}{suffix}"]
+    for reply in thread.get("replies", []):
+        lines.append(f"[REPLY] {_one_line(reply)}")
+    return lines
+
+
+def line_keys(threads: List[Dict]) -> List[str]:
+    """comment_key of the thread behind each line of the rendered threads."""
+    return [comment_key(t) for t in threads for _ in thread_lines(t)]
+
+
+class Chunk:
+    """A run of whole threads rendered as prompt text."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.keys: List[str] = []  # comment_key per line
+        self.tokens = 0
+        self.comments = 0  # comments + replies, the merge weight
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def chunk_threads(threads: List[Dict], budget_tokens: int) -> List[Chunk]:
+    """
+    Greedy first-fit in original order.  A single thread larger than the
+    budget gets a chunk of its own rather than being cut.
+    """
+    chunks: List[Chunk] = []
+    current = Chunk()
+    for t in threads:
+        lines = thread_lines(t)
+        # +1 per line for the joining newline
+        cost = sum(count_tokens(line) + 1 for line in lines)
+        if current.lines and current.tokens + cost > budget_tokens:
+            chunks.append(current)
+            current = Chunk()
+        current.lines.extend(lines)
+        current.keys.extend([comment_key(t)] * len(lines))
+        current.tokens += cost
+        current.comments += len(lines) + t.get("count", 1) - 1
+    if current.lines:
+        chunks.append(current)
+    return chunks
@@ -8,25 +8,67 @@ The added “Channel name / Video title” pre-amble gives every extractor
 more context so it can reference the creator or the video naturally.
 """
 
-import asyncio
-from typing import Optional, Dict
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
-from config.config import openai_client  # still used by sibling extractors
+from config.config import settings
 from libs.database.youtube.comments import get_comments_by_video_id
 from libs.database.youtube.videos import get_video_by_id
 from libs.database.youtube.channels import get_channel_by_id
 from libs.database.youtube.analysis import (
-    create_analysis,
-    get_analysis_by_comment_id,
-    update_analysis,
+    get_analysis_with_coverage,
+    set_coverage,
+    upsert_analysis,
 )
+from libs.database.youtube.analysis_runs import create_run
 
 # extractor helpers ----------------------------------------------------------
-from libs.agents.extractors.sentiment import extract_sentiments
+from libs.agents.extractors.sentiment import deep_analysis
 from libs.agents.extractors.headline import extract_headline
-from libs.agents.extractors.discussions import extract_discussions
-from libs.agents.extractors.people import extract_people
-from libs.agents.extractors.other import extract_other_insights, extract_video_requests
+from libs.agents.extractors.fused import extract_all
+from libs.agents.comments_analyzer.chunking import line_keys, thread_lines
+from libs.agents.comments_analyzer.map_reduce import run_map_reduce
+from libs.agents.comments_analyzer.scheduler import run_dag
+from libs.agents.comments_analyzer.preprocess import PreprocessReport, preprocess_threads
+from libs.agents.comments_analyzer.sampling import SampleReport, sample_threads
+from libs.agents.comments_analyzer.incremental import (
+    build_coverage,
+    merge_delta,
+    plan_run,
+    thread_weight,
+)
+from libs.agents.tokens import count_tokens
+from libs.agents.cache import bypass_cache
+from libs.agents.governor import RateLimited
+from libs.agents.llm import capture_usage
+from libs.agents.usage import BudgetExceeded, check_budget, record_run
+from libs.agents.locks import Lease, video_lease
+from libs.agents.progress import (
+    SECTIONS,
+    RunTracker,
+    report_sections,
+    report_timing,
+    track,
+)
+
+logger = logging.getLogger(__name__)
+
+def _approx(count) -> str:
+    """
+    Two significant figures ("1.2M", "99K", "850") – the header only needs
+    the order of magnitude, and exact counters change on every stats sync,
+    which would change the prompt and so miss the LLM cache (cache.py).
+    """
+    try:
+        n = float(count)
+    except (TypeError, ValueError):
+        return "NA"
+    for div, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if n >= div:
+            return f"{float(f'{n / div:.2g}'):g}{suffix}"
+    return f"{float(f'{n:.2g}'):g}"
 
 
 async def _meta_block(video_id: str) -> Optional[str]:
@@ -36,12 +78,13 @@ async def _meta_block(video_id: str) -> Optional[str]:
         Channel name : Ludwig
         Video title  : I Tried Chessboxing
         Published    : 2023-01-02T18:00:05Z
-        Views        : 1_234_567
-        Likes        : 98_765
+        Views        : 1.2M
+        Likes        : 99K
         Duration     : PT8M11S
         Description  : (first 300 chars…)
 
-    Returns the block or None if lookup fails.
+    Counters are rounded (_approx) so the header stays stable across stats
+    syncs.  Returns the block or None if lookup fails.
     """
     v = await get_video_by_id(video_id)
     if not v:
@@ -59,66 +102,290 @@ async def _meta_block(video_id: str) -> Optional[str]:
         f"Channel name : {c['name']}\n"
         f"Video title  : {v['name']}\n"
         f"Published    : {v['publish_time']}\n"
-        f"Views        : {v['view_count']}\n"
-        f"Likes        : {v.get('like_count','NA')}\n"
+        f"Views        : {_approx(v.get('view_count'))}\n"
+        f"Likes        : {_approx(v.get('like_count'))}\n"
         f"Duration     : {v.get('duration','NA')}\n"
         f"Description  : {desc}\n\n"
     )
 
 
-async def analyze_and_store_comments(video_id: str) -> str:
+def _comment_lines(threads) -> List[str]:
+    return [line for t in threads for line in thread_lines(t)]
+
+
+async def build_blob(video_id: str) -> Optional[Tuple[str, str]]:
+    """
+    Assemble the extractor input exactly as the pipeline sends it.
+    Returns (blob, comments_text) – blob = meta header + comments – or None
+    when the video has no stored comments.
+    """
+    comments_doc = await get_comments_by_video_id(video_id)
+    if not comments_doc:
+        return None
+
+    meta = await _meta_block(video_id) or ""
+    comments_text = "\n".join(_comment_lines(comments_doc["comments"]))
+    return meta + comments_text, comments_text
+
+
+async def _run_per_extractor(
+    video_id: str,
+    blob: str,
+    comments_text: str,
+    headline: bool,
+    keys: Optional[List[str]] = None,
+) -> Dict:
+    # the registered extractors as a DAG: everything starts at once, the
+    # headline waits on sentiments; each section is reported (and, on live
+    # runs, staged on the run doc) as it completes
+    out, timing = await run_dag(
+        {
+            "blob": blob,
+            "comments_text": comments_text,
+            "video_id": video_id,
+            "line_keys": keys,
+        },
+        skip=() if headline else ("headline",),
+    )
+    await report_timing(timing)
+    out.setdefault("headline", None)
+    return out
+
+
+async def run_extractors(
+    video_id: str,
+    blob: str,
+    comments_text: str,
+    mode: Optional[str] = None,
+    headline: bool = True,
+    keys: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Produce the analysis sections for `blob`.
+
+    mode "per_extractor" – one focused call per registered extractor (see
+                           extractors/registry.py; the headline waits on sentiments)
+    mode "fused"         – one structured-output call for everything
+    Defaults to settings.ANALYSIS_MODE.  `headline=False` skips the headline
+    (callers that merge partial results write their own).  `keys` – the
+    thread key of each comments_text line, so people point at threads.
+    """
+    mode = mode or settings.ANALYSIS_MODE
+    if mode == "fused":
+        out = await extract_all(blob, comments_text, video_id, keys)
+        await report_sections(out)
+        return out
+    if mode == "per_extractor":
+        return await _run_per_extractor(video_id, blob, comments_text, headline, keys)
+    raise ValueError(f"Unknown analysis mode {mode!r}")
+
+
+def needs_map_reduce(comments_text: str) -> bool:
+    return count_tokens(comments_text) > settings.ANALYSIS_CHUNK_TOKENS
+
+
+async def analyze_threads(
+    video_id: str,
+    meta: str,
+    threads: List[Dict],
+    mode: Optional[str] = None,
+    headline: bool = True,
+) -> Dict:
+    """
+    Single pass when the comments fit ANALYSIS_CHUNK_TOKENS, otherwise
+    chunked map-reduce (see map_reduce.py).
+    """
+    mode = mode or settings.ANALYSIS_MODE
+    comments_text = "\n".join(_comment_lines(threads))
+    if needs_map_reduce(comments_text):
+        return await run_map_reduce(video_id, meta, threads, mode, headline)
+    return await run_extractors(
+        video_id, meta + comments_text, comments_text, mode, headline, line_keys(threads)
+    )
+
+
+def prepare_threads(
+    video_id: str, threads: List[Dict]
+) -> Tuple[List[Dict], Optional[PreprocessReport]]:
+    """
+    Run the pre-processing stage (when enabled) and log what it saved.
+    """
+    if not settings.PREPROCESS_ENABLED:
+        return threads, None
+    cleaned, report = preprocess_threads(threads)
+    logger.info(
+        "video %s: preprocess %d → %d threads (%d dup, %d near-dup, %d spam), "
+        "%d → %d tokens",
+        video_id,
+        report.threads_in,
+        report.threads_out,
+        report.duplicates,
+        report.near_duplicates,
+        report.spam,
+        report.tokens_before,
+        report.tokens_after,
+    )
+    return cleaned, report
+
+
+def sample_for_budget(
+    video_id: str, threads: List[Dict]
+) -> Tuple[List[Dict], Optional[SampleReport]]:
+    """
+    Cut the threads down to ANALYSIS_SAMPLE_TOKENS (when set) with a
+    weighted-back sample; the report is None when nothing was dropped.
+    """
+    if not settings.ANALYSIS_SAMPLE_TOKENS:
+        return threads, None
+    sample, report = sample_threads(threads, settings.ANALYSIS_SAMPLE_TOKENS, video_id)
+    if report.threads_out == report.threads_in:
+        return threads, None
+    logger.info(
+        "video %s: sampled %d of %d threads, %d → %d tokens",
+        video_id,
+        report.threads_out,
+        report.threads_in,
+        report.tokens_in,
+        report.tokens_out,
+    )
+    return sample, report
+
+
+async def analyze_and_store_comments(
+    video_id: str,
+    use_cache: bool = True,
+    full: bool = False,
+    deep: bool = False,
+    user_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+) -> str:
     """
     Full pipeline: comments → extractors → (upsert) analysis doc.
+    `use_cache=False` forces fresh LLM answers (they still refill the cache).
+    Only threads not covered by the stored analysis are analysed unless
+    `full=True` or a periodic full recompute is due (see incremental.py).
+    `deep=True` skips the local sentiment tier and always asks the LLM.
+
+    Token usage is recorded against `user_id` and the video's channel;
+    over-budget runs are downgraded or raise BudgetExceeded (usage.py).
+    Progress goes to the analysis_runs doc `run_id` (created when None).
+    Raises LeaseBusy when another worker is analysing the video, and
+    RateLimited (run deferred) when the LLM stays rate limited.
     """
+    tracker = RunTracker(run_id or await create_run(video_id, SECTIONS, user_id), video_id)
+    # one worker per video at a time; LeaseBusy leaves the run queued
+    async with video_lease(video_id, tracker.run_id) as lease:
+        tracker.lease = lease
+        video = await get_video_by_id(video_id)
+        channel_id = str(video["channel_id"]) if video else None
+        try:
+            downgrade = await check_budget(user_id, channel_id) == "downgrade"
+        except BudgetExceeded as e:
+            await tracker.finish("deferred", error=str(e), retry_at=e.retry_at)
+            raise
+        mode = "fused" if downgrade else None
+
+        started = time.perf_counter()
+        with bypass_cache(not use_cache), deep_analysis(deep and not downgrade):
+            with capture_usage() as calls, track(tracker):
+                try:
+                    return await _analyze_and_store(video_id, tracker, lease, full, mode)
+                except RateLimited as e:
+                    wait = max(e.retry_after_s, settings.ANALYSIS_LOCK_RETRY_S)
+                    retry_at = datetime.now(timezone.utc) + timedelta(seconds=wait)
+                    await tracker.finish("deferred", error=str(e), retry_at=retry_at)
+                    raise
+                except Exception as e:
+                    await tracker.finish("failed", error=str(e)[:500])
+                    raise
+                finally:
+                    await record_run(
+                        video_id,
+                        channel_id,
+                        user_id,
+                        calls,
+                        mode=mode or settings.ANALYSIS_MODE,
+                        downgraded=downgrade,
+                        wall_s=round(time.perf_counter() - started, 3),
+                    )
+
+
+async def _analyze_and_store(
+    video_id: str,
+    tracker: RunTracker,
+    lease: Lease,
+    full: bool = False,
+    mode: Optional[str] = None,
+) -> str:
     comments_doc = await get_comments_by_video_id(video_id)
     if not comments_doc:
         # Nothing to analyse
+        await tracker.finish("failed", error="no comments stored")
         return ""
 
-    meta = await _meta_block(video_id) or ""
     threads = comments_doc["comments"]
-    all_texts = []
-    for t in threads:
-        all_texts.append(f"[COMMENT] {t['text']}")
-        for reply in t.get("replies", []):
-            all_texts.append(f"[REPLY] {reply}")
-    comments_text = "\n".join(all_texts)
+    meta = await _meta_block(video_id) or ""
+    prev = await get_analysis_with_coverage(video_id)
 
     # -----------------------------------------------------------------------
-    # 1) run the extractors
+    # 1) decide between full, delta and no-op
     # -----------------------------------------------------------------------
-    blob = meta + comments_text
-
-    sentiments = await extract_sentiments(blob)
-    headline_task = extract_headline(blob, sentiments)
-    discussions_task = extract_discussions(blob)
-    people_task = extract_people(
-        blob, comments_text
-    )  # keep raw comments for de-hallucination
-    other_task = extract_other_insights(blob)
-    requests_task = extract_video_requests(blob)
-
-    headline, discussions, people, other, requests = await asyncio.gather(
-        headline_task, discussions_task, people_task, other_task, requests_task
-    )
+    plan = plan_run(prev, threads, force_full=full or not settings.ANALYSIS_INCREMENTAL)
+    logger.info("video %s: %s analysis (%s)", video_id, plan.mode, plan.reason)
+    await tracker.start(plan.mode)
+    if plan.mode == "noop":
+        await tracker.finish("done", prev["analysis"])
+        return str(prev["_id"])
 
     # -----------------------------------------------------------------------
-    # 2) upsert the analysis document
+    # 2) run the extractors (delta: merge into the previous analysis)
     # -----------------------------------------------------------------------
-    prev = await get_analysis_by_comment_id(video_id)
-    fields: Dict = dict(
-        sentiments=sentiments,
-        headline=headline,
-        discussions=discussions,
-        people=people,
-        other_insights=other,
-        video_requests=requests,
+    cleaned, report = prepare_threads(video_id, plan.threads)
+    if not cleaned and plan.mode == "delta":
+        # only spam / duplicates arrived – just remember we've seen them
+        await set_coverage(video_id, build_coverage(threads, plan, prev["coverage"]))
+        await tracker.finish("done", prev["analysis"])
+        return str(prev["_id"])
+    if not cleaned:
+        # full run, but every thread was spam or empty
+        await tracker.finish("failed", error="no comments left after pre-processing")
+        return ""
+    cleaned, sampled = sample_for_budget(video_id, cleaned)
+    # sections can be stored one by one only when they are final already
+    tracker.live = plan.mode == "full" and not needs_map_reduce(
+        "\n".join(_comment_lines(cleaned))
     )
+    if plan.mode == "full":
+        fields = await analyze_threads(video_id, meta, cleaned, mode)
+    else:
+        delta = await analyze_threads(video_id, meta, cleaned, mode, headline=False)
+        delta.pop("headline", None)
+        fields = merge_delta(
+            prev["analysis"],
+            prev["coverage"]["comment_count"],
+            delta,
+            thread_weight(plan.threads),
+        )
+        # the headline is rewritten from the merged scores and the new comments
+        fields["headline"] = await extract_headline(
+            meta + "\n".join(_comment_lines(cleaned)), fields["sentiments"]
+        )
 
-    if not prev:
-        return await create_analysis(comment_id=video_id, **fields)
+    coverage = build_coverage(threads, plan, (prev or {}).get("coverage"))
+    if report:
+        coverage["preprocess"] = report.as_dict()
+    if sampled:
+        coverage["sample"] = sampled.as_dict()
 
-    if any(prev["analysis"].get(k) != v for k, v in fields.items()):
-        await update_analysis(comment_id=video_id, **fields)
+    # -----------------------------------------------------------------------
+    # 3) upsert the analysis document
+    # -----------------------------------------------------------------------
+    lease.check()  # don't overwrite a run that took the video over
+    if prev and all(prev["analysis"].get(k) == v for k, v in fields.items()):
+        analysis_id = str(prev["_id"])
+    else:
+        analysis_id = await upsert_analysis(video_id, **fields)
+    await set_coverage(video_id, coverage)
+    await tracker.finish("done", fields)
 
-    return str(prev["_id"])
+    return analysis_id
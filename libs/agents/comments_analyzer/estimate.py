@@ -0,0 +1,268 @@
+# libs/agents/comments_analyzer/estimate.py
+"""
+What would analysing a video cost, without calling the LLM?
+
+estimate_analysis() walks the same steps as analyze_and_store_comments –
+incremental plan, pre-processing, sampling, single pass vs map-reduce chunks,
+local sentiment tier, clustered discussions – and counts the tokens of
+the prompts it would send with the same assembly (meta header +
+thread_lines).  Output tokens and per-call latency come from recent usage
+records per extractor when there are enough of them, otherwise from the
+defaults below.  Wall time follows the extractor DAG (single pass) or
+LLM_MAX_CONCURRENCY-wide waves of chunk calls (map-reduce).
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import chunk_threads
+from libs.agents.comments_analyzer.comments_analyzer import (
+    _comment_lines,
+    _meta_block,
+    needs_map_reduce,
+    prepare_threads,
+    sample_for_budget,
+)
+from libs.agents.comments_analyzer.incremental import plan_run
+from libs.agents.extractors.registry import REGISTRY
+from libs.agents.extractors.sentiment import local_sentiments
+from libs.agents.extractors.utils import parse_comment_lines
+from libs.agents.llm import DEFAULT_MODEL
+from libs.agents.pricing import cost_usd
+from libs.agents.prompts.discussions_prompt import DISCUSSIONS_PROMPT, DISCUSSION_LABEL_PROMPT
+from libs.agents.prompts.fused_prompt import FUSED_PROMPT
+from libs.agents.prompts.headline_prompt import HEADLINE_PROMPT
+from libs.agents.prompts.other_prompts import OTHER_INSIGHTS_PROMPT, VIDEO_REQUESTS_PROMPT
+from libs.agents.prompts.people_prompt import PEOPLE_PROMPT
+from libs.agents.prompts.sentiment_prompt import SENTIMENT_PROMPT
+from libs.agents.tokens import count_tokens
+from libs.database.usage import get_label_history
+from libs.database.youtube.analysis import get_analysis_with_coverage
+from libs.database.youtube.comments import get_comments_by_video_id
+
+PROMPTS = {
+    "sentiments": SENTIMENT_PROMPT,
+    "headline": HEADLINE_PROMPT,
+    "discussions": DISCUSSIONS_PROMPT,
+    "people": PEOPLE_PROMPT,
+    "other_insights": OTHER_INSIGHTS_PROMPT,
+    "video_requests": VIDEO_REQUESTS_PROMPT,
+    "fused": FUSED_PROMPT,
+}
+# typical completion tokens per call when there is no usage history yet
+DEFAULT_OUTPUT_TOKENS = {
+    "sentiments": 60,
+    "headline": 25,
+    "discussions": 450,
+    "people": 300,
+    "other_insights": 120,
+    "video_requests": 80,
+    "fused": 1100,
+}
+# latency model without history: fixed overhead + prefill + decode
+BASE_LATENCY_S = 0.5
+PREFILL_S_PER_1K = 0.05
+DECODE_TOKENS_PER_S = 70.0
+# uncached calls of a label needed before its history is trusted
+MIN_HISTORY_CALLS = 20
+# a rendered sentiment dict, for the headline prompt's "Scores:" line
+_SCORES = {c: {"positive": 33, "neutral": 34, "negative": 33} for c in ("video", "creator", "topic")}
+
+
+class _Estimator:
+    def __init__(self, history: Dict[str, Dict]):
+        self.history = history
+        self.rows: Dict[str, Dict] = {}
+
+    def _trusted(self, label: str) -> Optional[Dict]:
+        h = self.history.get(label)
+        if h and h["calls"] - h["cached"] >= MIN_HISTORY_CALLS:
+            return h
+        return None
+
+    def output_tokens(self, label: str) -> int:
+        h = self._trusted(label)
+        if h:
+            return round(h["completion_tokens"] / (h["calls"] - h["cached"]))
+        return DEFAULT_OUTPUT_TOKENS.get(label, 200)
+
+    def latency_s(self, label: str, input_tokens: int, output_tokens: int) -> float:
+        h = self._trusted(label)
+        if h:
+            return h["latency_s"] / (h["calls"] - h["cached"])
+        return (
+            BASE_LATENCY_S
+            + PREFILL_S_PER_1K * input_tokens / 1000
+            + output_tokens / DECODE_TOKENS_PER_S
+        )
+
+    def call(self, label: str, prompt_tokens: int) -> float:
+        """Add one call; returns its estimated latency."""
+        spec = REGISTRY.get(label)
+        model = (spec.effective_model() if spec else None) or DEFAULT_MODEL
+        out = self.output_tokens(label)
+        latency = self.latency_s(label, prompt_tokens, out)
+        row = self.rows.setdefault(
+            label,
+            {
+                "calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cost_usd": 0.0,
+                "latency_s": 0.0,
+                "model": model,
+            },
+        )
+        row["calls"] += 1
+        row["input_tokens"] += prompt_tokens
+        row["output_tokens"] += out
+        row["cost_usd"] = round(row["cost_usd"] + cost_usd(model, prompt_tokens, out), 6)
+        row["latency_s"] = round(row["latency_s"] + latency, 3)
+        return latency
+
+    def local(self, label: str) -> None:
+        """A section computed without the LLM."""
+        self.rows.setdefault(
+            label,
+            {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "latency_s": 0.0},
+        )
+
+
+def _prompt_tokens(label: str, blob: str) -> int:
+    return count_tokens(PROMPTS.get(label, "") + "\n\n" + blob)
+
+
+def _section_calls(est: _Estimator, meta: str, comments_text: str, skip=()) -> Dict[str, float]:
+    """
+    Per-extractor calls for one blob; returns the latency of every section
+    that calls the LLM (0 for local ones).
+    """
+    blob = meta + comments_text
+    latency: Dict[str, float] = {}
+    for name in REGISTRY:
+        if name in skip:
+            continue
+        if name == "sentiments" and settings.SENTIMENT_TIER != "llm":
+            _, confidence = local_sentiments(comments_text)
+            if settings.SENTIMENT_TIER == "local" or confidence >= settings.SENTIMENT_MIN_CONFIDENCE:
+                est.local(name)
+                latency[name] = 0.0
+                continue
+        if name == "headline":
+            tokens = count_tokens(f"{HEADLINE_PROMPT}\n\nScores: {_SCORES}\n\n{blob}")
+        elif name == "discussions" and settings.DISCUSSIONS_MODE == "clustered":
+            tokens = _label_prompt_tokens(meta, comments_text)
+            if tokens is None:
+                tokens = _prompt_tokens(name, blob)
+        else:
+            tokens = _prompt_tokens(name, blob)
+        latency[name] = est.call(name, tokens)
+    return latency
+
+
+def _label_prompt_tokens(meta: str, comments_text: str) -> Optional[int]:
+    """
+    Cluster-labelling prompt size: the prompt, the header and, per cluster,
+    its exemplars plus a words line – approximated with the mean comment.
+    None when there are too few comments to cluster.
+    """
+    texts, weights = parse_comment_lines(comments_text)
+    if sum(weights) < settings.DISCUSSIONS_MIN_COMMENTS or not texts:
+        return None
+    clusters = min(settings.DISCUSSIONS_MAX_CLUSTERS, max(2, int(math.sqrt(len(texts) / 2))))
+    sample = texts[:: max(len(texts) // 200, 1)]
+    mean_comment = sum(count_tokens(t) for t in sample) / len(sample)
+    per_cluster = 20 + (settings.DISCUSSIONS_EXEMPLARS + 1) * (mean_comment + 2)
+    return count_tokens(DISCUSSION_LABEL_PROMPT + "\n\n" + meta) + round(clusters * per_cluster)
+
+
+def _critical_path(latency: Dict[str, float]) -> float:
+    finish: Dict[str, float] = {}
+
+    def done(name: str) -> float:
+        if name not in finish:
+            deps = [d for d in REGISTRY[name].deps if d in latency]
+            finish[name] = latency[name] + max((done(d) for d in deps), default=0.0)
+        return finish[name]
+
+    return max((done(n) for n in latency), default=0.0)
+
+
+async def estimate_analysis(
+    video_id: str, full: bool = False, mode: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Estimated tokens, cost and latency of analysing `video_id` now, per
+    extractor and in total.  None when the video has no stored comments.
+    """
+    comments_doc = await get_comments_by_video_id(video_id)
+    if not comments_doc:
+        return None
+    mode = mode or settings.ANALYSIS_MODE
+    if mode not in ("per_extractor", "fused"):
+        raise ValueError(f"Unknown analysis mode {mode!r}")
+
+    threads = comments_doc["comments"]
+    meta = await _meta_block(video_id) or ""
+    prev = await get_analysis_with_coverage(video_id)
+    plan = plan_run(prev, threads, force_full=full or not settings.ANALYSIS_INCREMENTAL)
+    out = {
+        "video_id": video_id,
+        "plan": plan.mode,
+        "reason": plan.reason,
+        "mode": mode,
+        "threads": len(plan.threads),
+    }
+
+    est = _Estimator(await get_label_history())
+    wall = 0.0
+    cleaned = []
+    if plan.mode != "noop":
+        cleaned, _ = prepare_threads(video_id, plan.threads)
+        out["threads_after_preprocess"] = len(cleaned)
+    if cleaned:
+        cleaned, sampled = sample_for_budget(video_id, cleaned)
+        if sampled:
+            out["sampled_threads"] = sampled.threads_out
+        comments_text = "\n".join(_comment_lines(cleaned))
+        headline_apart = plan.mode == "delta"
+
+        if needs_map_reduce(comments_text):
+            chunks = chunk_threads(cleaned, settings.ANALYSIS_CHUNK_TOKENS)
+            out["chunks"] = len(chunks)
+            map_latency: List[float] = []
+            for c in chunks:
+                if mode == "fused":
+                    map_latency.append(est.call("fused", _prompt_tokens("fused", meta + c.text)))
+                else:
+                    map_latency.extend(
+                        _section_calls(est, meta, c.text, skip=("headline",)).values()
+                    )
+            llm_calls = [x for x in map_latency if x > 0] or [0.0]
+            waves = math.ceil(len(llm_calls) / settings.LLM_MAX_CONCURRENCY)
+            wall = waves * sum(llm_calls) / len(llm_calls)
+            headline_blob = meta + chunks[0].text
+            headline_apart = True
+        else:
+            out["chunks"] = 1
+            if mode == "fused":
+                wall = est.call("fused", _prompt_tokens("fused", meta + comments_text))
+            else:
+                skip = ("headline",) if headline_apart else ()
+                wall = _critical_path(_section_calls(est, meta, comments_text, skip))
+            headline_blob = meta + comments_text
+
+        if headline_apart:
+            wall += est.call(
+                "headline", count_tokens(f"{HEADLINE_PROMPT}\n\nScores: {_SCORES}\n\n{headline_blob}")
+            )
+
+    totals = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+    for row in est.rows.values():
+        for k in totals:
+            totals[k] += row[k]
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    out["extractors"] = est.rows
+    out["total"] = {**totals, "latency_s": round(wall, 2)}
+    return out
@@ -0,0 +1,102 @@
+# libs/agents/comments_analyzer/incremental.py
+"""
+Incremental analysis bookkeeping.
+
+Every stored analysis records which comment threads it covered (the
+`coverage` block on the analysis doc; the thread keys themselves are kept
+in analysis_coverage and pruned to the threads still stored).  On the next run only threads that
+are not covered yet are analysed, and the delta result is merged into the
+previous analysis with the same count-weighted rules as map-reduce
+(merge.py): sentiments by comment count, discussion mentions accumulated.
+
+A full recompute is forced periodically to stop drift:
+  * every ANALYSIS_FULL_EVERY_RUNS incremental runs,
+  * when the last full run is older than ANALYSIS_FULL_MAX_AGE_H,
+  * when the delta outweighs what was analysed before, or
+  * when a sizeable share of covered threads has disappeared (re-crawl).
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import comment_key, thread_lines
+from libs.agents.comments_analyzer.merge import merge_partials
+
+# if more than this share of previously covered threads is gone, start over
+_MAX_MISSING = 0.1
+
+
+def thread_weight(threads: List[Dict]) -> int:
+    """Comments + replies – the weight used when merging."""
+    return sum(len(thread_lines(t)) for t in threads)
+
+
+class RunPlan:
+    def __init__(self, mode: str, threads: List[Dict], reason: str):
+        self.mode = mode  # "full" | "delta" | "noop"
+        self.threads = threads
+        self.reason = reason
+
+
+def plan_run(prev: Optional[Dict], threads: List[Dict], force_full: bool = False) -> RunPlan:
+    coverage = (prev or {}).get("coverage")
+    if force_full:
+        return RunPlan("full", threads, "forced")
+    if not prev or not coverage:
+        return RunPlan("full", threads, "no previous coverage")
+
+    covered = set(coverage.get("comment_keys", []))
+    current = {comment_key(t) for t in threads}
+    if covered and len(covered - current) > _MAX_MISSING * len(covered):
+        return RunPlan("full", threads, "covered comments disappeared")
+
+    full_at = coverage.get("full_at")
+    if full_at and full_at.tzinfo is None:
+        full_at = full_at.replace(tzinfo=timezone.utc)
+    if coverage.get("runs_since_full", 0) >= settings.ANALYSIS_FULL_EVERY_RUNS:
+        return RunPlan("full", threads, "periodic full recompute")
+    if not full_at or datetime.now(timezone.utc) - full_at > timedelta(
+        hours=settings.ANALYSIS_FULL_MAX_AGE_H
+    ):
+        return RunPlan("full", threads, "last full recompute too old")
+
+    delta = [t for t in threads if comment_key(t) not in covered]
+    if not delta:
+        return RunPlan("noop", [], "no new comments")
+    if thread_weight(delta) > coverage.get("comment_count", 0):
+        return RunPlan("full", threads, "delta larger than history")
+    return RunPlan("delta", delta, f"{len(delta)} new threads")
+
+
+def merge_delta(prev_analysis: Dict, prev_weight: int, delta: Dict, delta_weight: int) -> Dict:
+    """
+    Fold a delta analysis into the previous one (headline excluded).
+    """
+    return merge_partials([(prev_analysis, prev_weight), (delta, delta_weight)])
+
+
+def build_coverage(
+    threads: List[Dict], plan: RunPlan, prev_coverage: Optional[Dict]
+) -> Dict:
+    now = datetime.now(timezone.utc)
+    if plan.mode == "full" or not prev_coverage:
+        return {
+            "comment_keys": [comment_key(t) for t in threads],
+            "comment_count": thread_weight(threads),
+            "full_at": now,
+            "runs_since_full": 0,
+            "updated_at": now,
+        }
+    # keys of threads that were deleted since are dropped, so the list
+    # never outgrows the stored threads
+    current = {comment_key(t) for t in threads}
+    return {
+        "comment_keys": [k for k in prev_coverage.get("comment_keys", []) if k in current]
+        + [comment_key(t) for t in plan.threads],
+        "comment_count": prev_coverage.get("comment_count", 0)
+        + thread_weight(plan.threads),
+        "full_at": prev_coverage.get("full_at"),
+        "runs_since_full": prev_coverage.get("runs_since_full", 0) + 1,
+        "updated_at": now,
+    }
@@ -0,0 +1,222 @@
+# libs/agents/comments_analyzer/labels.py
+"""
+Per-comment labels – sentiment, what the comment is about and its theme –
+stored per thread in comment_labels (libs/database/youtube/comment_labels.py),
+so the evidence behind an analysis can be filtered without re-running it.
+
+LABELS_TIER
+  "local"  lexicon sentiment, "creator" when the comment addresses the
+           creator (else "video"), theme = its local topic cluster
+           (libs/analysis/clustering.py) named after the top words; no LLM
+  "llm"    LABELS_BATCH_SIZE numbered comments per chat() call, answered
+           with one compact [i, s, a, t] array each; themes are picked from
+           the video's stored discussion names.  Comments the model skips
+           (or whole batches with a bad reply) keep their local label.
+           Over budget, the local tier is used instead; batches run in
+           waves of LLM_MAX_CONCURRENCY and stop once the run has spent
+           what was left of the budget, the rest keeping local labels.
+
+Labels store the comment's original text; the normalised, truncated form
+is only what the lexicon, the clustering and the prompt see.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from config.config import settings
+from libs.agents.comments_analyzer.incremental import comment_key
+from libs.agents.comments_analyzer.preprocess import normalize_text
+from libs.agents.extractors.discussions import CATEGORIES
+from libs.agents.extractors.sentiment import CREATOR_CUES
+from libs.agents.extractors.utils import sanitize_json_output
+from libs.agents.llm import capture_usage, chat
+from libs.agents.prompts.labels_prompt import COMMENT_LABELS_PROMPT
+from libs.agents.usage import BudgetExceeded, check_budget, record_run, remaining_budget
+from libs.analysis.clustering import cluster_comments
+from libs.analysis.lexicon import NEUTRAL_BAND, score_batch
+from libs.database.youtube.analysis import get_analysis_by_comment_id
+from libs.database.youtube.comment_labels import replace_labels
+from libs.database.youtube.comments import get_comments_by_video_id
+from libs.database.youtube.videos import get_video_by_id
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("local", "llm")
+SENTIMENTS = {"p": "positive", "u": "neutral", "n": "negative"}
+ABOUT = {"v": "video", "c": "creator", "t": "topic", "o": "other"}
+
+
+def label_texts(threads: List[Dict]) -> List[str]:
+    """Normalised, truncated comment text per thread – what gets scored and sent."""
+    return [normalize_text(t.get("text", ""), settings.PREPROCESS_MAX_CHARS)[0] for t in threads]
+
+
+def local_labels(threads: List[Dict], texts: Optional[List[str]] = None) -> List[Dict]:
+    """One label doc per thread, without the LLM."""
+    texts = label_texts(threads) if texts is None else texts
+    scores, _ = score_batch(texts)
+    themes: List[Optional[str]] = [None] * len(texts)
+    for c in cluster_comments(
+        texts,
+        max_clusters=settings.DISCUSSIONS_MAX_CLUSTERS,
+        dim=settings.DISCUSSIONS_HASH_DIM,
+    ):
+        name = ", ".join(c.terms[:3]) or None
+        for i in c.members:
+            themes[i] = name
+
+    out = []
+    for t, text, score, theme in zip(threads, texts, scores, themes):
+        if score > NEUTRAL_BAND:
+            sentiment = "positive"
+        elif score < -NEUTRAL_BAND:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+        out.append(
+            {
+                "comment_id": comment_key(t),
+                "text": t.get("text", ""),
+                "like_count": t.get("like_count") or 0,
+                "reply_count": t.get("reply_count") or 0,
+                "published_at": t.get("published_at"),
+                "sentiment": sentiment,
+                "score": round(float(score), 3),
+                "about": "creator" if CREATOR_CUES.search(text) else "video",
+                "theme": theme,
+                "source": "local",
+            }
+        )
+    return out
+
+
+def discussion_themes(analysis: Optional[Dict]) -> List[str]:
+    """Theme names of a stored analysis, all categories."""
+    discussions = ((analysis or {}).get("analysis") or {}).get("discussions") or {}
+    names = []
+    for cat in CATEGORIES:
+        for d in discussions.get(cat) or []:
+            if d.get("name") and d["name"] not in names:
+                names.append(d["name"])
+    return names
+
+
+def _parse_rows(raw: str) -> list:
+    rows = sanitize_json_output(raw)
+    if not isinstance(rows, list):
+        raise ValueError("Comment labels must be a JSON array")
+    return rows
+
+
+async def label_batch(texts: List[str], themes: List[str]) -> Dict[int, Dict]:
+    """
+    {index in `texts`: {sentiment, about, theme}} for the comments the
+    model labelled.  Raises ValueError on an unusable reply.
+    """
+    theme_list = "\n".join(f"{i}. {name}" for i, name in enumerate(themes)) or "(none)"
+    comments = "\n".join(f"{i}: {text}" for i, text in enumerate(texts))
+    rows = await chat(
+        f"{COMMENT_LABELS_PROMPT}\n\nThemes:\n{theme_list}\n\nComments:\n{comments}",
+        label="labels",
+        parse=_parse_rows,
+    )
+
+    out = {}
+    for row in rows:
+        if not isinstance(row, list) or len(row) != 4:
+            continue
+        i, s, a, t = row
+        if not isinstance(i, int) or not 0 <= i < len(texts):
+            continue
+        if s not in SENTIMENTS or a not in ABOUT:
+            continue
+        out[i] = {
+            "sentiment": SENTIMENTS[s],
+            "about": ABOUT[a],
+            "theme": themes[t] if isinstance(t, int) and 0 <= t < len(themes) else None,
+        }
+    return out
+
+
+async def _llm_labels(
+    labels: List[Dict],
+    texts: List[str],
+    themes: List[str],
+    calls: List[Dict],
+    remaining_usd: Optional[float],
+) -> int:
+    """
+    Relabel `labels` in place with the LLM.  `calls` is the run's usage log;
+    no new wave starts once it has cost `remaining_usd` (None = no limit).
+    """
+    size = max(settings.LABELS_BATCH_SIZE, 1)
+    wave = max(settings.LLM_MAX_CONCURRENCY, 1)
+    starts = list(range(0, len(labels), size))
+    labelled = 0
+    for w in range(0, len(starts), wave):
+        spent = sum(c.get("cost_usd", 0.0) for c in calls)
+        if remaining_usd is not None and spent >= remaining_usd:
+            logger.info(
+                "labels: LLM budget used up after %d of %d batches, rest stay local",
+                w,
+                len(starts),
+            )
+            break
+        group = starts[w : w + wave]
+        results = await asyncio.gather(
+            *(label_batch(texts[s : s + size], themes) for s in group),
+            return_exceptions=True,
+        )
+        for start, res in zip(group, results):
+            if isinstance(res, ValueError):
+                logger.warning("labels: batch at %d kept local labels: %s", start, res)
+                continue
+            if isinstance(res, BaseException):
+                raise res
+            for i, fields in res.items():
+                labels[start + i].update(fields, source="llm")
+                labelled += 1
+    return labelled
+
+
+async def label_video(
+    video_id: str, tier: Optional[str] = None, user_id: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Label every stored thread of the video and store the labels.
+    Returns {threads, llm_labelled, tier}, or None without stored comments.
+    """
+    tier = tier or settings.LABELS_TIER
+    if tier not in TIERS:
+        raise ValueError(f"Unknown labels tier {tier!r}")
+    comments_doc = await get_comments_by_video_id(video_id)
+    if not comments_doc:
+        return None
+
+    threads = comments_doc["comments"]
+    texts = label_texts(threads)
+    labels = local_labels(threads, texts)
+    llm_labelled = 0
+    if tier == "llm":
+        video = await get_video_by_id(video_id)
+        channel_id = str(video["channel_id"]) if video else None
+        try:
+            over = await check_budget(user_id, channel_id) == "downgrade"
+        except BudgetExceeded:
+            over = True
+        if over:
+            logger.info("video %s: over LLM budget, local labels only", video_id)
+            tier = "local"
+        else:
+            themes = discussion_themes(await get_analysis_by_comment_id(video_id))
+            remaining = await remaining_budget(user_id, channel_id)
+            with capture_usage() as calls:
+                try:
+                    llm_labelled = await _llm_labels(labels, texts, themes, calls, remaining)
+                finally:
+                    await record_run(video_id, channel_id, user_id, calls, kind="labels")
+
+    await replace_labels(video_id, labels)
+    logger.info("video %s: %d threads labelled (%s)", video_id, len(labels), tier)
+    return {"threads": len(labels), "llm_labelled": llm_labelled, "tier": tier}
@@ -0,0 +1,62 @@
+# libs/agents/comments_analyzer/map_reduce.py
+"""
+Map-reduce analysis for videos whose comments don't fit one prompt.
+
+map    – comments are cut into ANALYSIS_CHUNK_TOKENS-sized chunks (whole
+         threads only) and every chunk runs the extractors concurrently;
+         the shared LLM semaphore bounds how many calls are in flight.
+reduce – partial results are merged deterministically (merge.py), weighted
+         by each chunk's comment count.
+The headline is written once, from the merged sentiments.
+
+Latency therefore grows with chunks / LLM_MAX_CONCURRENCY rather than with
+the raw comment count.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import Chunk, chunk_threads
+from libs.agents.comments_analyzer.merge import merge_partials
+from libs.agents.comments_analyzer.scheduler import run_dag
+from libs.agents.extractors.fused import extract_all
+from libs.agents.extractors.headline import extract_headline
+
+logger = logging.getLogger(__name__)
+
+
+async def _map_chunk(video_id: str, meta: str, chunk: Chunk, mode: str) -> Dict:
+    text = chunk.text
+    blob = meta + text
+    if mode == "fused":
+        out = await extract_all(blob, text, video_id, chunk.keys)
+        out.pop("headline", None)
+        return out
+
+    out, _ = await run_dag(
+        {"blob": blob, "comments_text": text, "video_id": video_id, "line_keys": chunk.keys},
+        skip=("headline",),
+        report=False,
+    )
+    return out
+
+
+async def run_map_reduce(
+    video_id: str, meta: str, threads: List[Dict], mode: str, headline: bool = True
+) -> Dict:
+    chunks = chunk_threads(threads, settings.ANALYSIS_CHUNK_TOKENS)
+    logger.info("video %s: map-reduce over %d chunks", video_id, len(chunks))
+    partials = await asyncio.gather(
+        *(_map_chunk(video_id, meta, c, mode) for c in chunks)
+    )
+    merged = merge_partials([(p, c.comments) for p, c in zip(partials, chunks)])
+
+    # headline only needs the scores plus some flavour of the comments
+    merged["headline"] = (
+        await extract_headline(meta + chunks[0].text, merged["sentiments"])
+        if headline
+        else None
+    )
+    return merged
@@ -0,0 +1,154 @@
+# libs/agents/comments_analyzer/merge.py
+"""
+Deterministic merges of partial analyses.  Each partial comes with a
+weight – the number of comments it was computed from – so larger chunks
+count for more.
+
+  sentiments   count-weighted average per category, re-rounded to sum to 100
+  discussions  themes merged by normalised name, mentions summed, sentiment
+               weighted by mentions; top five per category
+  people       merged by normalised name, sentiment weighted by chunk
+               weight, remarks de-duplicated (max three), grounded counts
+               summed and supporting thread keys united
+  lists        order-preserving, case-insensitive de-duplication
+
+Ties are always broken by name so the same inputs give the same output.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+KEYS = ("positive", "neutral", "negative")
+CATEGORIES = ("video", "creator", "topic")
+MAX_THEMES = 5
+MAX_PEOPLE = 6
+MAX_REMARKS = 3
+MAX_COMMENT_KEYS = 20
+
+Partial = Tuple[Dict, float]  # (section value, weight)
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"[^\w ]+", "", name.casefold()).strip()
+
+
+def to_percent(values: Dict[str, float]) -> Dict[str, int]:
+    """
+    Largest-remainder rounding of non-negative scores to ints summing to 100.
+    """
+    total = sum(values.get(k, 0) for k in KEYS)
+    if total <= 0:
+        return {"positive": 0, "neutral": 100, "negative": 0}
+    exact = {k: values.get(k, 0) * 100.0 / total for k in KEYS}
+    out = {k: int(exact[k]) for k in KEYS}
+    for k in sorted(KEYS, key=lambda k: (out[k] - exact[k], KEYS.index(k)))[
+        : 100 - sum(out.values())
+    ]:
+        out[k] += 1
+    return out
+
+
+def _weighted_breakdown(parts: Iterable[Tuple[Dict, float]]) -> Dict[str, int]:
+    acc = {k: 0.0 for k in KEYS}
+    for breakdown, w in parts:
+        for k in KEYS:
+            acc[k] += breakdown.get(k, 0) * w
+    return to_percent(acc)
+
+
+def merge_sentiments(parts: List[Partial]) -> Dict:
+    return {
+        cat: _weighted_breakdown((p[cat], w) for p, w in parts if cat in p)
+        for cat in CATEGORIES
+    }
+
+
+def merge_discussions(parts: List[Partial]) -> Dict:
+    out = {}
+    for cat in CATEGORIES:
+        themes: Dict[str, Dict] = {}
+        for p, _ in parts:
+            for item in p.get(cat, []):
+                key = _norm(item["name"])
+                if not key:
+                    continue
+                mentions = max(int(item.get("mentions", 0)), 0)
+                t = themes.setdefault(key, {"names": {}, "mentions": 0, "sent": []})
+                t["names"][item["name"]] = t["names"].get(item["name"], 0) + mentions
+                t["mentions"] += mentions
+                t["sent"].append((item.get("sentiment", {}), max(mentions, 1)))
+        ranked = sorted(themes.items(), key=lambda kv: (-kv[1]["mentions"], kv[0]))
+        out[cat] = [
+            {
+                # most-mentioned spelling wins
+                "name": sorted(t["names"].items(), key=lambda nv: (-nv[1], nv[0]))[0][0],
+                "mentions": t["mentions"],
+                "sentiment": _weighted_breakdown(t["sent"]),
+            }
+            for _, t in ranked[:MAX_THEMES]
+        ]
+    return out
+
+
+def merge_people(parts: List[Partial]) -> List[Dict]:
+    people: Dict[str, Dict] = {}
+    for plist, w in parts:
+        for person in plist:
+            key = _norm(person["name"])
+            if not key:
+                continue
+            entry = people.setdefault(
+                key, {"name": person["name"], "weight": 0.0, "sent": [], "remarks": []}
+            )
+            entry["weight"] += w
+            entry["sent"].append((person.get("sentiment", {}), w))
+            for r in person.get("remarks", []):
+                if r and _norm(r) not in {_norm(x) for x in entry["remarks"]}:
+                    entry["remarks"].append(r)
+            # extra grounded fields: counts (mentions) are summed, key
+            # lists (comment_keys) united in order
+            for k, v in person.items():
+                if k in ("name", "sentiment", "remarks"):
+                    continue
+                if isinstance(v, int):
+                    entry[k] = entry.get(k, 0) + v
+                elif isinstance(v, list):
+                    entry[k] = list(dict.fromkeys(entry.get(k, []) + v))[:MAX_COMMENT_KEYS]
+    ranked = sorted(people.items(), key=lambda kv: (-kv[1]["weight"], kv[0]))
+    out = []
+    for _, e in ranked[:MAX_PEOPLE]:
+        merged = {
+            "name": e["name"],
+            "sentiment": _weighted_breakdown(e["sent"]),
+            "remarks": e["remarks"][:MAX_REMARKS],
+        }
+        merged.update(
+            {k: v for k, v in e.items() if k not in ("name", "weight", "sent", "remarks")}
+        )
+        out.append(merged)
+    return out
+
+
+def merge_lists(parts: List[Partial], limit: int = 20) -> List[str]:
+    seen, out = set(), []
+    for items, _ in parts:
+        for s in items:
+            key = _norm(s)
+            if key and key not in seen:
+                seen.add(key)
+                out.append(s)
+    return out[:limit]
+
+
+def merge_partials(parts: List[Partial]) -> Dict:
+    """
+    Merge whole partial analyses (dicts with every section but headline).
+    """
+    section = lambda k: [(p[k], w) for p, w in parts if k in p]
+    return {
+        "sentiments": merge_sentiments(section("sentiments")),
+        "discussions": merge_discussions(section("discussions")),
+        "people": merge_people(section("people")),
+        "other_insights": merge_lists(section("other_insights")),
+        "video_requests": merge_lists(section("video_requests")),
+    }
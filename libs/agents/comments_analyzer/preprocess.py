@@ -0,0 +1,224 @@
+# libs/agents/comments_analyzer/preprocess.py
+"""
+CPU-side clean-up of comment threads before prompt assembly.
+
+  normalise   NFKC, links → "<link>", character / emoji runs capped at three,
+              whitespace collapsed, long comments truncated
+  spam        link farms, "sub4sub"-style self promotion, contact bait (a
+              messenger next to a handle, number or link) and comments with
+              neither words nor emoji left after normalising are dropped;
+              emoji-only reactions are kept
+  duplicates  reply-less threads are collapsed into one entry with a
+              multiplicity `count` (rendered "(xN)" in prompts): exact
+              matches on a punctuation/case-folded key, near matches by
+              64-bit SimHash over words + word bigrams, bucketed into
+              (distance + 1) LSH bands – by pigeonhole any pair within the
+              distance shares a band, so only bucket-mates are compared
+
+Threads with replies are never merged (the replies give them their own
+context); their replies are normalised and de-duplicated in place.
+The PreprocessReport tells how many tokens the stage saved.
+"""
+
+import hashlib
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import thread_lines
+from libs.agents.tokens import count_tokens
+
+_URL = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_WS = re.compile(r"\s+")
+_CHAR_RUN = re.compile(r"(.)\1{3,}")
+# pictographs + flags, symbols / dingbats, variation selector, zero-width joiner
+_EMOJI = "\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D"
+_EMOJI_RUN = re.compile(f"[{_EMOJI}]{{4,}}")
+_EMOJI_CHAR = re.compile(f"[{_EMOJI}]")
+_WORD = re.compile(r"\w+")
+_SPAM = re.compile(
+    r"\b(?:sub\s*4\s*sub|sub\s*for\s*sub|check\s+(?:out\s+)?my\s+channel|"
+    r"subscribe\s+to\s+my|t\.me/|"
+    r"free\s+(?:robux|v-?bucks|giveaway)|crypto\s+(?:signals?|investment)|"
+    r"earn\s+\$?\d+\s*(?:per|a)\s+(?:day|week))",
+    re.IGNORECASE,
+)
+# contact bait: a messenger mention right next to a handle, phone number or link
+_CONTACT = r"\b(?:whats\s*app|telegram|dm\s+me)\b"
+_REACH = r"(?:@\w{3,}|\+?\d[\d\s().-]{6,}\d|<link>)"
+_CONTACT_BAIT = re.compile(
+    rf"{_CONTACT}[\s:,.-]*(?:(?:on|at|me|via)\s+)*{_REACH}|"
+    rf"{_REACH}[\s:,.-]*(?:(?:on|via)\s+)?{_CONTACT}",
+    re.IGNORECASE,
+)
+
+class PreprocessReport:
+    def __init__(self):
+        self.threads_in = 0
+        self.threads_out = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.spam = 0
+        self.truncated = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def as_dict(self) -> Dict:
+        out = dict(vars(self))
+        out["tokens_saved"] = self.tokens_saved
+        return out
+
+
+def normalize_text(text: str, max_chars: int = 0) -> Tuple[str, bool]:
+    """
+    → (normalised text, truncated?)
+    """
+    s = unicodedata.normalize("NFKC", text or "")
+    s = _URL.sub("<link>", s)
+    s = _EMOJI_RUN.sub(lambda m: m.group(0)[:3], s)
+    s = _CHAR_RUN.sub(lambda m: m.group(1) * 3, s)
+    s = _WS.sub(" ", s).strip()
+    if max_chars and len(s) > max_chars:
+        return s[:max_chars].rstrip() + "…", True
+    return s, False
+
+
+def is_spam(text: str) -> bool:
+    bare = text.replace("<link>", "")
+    if not _WORD.search(bare) and not _EMOJI_CHAR.search(bare):
+        return True  # nothing but links / punctuation
+    if text.count("<link>") >= 2:
+        return True
+    return bool(_SPAM.search(text) or _CONTACT_BAIT.search(text))
+
+
+def _exact_key(text: str) -> str:
+    # emoji-only comments have no words; they match on the emoji themselves
+    return " ".join(_WORD.findall(text.casefold())) or _WS.sub("", text)
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """
+    Bit i is set when more than half the features have bit i set.  The
+    per-bit tallies are kept bit-sliced (slices[j] holds bit j of all 64
+    counters), so adding a feature is a handful of int ops, not 64.
+    """
+    words = _WORD.findall(text.casefold())
+    feats = words + [" ".join(p) for p in zip(words, words[1:])]
+    slices: List[int] = []
+    for f in feats:
+        carry = _feature_hash(f)
+        for j in range(len(slices)):
+            slices[j], carry = slices[j] ^ carry, slices[j] & carry
+            if not carry:
+                break
+        if carry:
+            slices.append(carry)
+    # counters > len(feats) // 2, compared MSB first
+    half, gt, eq = len(feats) // 2, 0, (1 << 64) - 1
+    for j in range(len(slices) - 1, -1, -1):
+        if half >> j & 1:
+            eq &= slices[j]
+        else:
+            gt |= eq & slices[j]
+            eq &= ~slices[j]
+    return gt
+
+
+def _bands(h: int, bands: int):
+    bits = 64 // bands
+    mask = (1 << bits) - 1
+    return [(b, h >> (b * bits) & mask) for b in range(bands)]
+
+
+def preprocess_threads(threads: List[Dict]) -> Tuple[List[Dict], PreprocessReport]:
+    """
+    Returns cleaned threads (same shape plus an optional `count`) and the
+    report.  Input order is kept; a duplicate group sits where its first
+    member was.
+    """
+    report = PreprocessReport()
+    report.threads_in = len(threads)
+    report.tokens_before = sum(
+        count_tokens(line) + 1 for t in threads for line in thread_lines(t)
+    )
+    max_chars = settings.PREPROCESS_MAX_CHARS
+    max_dist = settings.PREPROCESS_SIMHASH_DISTANCE
+    bands = max_dist + 1
+
+    out: List[Dict] = []
+    by_key: Dict[str, Dict] = {}
+    buckets: Dict[Tuple[int, int], List[Tuple[int, Dict]]] = {}
+
+    for t in threads:
+        text, cut = normalize_text(t.get("text", ""), max_chars)
+        report.truncated += cut
+        if is_spam(text):
+            report.spam += 1
+            continue
+
+        replies, seen = [], set()
+        for r in t.get("replies", []):
+            r_text, r_cut = normalize_text(r, max_chars)
+            report.truncated += r_cut
+            if is_spam(r_text):
+                report.spam += 1
+                continue
+            k = _exact_key(r_text)
+            if k in seen:
+                report.duplicates += 1
+                continue
+            seen.add(k)
+            replies.append(r_text)
+
+        entry = {**t, "text": text, "replies": replies, "count": t.get("count", 1)}
+        if replies:
+            out.append(entry)
+            continue
+
+        key = _exact_key(text)
+        if key in by_key:
+            by_key[key]["count"] += entry["count"]
+            report.duplicates += 1
+            continue
+
+        # near duplicates: short texts only match exactly
+        h = simhash(text) if len(key.split()) >= 4 else None
+        if h is not None and max_dist > 0:
+            match = None
+            for band in _bands(h, bands):
+                for other_h, other in buckets.get(band, []):
+                    if (h ^ other_h).bit_count() <= max_dist:
+                        match = other
+                        break
+                if match:
+                    break
+            if match:
+                match["count"] += entry["count"]
+                report.near_duplicates += 1
+                continue
+            for band in _bands(h, bands):
+                buckets.setdefault(band, []).append((h, entry))
+
+        by_key[key] = entry
+        out.append(entry)
+
+    for e in out:
+        if e["count"] == 1:
+            del e["count"]
+    report.threads_out = len(out)
+    report.tokens_after = sum(
+        count_tokens(line) + 1 for t in out for line in thread_lines(t)
+    )
+    return out, report
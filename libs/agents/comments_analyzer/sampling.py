@@ -0,0 +1,195 @@
+# libs/agents/comments_analyzer/sampling.py
+"""
+Engagement-weighted, stratified sampling of comment threads down to a
+token budget, weighted back to the full comment set.
+
+strata     lexicon polarity of the top comment (negative / neutral /
+           positive, libs/analysis/lexicon.py).  Each stratum gets a share
+           of the budget ∝ √(its tokens): small camps get more than their
+           proportional share, so a minority opinion is never sampled away.
+priority   s = count × √(1 + likes) × (1 + replies)^0.3 × recency, where
+           recency halves every SAMPLE_HALF_LIFE_DAYS before the newest
+           comment of the set
+selection  within a stratum, probability-proportional-to-s without
+           replacement (Efraimidis–Spirakis keys u^(1/s)) until its budget
+           is spent; seeded by the video id, so re-runs send the same
+           prompts (and hit the LLM cache)
+weights    inverse inclusion probabilities π = min(1, c·s), calibrated so
+           the sample's comment count equals its stratum's.  A sampled
+           thread's `count` becomes the number of comments it stands for,
+           so "(xN)" in prompts, local sentiments, clustered discussions
+           and map-reduce merging all scale back to the population.
+           Replies are kept as they are.
+"""
+
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import settings
+from libs.agents.comments_analyzer.chunking import thread_lines
+from libs.agents.tokens import count_tokens
+from libs.analysis.lexicon import NEUTRAL_BAND, score_batch
+
+STRATA = ("negative", "neutral", "positive")
+# room for the " (xN)" a reweighted thread gains
+_COUNT_SUFFIX_TOKENS = 4
+
+
+class SampleReport:
+    def __init__(self):
+        self.threads_in = 0
+        self.threads_out = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.strata: Dict[str, Dict[str, int]] = {}
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+def _thread_tokens(thread: Dict) -> int:
+    return sum(count_tokens(line) + 1 for line in thread_lines(thread))
+
+
+def _timestamp(value) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def priorities(threads: List[Dict], half_life_days: float) -> np.ndarray:
+    """Engagement size s of every thread (> 0)."""
+    count = np.array([t.get("count", 1) for t in threads], dtype=np.float64)
+    likes = np.array([t.get("like_count") or 0 for t in threads], dtype=np.float64)
+    replies = np.array(
+        [max(t.get("reply_count") or 0, len(t.get("replies", []))) for t in threads],
+        dtype=np.float64,
+    )
+    s = count * np.sqrt(1.0 + likes) * (1.0 + replies) ** 0.3
+
+    ts = np.array([_timestamp(t.get("published_at")) or np.nan for t in threads])
+    if half_life_days > 0 and not np.all(np.isnan(ts)):
+        age_days = (np.nanmax(ts) - ts) / 86400.0
+        s *= np.where(np.isnan(age_days), 1.0, 0.5 ** (age_days / half_life_days))
+    return np.maximum(s, 1e-9)
+
+
+def inclusion_probabilities(s: np.ndarray, n: int) -> np.ndarray:
+    """π_i = min(1, c·s_i) with c chosen so that Σπ = n."""
+    pi = np.zeros_like(s)
+    capped = np.zeros(len(s), dtype=bool)
+    while True:
+        rest = n - capped.sum()
+        free = ~capped
+        if rest <= 0 or not free.any():
+            break
+        pi[free] = s[free] * rest / s[free].sum()
+        over = free & (pi >= 1.0)
+        if not over.any():
+            break
+        capped |= over
+    pi[capped] = 1.0
+    return pi
+
+
+def _round_counts(target: np.ndarray, total: int) -> np.ndarray:
+    """Integers ≥ 1 close to `target` that sum to `total` (largest remainder)."""
+    counts = np.maximum(np.floor(target).astype(np.int64), 1)
+    short = total - counts.sum()
+    if short > 0:
+        for i in np.argsort(-(target - np.floor(target)), kind="stable")[:short]:
+            counts[i] += 1
+    # the floor of 1 overshot: take the excess back from the largest counts
+    while short < 0 and counts.max() > 1:
+        counts[int(np.argmax(counts))] -= 1
+        short += 1
+    return counts
+
+
+def allocate(tokens: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Budget per stratum ∝ √tokens, capped at what a stratum has; leftovers move on."""
+    alloc = {k: 0 for k in tokens}
+    open_ = {k for k, v in tokens.items() if v > 0}
+    left = budget
+    while open_ and left > 0:
+        root = {k: tokens[k] ** 0.5 for k in open_}
+        total = sum(root.values())
+        spent = 0
+        for k in list(open_):
+            share = int(left * root[k] / total)
+            take = min(share, tokens[k] - alloc[k])
+            alloc[k] += take
+            spent += take
+            if alloc[k] >= tokens[k]:
+                open_.discard(k)
+        if spent == 0:
+            break
+        left -= spent
+    return alloc
+
+
+def sample_threads(
+    threads: List[Dict], budget_tokens: int, seed_key: str = ""
+) -> Tuple[List[Dict], SampleReport]:
+    """
+    Threads fitting `budget_tokens` (input order kept) with their `count`
+    reweighted to the population, and the report.  Returns the input
+    unchanged when it already fits.
+    """
+    report = SampleReport()
+    report.threads_in = len(threads)
+    cost = np.array([_thread_tokens(t) for t in threads], dtype=np.int64)
+    report.tokens_in = int(cost.sum())
+    if report.tokens_in <= budget_tokens:
+        report.threads_out, report.tokens_out = len(threads), report.tokens_in
+        return threads, report
+
+    scores, _ = score_batch([t.get("text", "") for t in threads])
+    stratum = np.where(scores < -NEUTRAL_BAND, 0, np.where(scores > NEUTRAL_BAND, 2, 1))
+    s = priorities(threads, settings.SAMPLE_HALF_LIFE_DAYS)
+    m = np.array([t.get("count", 1) for t in threads], dtype=np.float64)
+    rng = np.random.default_rng(zlib.crc32(seed_key.encode("utf-8")))
+    # Efraimidis–Spirakis: the largest u^(1/s) form a PPS sample
+    keys = np.log(rng.random(len(threads))) / s
+
+    members = {name: np.flatnonzero(stratum == h) for h, name in enumerate(STRATA)}
+    budget = allocate(
+        {name: int((cost[idx] + _COUNT_SUFFIX_TOKENS).sum()) for name, idx in members.items()},
+        budget_tokens,
+    )
+    new_count: Dict[int, int] = {}
+    for name, idx in members.items():
+        if not len(idx):
+            continue
+        order = idx[np.argsort(-keys[idx], kind="stable")]
+        fits = np.cumsum(cost[order] + _COUNT_SUFFIX_TOKENS) <= budget[name]
+        taken = order[fits] if fits.any() else order[:1]
+        pi = inclusion_probabilities(s[idx], len(taken))
+        pi_taken = pi[np.searchsorted(idx, taken)]
+        target = m[taken] / pi_taken
+        target *= m[idx].sum() / target.sum()
+        for i, c in zip(taken, _round_counts(target, int(m[idx].sum()))):
+            new_count[int(i)] = int(c)
+        report.strata[name] = {
+            "threads": int(len(idx)),
+            "comments": int(m[idx].sum()),
+            "sampled": int(len(taken)),
+        }
+
+    sample = []
+    for i in sorted(new_count):
+        entry = {**threads[i], "count": new_count[i]}
+        if entry["count"] == 1:
+            del entry["count"]
+        sample.append(entry)
+    report.threads_out = len(sample)
+    report.tokens_out = sum(_thread_tokens(t) for t in sample)
+    return sample, report
@@ -0,0 +1,147 @@
+# libs/agents/comments_analyzer/scheduler.py
+"""
+Run the registered extractors (extractors/registry.py) as a DAG.
+
+Every extractor becomes a task at once; a task only awaits the outputs it
+declares as inputs, so everything independent starts immediately and a
+dependent extractor starts the moment its last dependency finishes.
+
+Each node runs under its own timeout, retry count and model.  The run
+returns a timing report: per node when it started (= when its inputs were
+ready) and finished, in seconds from the start of the run, plus the
+critical path – the chain of dependencies that ended last, i.e. what
+bounded the wall time.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Tuple
+
+from libs.agents.cache import bypass_cache
+from libs.agents.extractors.registry import REGISTRY, RUN_INPUTS, ExtractorSpec
+from libs.agents.governor import RateLimited
+from libs.agents.llm import use_model
+from libs.agents.progress import tracked
+
+logger = logging.getLogger(__name__)
+
+
+def build_graph(skip: Iterable[str] = ()) -> Dict[str, ExtractorSpec]:
+    """
+    The registered specs minus `skip`, checked for missing deps and cycles.
+    Returned in a topological order.
+    """
+    skip = set(skip)
+    specs = {n: s for n, s in REGISTRY.items() if n not in skip}
+    for spec in specs.values():
+        missing = [d for d in spec.deps if d not in specs]
+        if missing:
+            raise ValueError(f"Extractor {spec.name!r} depends on unavailable {missing}")
+
+    ordered: Dict[str, ExtractorSpec] = {}
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Extractor dependency cycle through {name!r}")
+        visiting.add(name)
+        for dep in specs[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        ordered[name] = specs[name]
+
+    for name in specs:
+        visit(name)
+    return ordered
+
+
+async def _call(spec: ExtractorSpec, args: List, timing: Dict):
+    retries = spec.effective_retries()
+    for attempt in range(retries + 1):
+        timing["attempts"] = attempt + 1
+        try:
+            # a retry must not be answered from the cache with the reply
+            # that just failed
+            fresh = bypass_cache() if attempt else nullcontext()
+            with use_model(spec.effective_model()), fresh:
+                return await asyncio.wait_for(spec.fn(*args), spec.effective_timeout())
+        except (asyncio.CancelledError, RateLimited):
+            # the route already waited out its rate limit; the run is deferred
+            raise
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            logger.warning(
+                "extractor %s failed (attempt %d/%d): %r", spec.name, attempt + 1, retries + 1, e
+            )
+
+
+def critical_path(graph: Dict[str, ExtractorSpec], nodes: Dict[str, Dict]) -> List[str]:
+    """
+    Walk back from the last node to finish through the dependency that
+    finished last at each step.
+    """
+    if not nodes:
+        return []
+    name = max(nodes, key=lambda n: nodes[n]["end_s"])
+    path = [name]
+    while graph[name].deps:
+        name = max(graph[name].deps, key=lambda d: nodes[d]["end_s"])
+        path.append(name)
+    return path[::-1]
+
+
+async def run_dag(
+    inputs: Dict, skip: Iterable[str] = (), report: bool = True
+) -> Tuple[Dict, Dict]:
+    """
+    Run every registered extractor not in `skip` on `inputs` (the
+    RUN_INPUTS values).  With `report` each section goes to the current
+    run tracker as it finishes.
+
+    Returns (sections, timing).  The first failure (after its retries)
+    cancels the remaining extractors and is raised.
+    """
+    graph = build_graph(skip)
+    t0 = time.perf_counter()
+    since = lambda: round(time.perf_counter() - t0, 3)
+    nodes: Dict[str, Dict] = {name: {} for name in graph}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def node(spec: ExtractorSpec):
+        dep_values = dict(zip(spec.deps, await asyncio.gather(*(tasks[d] for d in spec.deps))))
+        values = {**{k: inputs.get(k) for k in RUN_INPUTS}, **dep_values}
+        timing = nodes[spec.name]
+        timing["start_s"] = since()
+        coro = _call(spec, [values[i] for i in spec.inputs], timing)
+        try:
+            return await (tracked(spec.name, coro) if report else coro)
+        finally:
+            timing["end_s"] = since()
+
+    # topological order, so every dependency's task exists before its users
+    for name, spec in graph.items():
+        tasks[name] = asyncio.create_task(node(spec))
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for t in tasks.values():
+            t.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    path = critical_path(graph, nodes)
+    timing = {
+        "wall_s": since(),
+        "critical_path": path,
+        "critical_path_s": nodes[path[-1]]["end_s"] if path else 0.0,
+        "nodes": nodes,
+    }
+    logger.info(
+        "extractors done in %.2fs, critical path %s", timing["wall_s"], " → ".join(path)
+    )
+    return dict(zip(tasks, results)), timing
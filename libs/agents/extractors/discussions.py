@@ -1,7 +1,25 @@
 # libs/agents/extractors/discussions.py
-from libs.agents.prompts.discussions_prompt import DISCUSSIONS_PROMPT
-from libs.agents.extractors.utils import sanitize_json_output
-from config.config import openai_client
+import logging
+from collections import defaultdict
+
+from config.config import settings
+from libs.agents.prompts.discussions_prompt import DISCUSSIONS_PROMPT, DISCUSSION_LABEL_PROMPT
+from libs.agents.extractors.utils import parse_comment_lines, sanitize_json_output
+from libs.agents.llm import chat
+from libs.analysis.clustering import cluster_comments
+from libs.analysis.lexicon import breakdown
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("video", "creator", "topic")
+MAX_THEMES = 5
+
+
+def _parse_labels(raw: str) -> list:
+    labels = sanitize_json_output(raw)
+    if not isinstance(labels, list):
+        raise ValueError("Cluster labels must be a JSON array")
+    return labels
 
 
 async def extract_discussions(text: str) -> dict:
@@ -13,9 +31,85 @@ async def extract_discussions(text: str) -> dict:
         "topic":   [ … ]
       }
     """
-    resp = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": DISCUSSIONS_PROMPT + "\n\n" + text}],
-    )
     # sanitize_json_output will pull the exact JSON object out of the reply
-    return sanitize_json_output(resp.choices[0].message.content.strip())
+    return await chat(
+        DISCUSSIONS_PROMPT + "\n\n" + text, label="discussions", parse=sanitize_json_output
+    )
+
+
+async def extract_discussions_clustered(text: str, comments_text: str) -> dict:
+    """
+    Same shape as extract_discussions, but the themes come from clustering
+    the comments locally (libs/analysis/clustering.py): `mentions` is the
+    exact number of comments in the theme and `sentiment` their lexicon
+    breakdown.  The LLM only sees a few exemplars per cluster to name them.
+    """
+    texts, weights = parse_comment_lines(comments_text)
+    clusters = cluster_comments(
+        texts,
+        weights,
+        max_clusters=settings.DISCUSSIONS_MAX_CLUSTERS,
+        dim=settings.DISCUSSIONS_HASH_DIM,
+    )
+    if not clusters:
+        return {cat: [] for cat in CATEGORIES}
+
+    # the blob is meta header + comments; keep the header for context
+    meta = text[: len(text) - len(comments_text)] if text.endswith(comments_text) else ""
+    blocks = [
+        f"Cluster {i} ({round(c.size)} comments)\n"
+        f"Words: {', '.join(c.terms)}\n"
+        + "\n".join(f"- {e}" for e in c.exemplars(texts, settings.DISCUSSIONS_EXEMPLARS))
+        for i, c in enumerate(clusters)
+    ]
+    labels = await chat(
+        DISCUSSION_LABEL_PROMPT + "\n\n" + meta + "\n\n".join(blocks),
+        label="discussions",
+        parse=_parse_labels,
+    )
+
+    # clusters given the same name are one theme
+    themes = defaultdict(lambda: {"name": "", "members": []})
+    for item in labels:
+        idx, cat = item.get("cluster"), item.get("category")
+        name = (item.get("name") or "").strip()
+        if not isinstance(idx, int) or not 0 <= idx < len(clusters):
+            continue
+        if cat not in CATEGORIES or not name:
+            continue
+        theme = themes[(cat, name.lower())]
+        theme["name"] = theme["name"] or name
+        theme["members"].extend(clusters[idx].members.tolist())
+
+    out = {cat: [] for cat in CATEGORIES}
+    for (cat, _), theme in themes.items():
+        members = theme["members"]
+        b = breakdown([texts[i] for i in members], [weights[i] for i in members])
+        out[cat].append(
+            {
+                "name": theme["name"],
+                "mentions": sum(weights[i] for i in members),
+                "sentiment": {k: b[k] for k in ("positive", "neutral", "negative")},
+            }
+        )
+    for cat in CATEGORIES:
+        out[cat] = sorted(out[cat], key=lambda d: -d["mentions"])[:MAX_THEMES]
+    return out
+
+
+async def extract_discussions_auto(text: str, comments_text: str) -> dict:
+    """
+    DISCUSSIONS_MODE:
+      "llm"        extract_discussions on the whole blob
+      "clustered"  extract_discussions_clustered, unless there are fewer
+                   than DISCUSSIONS_MIN_COMMENTS comments to cluster
+    """
+    mode = settings.DISCUSSIONS_MODE
+    if mode not in ("llm", "clustered"):
+        raise ValueError(f"Unknown discussions mode {mode!r}")
+    if mode == "clustered":
+        _, weights = parse_comment_lines(comments_text)
+        if sum(weights) >= settings.DISCUSSIONS_MIN_COMMENTS:
+            return await extract_discussions_clustered(text, comments_text)
+        logger.info("discussions: %d comments, too few to cluster", sum(weights))
+    return await extract_discussions(text)
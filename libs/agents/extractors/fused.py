@@ -0,0 +1,76 @@
+# libs/agents/extractors/fused.py
+"""
+Fused extractor: one structured-output call returns every analysis section,
+so the comment blob is sent once instead of six times.
+
+The reply is validated against AnalysisSections before it is returned; a
+schema violation raises ValueError like the other extractors' bad JSON.
+"""
+
+import json
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from libs.agents.extractors.people import ground_people
+from libs.agents.llm import DEFAULT_MODEL, chat
+from libs.agents.prompts.fused_prompt import FUSED_PROMPT, FUSED_RESPONSE_FORMAT
+from libs.schema.youtube.analysis_schema import AnalysisSections
+
+SECTIONS = (
+    "sentiments",
+    "headline",
+    "discussions",
+    "people",
+    "other_insights",
+    "video_requests",
+)
+
+
+def fused_request(text: str, model: str = DEFAULT_MODEL) -> dict:
+    """
+    Chat-completions request body for `text` (used by the Batch API path).
+    """
+    return {
+        "model": model,
+        "messages": [{"role": "user", "content": FUSED_PROMPT + "\n\n" + text}],
+        "response_format": FUSED_RESPONSE_FORMAT,
+    }
+
+
+def parse_fused(
+    raw: str, comments_blob: str, video_id: str, line_keys: Optional[List[str]] = None
+) -> dict:
+    """
+    Validate a fused reply and normalise it into the analysis section dict.
+    `line_keys` – thread key per line of `comments_blob` (see ground_people).
+    """
+    try:
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise TypeError("reply is not a JSON object")
+        validated = AnalysisSections(**data)
+    except (json.JSONDecodeError, TypeError, ValidationError) as e:
+        raise ValueError(f"Fused extraction for {video_id} failed validation: {e}")
+
+    out = validated.model_dump(include=set(SECTIONS))
+    out["other_insights"] = [s.strip() for s in out["other_insights"] if s.strip()]
+    out["video_requests"] = [s.strip() for s in out["video_requests"] if s.strip()]
+    # same de-hallucination / grounding pass as extract_people
+    out["people"] = ground_people(out["people"], comments_blob, line_keys)
+    return out
+
+
+async def extract_all(
+    text: str, comments_blob: str, video_id: str, line_keys: Optional[List[str]] = None
+) -> dict:
+    """
+    Returns the same section dict the per-extractor pipeline builds:
+    {sentiments, headline, discussions, people, other_insights, video_requests}
+    """
+    return await chat(
+        FUSED_PROMPT + "\n\n" + text,
+        label="fused",
+        parse=lambda raw: parse_fused(raw, comments_blob, video_id, line_keys),
+        response_format=FUSED_RESPONSE_FORMAT,
+    )
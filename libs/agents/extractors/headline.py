@@ -1,7 +1,14 @@
 # libs/agents/extractors/headline.py
 from libs.agents.prompts.headline_prompt import HEADLINE_PROMPT
 from libs.agents.extractors.utils import sanitize_json_output
-from config.config import openai_client
+from libs.agents.llm import chat
+
+
+def _parse_headline(raw: str) -> str:
+    data = sanitize_json_output(raw)
+    if not isinstance(data, dict) or not isinstance(data.get("headline"), str):
+        raise ValueError("Headline reply has no \"headline\" string")
+    return data["headline"]
 
 
 async def extract_headline(text: str, sentiments: dict) -> str:
@@ -9,8 +16,6 @@ async def extract_headline(text: str, sentiments: dict) -> str:
     Generate one-line headline from sentiment triplet.
     """
     payload = f"Scores: {sentiments}\n\n{text}"
-    resp = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": HEADLINE_PROMPT + "\n\n" + payload}],
+    return await chat(
+        HEADLINE_PROMPT + "\n\n" + payload, label="headline", parse=_parse_headline
     )
-    return sanitize_json_output(resp.choices[0].message.content.strip())["headline"]
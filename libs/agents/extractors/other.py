@@ -12,7 +12,7 @@ can continue gracefully.
 import json
 from typing import List
 
-from config.config import openai_client
+from libs.agents.llm import chat
 from libs.agents.extractors.utils import sanitize_json_output
 from libs.agents.prompts.other_prompts import (
     OTHER_INSIGHTS_PROMPT,
@@ -20,20 +20,11 @@ from libs.agents.prompts.other_prompts import (
 )
 
 
-async def _chat(prompt: str) -> str:
-    """Internal helper — one-shot chat call with the mini model."""
-    resp = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return resp.choices[0].message.content.strip()
-
-
 async def extract_other_insights(text: str) -> List[str]:
     """
     Return a list of terse insight lines, or [] if none found.
     """
-    raw = await _chat(OTHER_INSIGHTS_PROMPT + "\n\n" + text)
+    raw = await chat(OTHER_INSIGHTS_PROMPT + "\n\n" + text, label="other_insights")
 
     # Try JSON first in case the model wrapped an array.
     try:
@@ -55,7 +46,7 @@ async def extract_video_requests(text: str) -> List[str]:
     """
     Return list of requested video ideas.  Empty list if none (or if model writes 'None').
     """
-    raw = await _chat(VIDEO_REQUESTS_PROMPT + "\n\n" + text)
+    raw = await chat(VIDEO_REQUESTS_PROMPT + "\n\n" + text, label="video_requests")
 
     # Accept JSON array or newline list.
     try:
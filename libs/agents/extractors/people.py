@@ -1,22 +1,46 @@
 # libs/agents/extractors/people.py
-import json, re
+from typing import List, Optional
 from libs.agents.prompts.people_prompt import PEOPLE_PROMPT
-from config.config import openai_client
+from libs.agents.llm import chat
 from libs.agents.extractors.utils import sanitize_json_output
+from libs.analysis.name_matcher import NameMatcher
 
+# supporting threads (comment keys) kept per person
+MAX_COMMENT_KEYS = 20
 
-def _name_in_comments(name: str, comments: str) -> bool:
-    pattern = r"\b" + re.escape(name) + r"\b"
-    return re.search(pattern, comments, re.IGNORECASE) is not None
 
-
-async def extract_people(text: str, comments_blob: str) -> list:
-    resp = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": PEOPLE_PROMPT + "\n\n" + text}],
-    )
-    arr = sanitize_json_output(
-        resp.choices[0].message.content.strip()
+def ground_people(
+    people: list, comments_blob: str, line_keys: Optional[List[str]] = None
+) -> list:
+    """
+    Drop hallucinated names and attach grounded counts: `mentions` (every
+    occurrence, duplicates weighted by their multiplicity) and, when
+    `line_keys` gives the thread behind each line of `comments_blob`,
+    `comment_keys` (threads that mention the person).
+    All names are matched in one pass over the comments.
+    """
+    if not people:
+        return []
+    matcher = NameMatcher([p["name"] for p in people])
+    # a thread spans several lines (replies), so over-collect line indices
+    mentions, indices = matcher.count_lines(
+        comments_blob.split("\n"), max_indices=MAX_COMMENT_KEYS * 4
     )
+    out = []
+    for p, n, idx in zip(people, mentions, indices):
+        if not n:
+            continue
+        person = {**p, "mentions": n}
+        if line_keys is not None:
+            keys = dict.fromkeys(line_keys[i] for i in idx if i < len(line_keys))
+            person["comment_keys"] = list(keys)[:MAX_COMMENT_KEYS]
+        out.append(person)
+    return out
+
+
+async def extract_people(
+    text: str, comments_blob: str, line_keys: Optional[List[str]] = None
+) -> list:
+    arr = await chat(PEOPLE_PROMPT + "\n\n" + text, label="people", parse=sanitize_json_output)
     # drop hallucinations
-    return [p for p in arr if _name_in_comments(p["name"], comments_blob)]
+    return ground_people(arr, comments_blob, line_keys)
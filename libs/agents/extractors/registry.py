@@ -0,0 +1,74 @@
+# libs/agents/extractors/registry.py
+"""
+The extractor lineup of the per-extractor pipeline.
+
+Each ExtractorSpec names its section, the coroutine that produces it and
+the positional `inputs` it takes.  An input is either a run input
+("blob" = meta header + comments, "comments_text", "video_id", "line_keys" =
+the thread key of each comments_text line) or the name
+of another extractor, whose output it then waits for – that is the
+dependency edge the scheduler (comments_analyzer/scheduler.py) follows.
+
+Adding an insight type is one register() call; the section is stored on
+the analysis doc under its name.  `timeout_s` / `retries` default to
+EXTRACTOR_TIMEOUT_S / EXTRACTOR_RETRIES, and `model` (or
+EXTRACTOR_MODELS[name]) overrides the chat() model for its calls.
+"""
+
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from config.config import settings
+from libs.agents.extractors.discussions import extract_discussions_auto
+from libs.agents.extractors.headline import extract_headline
+from libs.agents.extractors.other import extract_other_insights, extract_video_requests
+from libs.agents.extractors.people import extract_people
+from libs.agents.extractors.sentiment import extract_sentiments_tiered
+
+RUN_INPUTS = ("blob", "comments_text", "video_id", "line_keys")
+
+
+@dataclass(frozen=True)
+class ExtractorSpec:
+    name: str
+    fn: Callable[..., Awaitable]
+    inputs: Tuple[str, ...] = ("blob",)
+    timeout_s: Optional[float] = None
+    retries: Optional[int] = None
+    model: Optional[str] = None
+
+    @property
+    def deps(self) -> Tuple[str, ...]:
+        return tuple(i for i in self.inputs if i not in RUN_INPUTS)
+
+    def effective_timeout(self) -> Optional[float]:
+        return self.timeout_s if self.timeout_s is not None else settings.EXTRACTOR_TIMEOUT_S
+
+    def effective_retries(self) -> int:
+        return self.retries if self.retries is not None else settings.EXTRACTOR_RETRIES
+
+    def effective_model(self) -> Optional[str]:
+        return self.model or settings.EXTRACTOR_MODELS.get(self.name)
+
+
+REGISTRY: Dict[str, ExtractorSpec] = {}
+
+
+def register(spec: ExtractorSpec) -> ExtractorSpec:
+    """
+    Add (or replace) an extractor.  Dependencies are checked when a run
+    builds its graph, so specs may be registered in any order.
+    """
+    if spec.name in RUN_INPUTS:
+        raise ValueError(f"Extractor name {spec.name!r} clashes with a run input")
+    REGISTRY[spec.name] = spec
+    return spec
+
+
+register(ExtractorSpec("sentiments", extract_sentiments_tiered, ("blob", "comments_text")))
+register(ExtractorSpec("headline", extract_headline, ("blob", "sentiments")))
+register(ExtractorSpec("discussions", extract_discussions_auto, ("blob", "comments_text")))
+# people keeps the raw comments for de-hallucination
+register(ExtractorSpec("people", extract_people, ("blob", "comments_text", "line_keys")))
+register(ExtractorSpec("other_insights", extract_other_insights))
+register(ExtractorSpec("video_requests", extract_video_requests))
@@ -1,8 +1,37 @@
 # libs/agents/extractors/sentiment.py
 import json
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Tuple
+
+from config.config import settings
 from libs.agents.prompts.sentiment_prompt import SENTIMENT_PROMPT
-from libs.agents.extractors.utils import sanitize_json_output
-from config.config import openai_client
+from libs.agents.extractors.utils import parse_comment_lines, sanitize_json_output
+from libs.agents.llm import chat
+from libs.analysis.lexicon import breakdown
+
+logger = logging.getLogger(__name__)
+
+_deep: ContextVar[bool] = ContextVar("deep_analysis", default=False)
+
+# comments addressed to the creator
+CREATOR_CUES = re.compile(r"\b(?:you|your|you're|youre|ur|u)\b", re.IGNORECASE)
+# below this many creator-addressed comments the overall split is reused
+_MIN_CREATOR_COMMENTS = 10
+
+
+@contextmanager
+def deep_analysis(active: bool = True):
+    """
+    Always ask the LLM for sentiments inside the block, whatever SENTIMENT_TIER says.
+    """
+    token = _deep.set(active)
+    try:
+        yield
+    finally:
+        _deep.reset(token)
 
 
 async def extract_sentiments(text: str) -> dict:
@@ -14,8 +43,54 @@ async def extract_sentiments(text: str) -> dict:
       "topic":   {"positive": 40, "neutral": 45, "negative": 15}
     }
     """
-    resp = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": SENTIMENT_PROMPT + "\n\n" + text}],
+    return await chat(
+        SENTIMENT_PROMPT + "\n\n" + text, label="sentiments", parse=sanitize_json_output
     )
-    return sanitize_json_output(resp.choices[0].message.content.strip())
+
+
+def local_sentiments(comments_text: str) -> Tuple[dict, float]:
+    """
+    Lexicon estimate in the extract_sentiments shape, plus its confidence.
+
+    The lexicon can't tell what a comment is about, so "video" and "topic"
+    share the overall split; "creator" uses the comments addressed to the
+    creator when there are enough of them.
+    """
+    texts, weights = parse_comment_lines(comments_text)
+    overall = breakdown(texts, weights)
+    split = lambda b: {k: b[k] for k in ("positive", "neutral", "negative")}
+
+    creator = overall
+    idx = [i for i, t in enumerate(texts) if CREATOR_CUES.search(t)]
+    if len(idx) >= _MIN_CREATOR_COMMENTS:
+        creator = breakdown([texts[i] for i in idx], [weights[i] for i in idx])
+
+    sentiments = {
+        "video": split(overall),
+        "creator": split(creator),
+        "topic": split(overall),
+    }
+    return sentiments, min(overall["confidence"], creator["confidence"])
+
+
+async def extract_sentiments_tiered(text: str, comments_text: str) -> dict:
+    """
+    SENTIMENT_TIER policy:
+      "llm"   always extract_sentiments
+      "local" always the lexicon estimate
+      "auto"  lexicon when its confidence ≥ SENTIMENT_MIN_CONFIDENCE,
+              otherwise escalate to the LLM
+    deep_analysis() forces the LLM.
+    """
+    tier = settings.SENTIMENT_TIER
+    if tier not in ("llm", "local", "auto"):
+        raise ValueError(f"Unknown sentiment tier {tier!r}")
+    if tier == "llm" or _deep.get():
+        return await extract_sentiments(text)
+
+    local, confidence = local_sentiments(comments_text)
+    if tier == "local" or confidence >= settings.SENTIMENT_MIN_CONFIDENCE:
+        logger.info("sentiments: lexicon tier (confidence %.2f)", confidence)
+        return local
+    logger.info("sentiments: escalating to LLM (confidence %.2f)", confidence)
+    return await extract_sentiments(text)
@@ -1,6 +1,10 @@
 # libs/agents/extractors/utils.py
 import json
 import re
+from typing import List, Tuple
+
+# "[COMMENT] text (x3)" / "[REPLY] text" as rendered by chunking.thread_lines
+_LINE = re.compile(r"^\[(?:COMMENT|REPLY)\] (.*?)(?: \(x(\d+)\))?$")
 
 
 def sanitize_json_output(raw: str):
@@ -16,3 +20,16 @@ def sanitize_json_output(raw: str):
         return json.loads(blob)
     except json.JSONDecodeError as e:
         raise ValueError(f"Failed to parse JSON: {e}")
+
+
+def parse_comment_lines(comments_text: str) -> Tuple[List[str], List[int]]:
+    """
+    Comment texts and their multiplicities from the rendered comment lines.
+    """
+    texts, weights = [], []
+    for line in comments_text.splitlines():
+        m = _LINE.match(line)
+        if m:
+            texts.append(m.group(1))
+            weights.append(int(m.group(2) or 1))
+    return texts, weights
@@ -0,0 +1,257 @@
+# libs/agents/governor.py
+"""
+Cluster-wide admission control for LLM calls, in Redis, per route.
+
+Every attempt chat() sends takes a slot with acquire() and gives it back
+with release().  State lives under llm:gov:<route>:
+
+  limit        AIMD concurrency limit, between LLM_GOV_MIN_CONCURRENCY and
+               LLM_GOV_MAX_CONCURRENCY: +1/limit per successful call (≈ +1
+               per round trip), ×0.5 on a 429 and ×0.9 on a call slower
+               than LLM_GOV_LATENCY_TARGET_S – at most one cut per
+               _CUT_COOLDOWN_S, so one burst of 429s halves it once
+  rpm / tpm    request and token buckets refilling at the LLM_RATE_LIMITS
+               rates of the route (or its model); a call takes one request
+               and its estimated tokens, the estimate is corrected with the
+               real usage on release
+  pause_until  set from Retry-After on a 429; nobody starts a call on the
+               route before it
+  :inflight    zset of granted slots scored by expiry, so slots of a
+               crashed worker free themselves after LLM_TIMEOUT_S × 2
+
+Redis time is used throughout, so workers agree on the clock.  When Redis
+is unreachable calls go ahead ungoverned (logged), they never fail here.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from config.config import settings
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+_CUT_COOLDOWN_S = 2.0
+# wait between tries while every slot is taken: doubles up to the max
+_SLOT_POLL_S = 0.1
+_SLOT_POLL_MAX_S = 2.0
+
+# → "0" granted, "-1" no free slot, otherwise seconds to wait
+_ACQUIRE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('zremrangebyscore', KEYS[2], '-inf', now)
+local s = redis.call('hmget', KEYS[1], 'limit', 'pause_until', 'rpm', 'rpm_ts', 'tpm', 'tpm_ts')
+local pause = tonumber(s[2]) or 0
+if pause > now then return tostring(pause - now) end
+local limit = tonumber(s[1]) or tonumber(ARGV[3])
+if redis.call('zcard', KEYS[2]) >= math.floor(limit) then return '-1' end
+local est, rpm, tpm = tonumber(ARGV[2]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local r_tok, t_tok
+if rpm > 0 then
+    r_tok = math.min(rpm, (tonumber(s[3]) or rpm) + (now - (tonumber(s[4]) or now)) * rpm / 60)
+    if r_tok < 1 then return tostring((1 - r_tok) * 60 / rpm) end
+end
+if tpm > 0 then
+    t_tok = math.min(tpm, (tonumber(s[5]) or tpm) + (now - (tonumber(s[6]) or now)) * tpm / 60)
+    local need = math.min(est, tpm)
+    if t_tok < need then return tostring((need - t_tok) * 60 / tpm) end
+end
+if rpm > 0 then redis.call('hset', KEYS[1], 'rpm', r_tok - 1, 'rpm_ts', now) end
+if tpm > 0 then redis.call('hset', KEYS[1], 'tpm', t_tok - est, 'tpm_ts', now) end
+redis.call('zadd', KEYS[2], now + tonumber(ARGV[6]), ARGV[1])
+redis.call('expire', KEYS[1], 86400)
+redis.call('expire', KEYS[2], math.ceil(tonumber(ARGV[6]) * 2))
+return '0'
+"""
+
+# → the new limit
+_RELEASE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('zrem', KEYS[2], ARGV[1])
+local s = redis.call('hmget', KEYS[1], 'limit', 'last_cut', 'tpm', 'pause_until')
+local maxl, minl = tonumber(ARGV[5]), tonumber(ARGV[6])
+local limit = tonumber(s[1]) or maxl
+local outcome, latency, target = ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[7])
+local slow = outcome == 'ok' and target > 0 and latency > target
+if outcome == 'throttled' or slow then
+    if now - (tonumber(s[2]) or 0) > tonumber(ARGV[10]) then
+        local factor = 0.9
+        if outcome == 'throttled' then factor = 0.5 end
+        limit = math.max(minl, limit * factor)
+        redis.call('hset', KEYS[1], 'last_cut', now)
+    end
+elseif outcome == 'ok' then
+    limit = math.min(maxl, limit + 1 / limit)
+end
+redis.call('hset', KEYS[1], 'limit', limit)
+local retry_after = tonumber(ARGV[8])
+if retry_after > 0 then
+    redis.call('hset', KEYS[1], 'pause_until', math.max(tonumber(s[4]) or 0, now + retry_after))
+end
+local delta, tpm = tonumber(ARGV[4]), tonumber(ARGV[9])
+if tpm > 0 and delta ~= 0 and s[3] then
+    redis.call('hset', KEYS[1], 'tpm', math.min(tpm, tonumber(s[3]) - delta))
+end
+return tostring(limit)
+"""
+
+
+class RateLimited(Exception):
+    """The route stayed rate limited for longer than LLM_RATE_LIMIT_MAX_WAIT_S."""
+
+    def __init__(self, route: str, retry_after_s: float):
+        super().__init__(f"{route} rate limited, retry in {retry_after_s:.1f}s")
+        self.route = route
+        self.retry_after_s = retry_after_s
+
+
+def _key(route: str) -> str:
+    return f"llm:gov:{route}"
+
+
+def _inflight_key(route: str) -> str:
+    return f"llm:gov:{route}:inflight"
+
+
+def rate_limits(route: str) -> Tuple[int, int]:
+    """(rpm, tpm) of a route – its own LLM_RATE_LIMITS entry, else its model's; 0 = unlimited."""
+    limits = settings.LLM_RATE_LIMITS.get(route) or settings.LLM_RATE_LIMITS.get(
+        route.partition("@")[0], {}
+    )
+    return int(limits.get("rpm", 0)), int(limits.get("tpm", 0))
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_S = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def retry_after_s(err: Exception) -> Optional[float]:
+    """
+    Seconds to wait according to a 429's headers: retry-after-ms,
+    retry-after (seconds or an HTTP date), else the longer of OpenAI's
+    x-ratelimit-reset-requests / -tokens ("1s", "6m0s", "20ms").
+    """
+    response = getattr(err, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                when = email.utils.parsedate_to_datetime(value)
+                return max(when.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    resets = [
+        sum(float(n) * _UNIT_S[u] for n, u in _DURATION.findall(headers.get(h) or ""))
+        for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    return max(resets) or None
+
+
+async def acquire(
+    route: str, est_tokens: int, deadline: float, slot_deadline: Optional[float] = None
+) -> Optional[str]:
+    """
+    Wait for a slot on `route` for a call of about `est_tokens` tokens.
+    Returns the slot id (None when ungoverned).  Raises RateLimited when a
+    pause or bucket wait would pass `deadline`, and asyncio.TimeoutError
+    when all slots stay busy past `slot_deadline` (both time.monotonic();
+    busy slots are ordinary load, not a rate limit).
+    """
+    if not settings.LLM_GOVERNOR_ENABLED:
+        return None
+    rpm, tpm = rate_limits(route)
+    lease = uuid.uuid4().hex
+    poll = _SLOT_POLL_S
+    while True:
+        try:
+            wait = float(
+                await get_redis().eval(
+                    _ACQUIRE,
+                    2,
+                    _key(route),
+                    _inflight_key(route),
+                    lease,
+                    est_tokens,
+                    settings.LLM_GOV_MAX_CONCURRENCY,
+                    rpm,
+                    tpm,
+                    settings.LLM_TIMEOUT_S * 2,
+                )
+            )
+        except Exception as e:
+            logger.warning("llm governor unavailable, calling %s ungoverned: %s", route, e)
+            return None
+        if wait == 0:
+            return lease
+        if wait < 0:
+            if slot_deadline is not None and time.monotonic() + poll > slot_deadline:
+                raise asyncio.TimeoutError(f"no free LLM slot on {route}")
+            await asyncio.sleep(poll * (0.5 + random.random()))
+            poll = min(poll * 2, _SLOT_POLL_MAX_S)
+            continue
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(route, wait)
+        await asyncio.sleep(wait * (1 + random.random() / 4))
+
+
+async def release(
+    route: str,
+    lease: Optional[str],
+    outcome: str,
+    latency_s: float = 0.0,
+    token_delta: int = 0,
+    retry_after: float = 0.0,
+) -> None:
+    """
+    Give the slot back.  `outcome` is "ok", "throttled" (429) or "error";
+    `token_delta` = real − estimated tokens, `retry_after` pauses the route.
+    """
+    if lease is None:
+        return
+    _, tpm = rate_limits(route)
+    try:
+        await get_redis().eval(
+            _RELEASE,
+            2,
+            _key(route),
+            _inflight_key(route),
+            lease,
+            outcome,
+            latency_s,
+            token_delta,
+            settings.LLM_GOV_MAX_CONCURRENCY,
+            settings.LLM_GOV_MIN_CONCURRENCY,
+            settings.LLM_GOV_LATENCY_TARGET_S or 0,
+            retry_after,
+            tpm,
+            _CUT_COOLDOWN_S,
+        )
+    except Exception as e:
+        logger.warning("llm governor release failed for %s: %s", route, e)
+
+
+async def governor_state(route: str) -> Dict:
+    """Current limit, slots in use, bucket levels and pause of a route."""
+    r = get_redis()
+    state = await r.hgetall(_key(route))
+    pause = float(state.get("pause_until", 0)) - time.time()
+    return {
+        "limit": round(float(state.get("limit", settings.LLM_GOV_MAX_CONCURRENCY)), 2),
+        "inflight": await r.zcard(_inflight_key(route)),
+        "rpm_tokens": round(float(state["rpm"]), 1) if "rpm" in state else None,
+        "tpm_tokens": round(float(state["tpm"])) if "tpm" in state else None,
+        "paused_s": round(pause, 2) if pause > 0 else 0.0,
+    }
@@ -0,0 +1,368 @@
+# libs/agents/llm.py
+"""
+Shared async LLM access for the extractor agents.
+
+Every extractor goes through `chat()`, which uses one AsyncOpenAI client
+(pooled httpx connections) and one semaphore per event loop.  The
+semaphore caps in-flight calls per worker process at LLM_MAX_CONCURRENCY,
+and each request carries an LLM_TIMEOUT_S timeout.  Answers are served
+from / stored in the content-addressed cache (cache.py) when enabled –
+with chat(parse=...) only answers the caller could parse.
+
+Every attempt also takes a slot from the cluster-wide governor
+(governor.py: AIMD concurrency and request / token buckets per route).
+Connection and 5xx errors are retried here (not inside the SDK) up to
+LLM_MAX_RETRIES times with jittered exponential backoff, outside the
+semaphore, so the retry count can be reported per call.  429s are retried
+after their Retry-After (plus jitter) until LLM_RATE_LIMIT_MAX_WAIT_S is
+used up, then RateLimited is raised.
+
+The model may be a route ("model@endpoint", see routing.py): a route that
+still fails after its retries falls over to the next one of its
+LLM_FALLBACKS chain, and LLM_HEDGE_AFTER_S starts that next route early
+when the current one is slow.  A losing attempt is cancelled; if its
+request had already gone out, its prompt tokens (estimated) are still
+recorded in the usage log, route stats and the governor's token bucket.
+
+State is keyed by the running loop because asyncio connections and
+semaphores cannot be shared across loops (tests / scripts may use several).
+"""
+
+import asyncio
+import random
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from config.config import settings
+from libs.agents.cache import cache_get, cache_invalidate, cache_key, cache_put
+from libs.agents.governor import RateLimited, acquire, release, retry_after_s
+from libs.agents.pricing import cost_usd
+from libs.agents.routing import Route, endpoint_config, record_route, routes_for
+from libs.agents.tokens import count_tokens
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+RETRYABLE = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+# errors after which the next route of the fallback chain is tried
+FAILOVER = RETRYABLE + (
+    RateLimited,
+    openai.NotFoundError,
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+)
+_BACKOFF_BASE_S = 0.5
+_BACKOFF_MAX_S = 20.0
+# completion tokens assumed by the governor when a call sets no max_tokens
+_EXPECTED_COMPLETION = 500
+
+_state: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+# per-call usage records for whoever is listening (see capture_usage)
+_usage_log: ContextVar[Optional[List[Dict]]] = ContextVar("llm_usage_log", default=None)
+# model for chat() calls that don't name one (see use_model)
+_model: ContextVar[Optional[str]] = ContextVar("llm_model", default=None)
+
+
+def _loop_state() -> Tuple[Dict[Optional[str], AsyncOpenAI], asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    st = _state.get(loop)
+    if st is None:
+        st = ({}, asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY))
+        _state[loop] = st
+    return st
+
+
+def get_async_client(endpoint: Optional[str] = None) -> AsyncOpenAI:
+    """Client of `endpoint` (None = the default one) for the running loop."""
+    clients, _ = _loop_state()
+    client = clients.get(endpoint)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+            ),
+            timeout=settings.LLM_TIMEOUT_S,
+        )
+        client = AsyncOpenAI(
+            **endpoint_config(endpoint),
+            timeout=settings.LLM_TIMEOUT_S,
+            max_retries=0,  # chat() retries itself
+            http_client=http_client,
+        )
+        clients[endpoint] = client
+    return client
+
+
+@contextmanager
+def capture_usage():
+    """
+    Collect one record per chat() call made inside the block (including
+    calls from tasks it spawns):
+
+        with capture_usage() as calls:
+            await analyze(...)
+        calls  # [{"label", "model", "prompt_tokens", "completion_tokens",
+               #   "latency_s", "retries", "cost_usd", "cached"}]
+    """
+    log: List[Dict] = []
+    token = _usage_log.set(log)
+    try:
+        yield log
+    finally:
+        _usage_log.reset(token)
+
+
+@contextmanager
+def use_model(model: Optional[str]):
+    """
+    Default model for chat() calls inside the block (None keeps the outer one).
+    """
+    token = _model.set(model or _model.get())
+    try:
+        yield
+    finally:
+        _model.reset(token)
+
+
+async def _complete(route: Route, prompt: str, kwargs: Dict, sent: Optional[Dict] = None):
+    """
+    One route with its own retries → (response, latency_s, retries).
+    `sent["at"]` is set while a request is in flight.
+    """
+    sent = {} if sent is None else sent
+    client = get_async_client(route.endpoint)
+    _, sem = _loop_state()
+    name = str(route)
+    est = count_tokens(prompt, route.model) + kwargs.get("max_tokens", _EXPECTED_COMPLETION)
+    deadline = time.monotonic() + settings.LLM_RATE_LIMIT_MAX_WAIT_S
+    # waiting for a busy slot is bounded like the extractor itself
+    slot_deadline = (
+        time.monotonic() + settings.EXTRACTOR_TIMEOUT_S if settings.EXTRACTOR_TIMEOUT_S else None
+    )
+    retries = errors = 0
+    while True:
+        lease = await acquire(name, est, deadline, slot_deadline)
+        try:
+            async with sem:
+                started = sent["at"] = time.perf_counter()
+                resp = await client.chat.completions.create(
+                    model=route.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs,
+                )
+                latency = time.perf_counter() - started
+                sent.pop("at")
+        except asyncio.CancelledError:
+            # a cancelled request that went out still used its prompt tokens
+            await release(name, lease, "error", token_delta=0 if "at" in sent else -est)
+            raise
+        except openai.RateLimitError as e:
+            sent.pop("at", None)
+            # 429s wait as long as the provider asks (up to the deadline)
+            # and don't use up LLM_MAX_RETRIES
+            wait = retry_after_s(e)
+            await release(name, lease, "throttled", token_delta=-est, retry_after=wait or 0.0)
+            if wait is None:
+                wait = min(_BACKOFF_BASE_S * 2**retries, _BACKOFF_MAX_S)
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(name, wait) from e
+            retries += 1
+            await asyncio.sleep(wait * (1 + random.random() / 4))
+            continue
+        except RETRYABLE:
+            sent.pop("at", None)
+            await release(name, lease, "error", token_delta=-est)
+            if errors >= settings.LLM_MAX_RETRIES:
+                raise
+            delay = min(_BACKOFF_BASE_S * 2**errors, _BACKOFF_MAX_S)
+            errors += 1
+            retries += 1
+            await asyncio.sleep(delay * (0.5 + random.random() / 2))
+            continue
+        except BaseException:
+            await release(name, lease, "error", token_delta=-est)
+            raise
+        used = resp.usage.total_tokens if resp.usage else est
+        await release(name, lease, "ok", latency, token_delta=used - est)
+        return resp, latency, retries
+
+
+async def _attempt(
+    route: Route, prompt: str, kwargs: Dict, label: str, fallback: bool, hedge: bool
+):
+    sent: Dict = {}
+    try:
+        resp, latency, retries = await _complete(route, prompt, kwargs, sent)
+    except asyncio.CancelledError:
+        if "at" in sent:
+            # lost the race after its request went out: the prompt is billed
+            latency = time.perf_counter() - sent["at"]
+            prompt_tokens = count_tokens(prompt, route.model)
+            cost = cost_usd(route.model, prompt_tokens, 0)
+            log = _usage_log.get()
+            if log is not None:
+                log.append(
+                    {
+                        "label": label,
+                        "model": route.model,
+                        "route": str(route),
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": 0,
+                        "latency_s": round(latency, 3),
+                        "retries": 0,
+                        "cost_usd": cost,
+                        "cached": False,
+                        "cancelled": True,
+                    }
+                )
+            await record_route(
+                route, False, cost_usd=cost, fallback=fallback, hedge=hedge, cancelled=True
+            )
+        raise
+    except Exception:
+        await record_route(route, ok=False, fallback=fallback, hedge=hedge)
+        raise
+    usage = resp.usage
+    cost = cost_usd(route.model, usage.prompt_tokens, usage.completion_tokens) if usage else 0.0
+    await record_route(route, True, latency, cost, fallback=fallback, hedge=hedge)
+    return route, resp, latency, retries
+
+
+async def _routed(routes: List[Route], prompt: str, kwargs: Dict, label: str = ""):
+    """
+    Try the routes in order; with LLM_HEDGE_AFTER_S the next one is also
+    started when nothing has answered in time.  The first answer wins and
+    the other attempts are cancelled (and their spend recorded before this
+    returns).  A failure is only raised once no other attempt is pending:
+    FAILOVER errors move on to the next route, any other error is raised
+    when nothing else can still answer.
+    """
+    hedge_after = settings.LLM_HEDGE_AFTER_S
+    pending: Set[asyncio.Task] = set()
+    started = 0
+    error: Optional[BaseException] = None
+
+    def start(hedge: bool) -> None:
+        nonlocal started
+        route = routes[started]
+        pending.add(
+            asyncio.ensure_future(
+                _attempt(
+                    route,
+                    prompt,
+                    kwargs,
+                    label,
+                    fallback=started > 0 and not hedge,
+                    hedge=hedge,
+                )
+            )
+        )
+        started += 1
+
+    start(hedge=False)
+    try:
+        while pending:
+            # no more hedges once an attempt failed for a reason no route fixes
+            more = started < len(routes) and (error is None or isinstance(error, FAILOVER))
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_after if more and hedge_after is not None else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                start(hedge=True)
+                continue
+            for task in done:
+                pending.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                if error is None or isinstance(error, FAILOVER):
+                    error = task.exception()  # keep the first non-failover error
+            if not pending and started < len(routes) and isinstance(error, FAILOVER):
+                start(hedge=False)
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            # let the losers record what they spent
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def chat(
+    prompt: str,
+    model: Optional[str] = None,
+    label: str = "",
+    parse: Optional[Callable[[str], Any]] = None,
+    **kwargs,
+) -> Any:
+    """
+    One-shot user-prompt chat completion; returns the stripped reply text.
+    `model` (a model or route) defaults to the use_model() one, then
+    DEFAULT_MODEL.  `label` names the caller (extractor) in usage records.
+    `parse` turns the reply into what chat() returns; a reply it rejects
+    (ValueError) is neither cached nor served from the cache.
+    Extra kwargs (e.g. response_format) go straight to the API.
+    """
+    model = model or _model.get() or DEFAULT_MODEL
+    parse = parse or (lambda raw: raw)
+    log = _usage_log.get()
+    key = cache_key(model, prompt, kwargs)
+    started = time.perf_counter()
+
+    cached = await cache_get(key)
+    if cached is not None:
+        try:
+            value = parse(cached["content"])
+        except ValueError:
+            # stored before its caller could reject it – fetch a fresh one
+            await cache_invalidate(key)
+            cached = None
+    if cached is not None:
+        if log is not None:
+            log.append(
+                {
+                    "label": label,
+                    "model": model,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "latency_s": round(time.perf_counter() - started, 3),
+                    "retries": 0,
+                    "cost_usd": 0.0,
+                    "cached": True,
+                }
+            )
+        return value
+
+    route, resp, latency, retries = await _routed(routes_for(model), prompt, kwargs, label)
+
+    content = resp.choices[0].message.content.strip()
+    if log is not None:
+        usage = resp.usage
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        completion_tokens = usage.completion_tokens if usage else 0
+        log.append(
+            {
+                "label": label,
+                "model": resp.model or route.model,
+                "route": str(route),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_s": round(latency, 3),
+                "retries": retries,
+                "cost_usd": cost_usd(route.model, prompt_tokens, completion_tokens),
+                "cached": False,
+            }
+        )
+    # raises on a bad reply before it is cached
+    value = parse(content)
+    await cache_put(key, {"content": content})
+    return value
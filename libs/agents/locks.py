@@ -0,0 +1,141 @@
+# libs/agents/locks.py
+"""
+Per-video coordination for analysis runs, in Redis.
+
+in-flight key   analysis:inflight:<video_id> → run_id, SET NX with a TTL
+                (ANALYSIS_DEDUP_TTL_S).  A second request for a video that
+                is already queued or running gets the existing run_id back
+                instead of enqueuing another copy.  Cleared when the run
+                finishes (only by the run that owns it).
+lease           analysis:lock:<video_id> → random token, SET NX PX
+                ANALYSIS_LEASE_S and renewed in the background while the
+                worker holds it, so a crashed worker's lock simply expires.
+                The renewal also extends the run's in-flight key, so a run
+                longer than ANALYSIS_DEDUP_TTL_S keeps absorbing duplicates.
+                A worker that cannot take the lease raises LeaseBusy.
+
+Both are released with compare-and-delete scripts, so nobody can drop a
+key another run has taken over in the meantime.
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from config.config import settings
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class LeaseBusy(Exception):
+    pass
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def _inflight_key(video_id: str) -> str:
+    return f"analysis:inflight:{video_id}"
+
+
+def _lock_key(video_id: str) -> str:
+    return f"analysis:lock:{video_id}"
+
+
+async def claim_inflight(video_id: str, run_id: str) -> Optional[str]:
+    """
+    Register `run_id` as the in-flight run for the video.  Returns None when
+    claimed, otherwise the run_id that already holds the slot.
+    """
+    r = get_redis()
+    key = _inflight_key(video_id)
+    for _ in range(2):
+        if await r.set(key, run_id, nx=True, ex=settings.ANALYSIS_DEDUP_TTL_S):
+            return None
+        existing = await r.get(key)
+        if existing:
+            return existing
+        # expired between SET and GET – try once more
+    return None
+
+
+async def inflight_run(video_id: str) -> Optional[str]:
+    """The run_id holding the video's in-flight slot, if any."""
+    return await get_redis().get(_inflight_key(video_id))
+
+
+async def release_inflight(video_id: str, run_id: str) -> None:
+    await get_redis().eval(_RELEASE, 1, _inflight_key(video_id), run_id)
+
+
+class Lease:
+    def __init__(self, video_id: str, run_id: Optional[str] = None):
+        self.key = _lock_key(video_id)
+        self.token = uuid.uuid4().hex
+        self.inflight_key = _inflight_key(video_id)
+        self.run_id = run_id  # in-flight slot renewed along with the lease
+        self.lost = False
+        self._renewer: Optional[asyncio.Task] = None
+
+    async def _renew(self) -> None:
+        ttl_ms = int(settings.ANALYSIS_LEASE_S * 1000)
+        inflight_ms = int(settings.ANALYSIS_DEDUP_TTL_S * 1000)
+        while True:
+            await asyncio.sleep(settings.ANALYSIS_LEASE_S / 3)
+            r = get_redis()
+            try:
+                ok = await r.eval(_RENEW, 1, self.key, self.token, ttl_ms)
+                if ok and self.run_id:
+                    await r.eval(_RENEW, 1, self.inflight_key, self.run_id, inflight_ms)
+            except Exception as e:
+                logger.warning("lease renew failed for %s: %s", self.key, e)
+                continue
+            if not ok:
+                self.lost = True
+                logger.warning("lease %s lost", self.key)
+                return
+
+    def check(self) -> None:
+        """Raise before a write if another worker may own the video now."""
+        if self.lost:
+            raise LeaseLost(self.key)
+
+
+@asynccontextmanager
+async def video_lease(video_id: str, run_id: Optional[str] = None):
+    """
+    Hold the per-video analysis lease for the duration of the block (and
+    keep `run_id`'s in-flight key alive with it).
+    """
+    lease = Lease(video_id, run_id)
+    r = get_redis()
+    if not await r.set(
+        lease.key, lease.token, nx=True, px=int(settings.ANALYSIS_LEASE_S * 1000)
+    ):
+        raise LeaseBusy(video_id)
+    lease._renewer = asyncio.create_task(lease._renew())
+    try:
+        yield lease
+    finally:
+        lease._renewer.cancel()
+        try:
+            await r.eval(_RELEASE, 1, lease.key, lease.token)
+        except Exception as e:
+            logger.warning("lease release failed for %s: %s", lease.key, e)
@@ -0,0 +1,260 @@
+# libs/agents/orchestrator.py
+"""
+Channel-wide analysis jobs.
+
+start_channel_job() picks the channel's videos whose analysis is missing or
+stale, gives each one a run (or joins the run already in flight, see
+locks.py) and queues them per channel instead of handing everything to
+Celery at once:
+
+  analysis:channel:<channel_id>:queue   list of pending task payloads
+  analysis:channel:<channel_id>:active  set of run_ids handed to Celery
+  analysis:channel:<channel_id>:paused  set while the channel waits out a
+                                        budget / rate-limit deferral
+
+At most CHANNEL_ANALYSIS_CONCURRENCY runs of a channel are in the Celery
+queue or running; every finished run (RunTracker.finish → run_finished)
+frees its slot and dispatches the channel's next video.  A big channel
+therefore never holds more than its cap of the shared workers and other
+tenants' videos interleave with it.  The active set expires after
+ANALYSIS_DEDUP_TTL_S without dispatches, so a crashed worker can't wedge
+a channel for good.
+
+A run deferred over budget or by rate limits goes back to the head of its
+channel's queue (not to Celery on its own), and the channel dispatches
+nothing until the run's retry_at; a resume task then picks it up again.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from config.config import settings
+from config.redis import get_redis
+from libs.agents.locks import claim_inflight
+from libs.agents.progress import SECTIONS, TERMINAL
+from libs.database.youtube.analysis import get_coverage_summaries
+from libs.database.youtube.analysis_jobs import create_job
+from libs.database.youtube.analysis_runs import count_run_statuses, create_run
+from libs.database.youtube.comments import get_thread_counts
+from libs.database.youtube.videos import get_videos_by_channel_id
+
+logger = logging.getLogger(__name__)
+
+# pop queued payloads while the channel is below its cap and not paused;
+# returns them
+_DISPATCH = """
+local out = {}
+if redis.call('exists', KEYS[3]) == 1 then return out end
+while redis.call('scard', KEYS[2]) < tonumber(ARGV[1]) do
+    local item = redis.call('lpop', KEYS[1])
+    if not item then break end
+    redis.call('sadd', KEYS[2], cjson.decode(item)['run_id'])
+    table.insert(out, item)
+end
+if #out > 0 then redis.call('expire', KEYS[2], ARGV[2]) end
+return out
+"""
+
+
+def _queue_key(channel_id: str) -> str:
+    return f"analysis:channel:{channel_id}:queue"
+
+
+def _active_key(channel_id: str) -> str:
+    return f"analysis:channel:{channel_id}:active"
+
+
+def _paused_key(channel_id: str) -> str:
+    return f"analysis:channel:{channel_id}:paused"
+
+
+def _is_stale(coverage: Optional[Dict], threads: int) -> bool:
+    if not coverage:
+        return True
+    if coverage["covered"] != threads:
+        return True
+    full_at = coverage.get("full_at")
+    if full_at is None:
+        return True
+    if full_at.tzinfo is None:
+        full_at = full_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - full_at > timedelta(
+        hours=settings.ANALYSIS_FULL_MAX_AGE_H
+    )
+
+
+async def select_videos(channel_id: str, force: bool = False) -> Tuple[List[str], int]:
+    """
+    (video_ids to analyse, newest first, capped at CHANNEL_ANALYSIS_MAX_VIDEOS;
+    number of videos with an up-to-date analysis).  Only videos with stored
+    comments qualify; `force` selects all of them.
+    """
+    videos = await get_videos_by_channel_id(channel_id)
+    videos.sort(key=lambda v: v.get("publish_time") or "", reverse=True)
+    ids = [str(v["_id"]) for v in videos]
+    threads = await get_thread_counts(ids)
+    coverage = {} if force else await get_coverage_summaries(ids)
+
+    selected, fresh = [], 0
+    for vid in ids:
+        if not threads.get(vid):
+            continue
+        if force or _is_stale(coverage.get(vid), threads[vid]):
+            selected.append(vid)
+        else:
+            fresh += 1
+    return selected[: settings.CHANNEL_ANALYSIS_MAX_VIDEOS], fresh
+
+
+async def _dispatch(channel_id: str) -> int:
+    # imported here: tasks_agents loads the worker module, which imports
+    # the pipeline that reports back into this module
+    from libs.tasks_agents import enqueue_analyze_comments
+
+    items = await get_redis().eval(
+        _DISPATCH,
+        3,
+        _queue_key(channel_id),
+        _active_key(channel_id),
+        _paused_key(channel_id),
+        settings.CHANNEL_ANALYSIS_CONCURRENCY,
+        settings.ANALYSIS_DEDUP_TTL_S,
+    )
+    for item in items:
+        enqueue_analyze_comments(**json.loads(item))
+    return len(items)
+
+
+async def start_channel_job(
+    channel_id: str,
+    user_id: str,
+    use_cache: bool = True,
+    full: bool = False,
+    deep: bool = False,
+    force: bool = False,
+) -> Dict:
+    """
+    Queue the channel's stale videos; returns the job summary.
+    """
+    video_ids, fresh = await select_videos(channel_id, force)
+    job_id = str(ObjectId())
+    runs, payloads = [], []
+    for vid in video_ids:
+        run_id = str(ObjectId())
+        existing = await claim_inflight(vid, run_id)
+        if existing:
+            runs.append({"video_id": vid, "run_id": existing, "joined": True})
+            continue
+        payload = {
+            "video_id": vid,
+            "use_cache": use_cache,
+            "full": full or force,
+            "deep": deep,
+            "user_id": user_id,
+            "run_id": run_id,
+        }
+        # the payload is kept so a deferred run can be queued again
+        await create_run(
+            vid,
+            SECTIONS,
+            user_id,
+            run_id=run_id,
+            channel_job={"job_id": job_id, "channel_id": channel_id, "payload": payload},
+        )
+        runs.append({"video_id": vid, "run_id": run_id, "joined": False})
+        payloads.append(json.dumps(payload))
+
+    await create_job(job_id, channel_id, user_id, runs, skipped=fresh)
+    if payloads:
+        await get_redis().rpush(_queue_key(channel_id), *payloads)
+    dispatched = await _dispatch(channel_id)
+    logger.info(
+        "channel %s job %s: %d queued (%d dispatched), %d joined, %d up to date",
+        channel_id,
+        job_id,
+        len(payloads),
+        dispatched,
+        len(runs) - len(payloads),
+        fresh,
+    )
+    return {
+        "job_id": job_id,
+        "queued": len(payloads),
+        "joined": len(runs) - len(payloads),
+        "up_to_date": fresh,
+    }
+
+
+async def _defer(channel_id: str, run: Dict) -> None:
+    """
+    Put a deferred run back at the head of its channel's queue and pause
+    the channel until the run's retry_at.
+    """
+    # imported here, see _dispatch
+    from libs.tasks_agents import enqueue_resume_channel
+
+    r = get_redis()
+    retry_at = run["retry_at"]
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    pause_ms = max(int((retry_at - datetime.now(timezone.utc)).total_seconds() * 1000), 1)
+    await r.lpush(_queue_key(channel_id), json.dumps(run["channel_job"]["payload"]))
+    await r.srem(_active_key(channel_id), str(run["_id"]))
+    # only a later deferral extends the pause (and needs its own resume)
+    if pause_ms > await r.pttl(_paused_key(channel_id)):
+        await r.set(_paused_key(channel_id), retry_at.isoformat(), px=pause_ms)
+        enqueue_resume_channel(channel_id, retry_at)
+    logger.info("channel %s: run %s deferred until %s", channel_id, run["_id"], retry_at)
+
+
+async def run_finished(run: Dict) -> None:
+    """
+    Free the run's channel slot and dispatch the channel's next video.
+    Called with the run doc once a run reaches a terminal status.  A
+    deferred run keeps its place in the channel queue instead.
+    """
+    job = run.get("channel_job")
+    if not job:
+        return
+    channel_id = job["channel_id"]
+    if run["status"] == "deferred" and run.get("retry_at") and job.get("payload"):
+        await _defer(channel_id, run)
+        return
+    await get_redis().srem(_active_key(channel_id), str(run["_id"]))
+    await _dispatch(channel_id)
+
+
+async def resume_channel(channel_id: str) -> int:
+    """Dispatch a channel's queue once its pause is over."""
+    return await _dispatch(channel_id)
+
+
+async def job_progress(job: Dict) -> Dict:
+    """
+    Aggregate status of a channel job: run counts per status, how many of
+    the channel's videos still wait for a slot, and the overall state.
+    """
+    run_ids = [r["run_id"] for r in job["runs"]]
+    counts = await count_run_statuses(run_ids) if run_ids else {}
+    channel_id = str(job["channel_id"])
+    r = get_redis()
+    # deferred runs are back in the channel queue, not finished
+    finished = sum(counts.get(s, 0) for s in TERMINAL if s != "deferred")
+    return {
+        "job_id": str(job["_id"]),
+        "channel_id": channel_id,
+        "created_at": job["created_at"],
+        "total": len(run_ids),
+        "up_to_date": job.get("skipped", 0),
+        "statuses": counts,
+        "finished": finished,
+        "percent": round(100.0 * finished / len(run_ids), 1) if run_ids else 100.0,
+        "channel_waiting": await r.llen(_queue_key(channel_id)),
+        "channel_active": await r.scard(_active_key(channel_id)),
+        "channel_paused_until": await r.get(_paused_key(channel_id)),
+        "status": "done" if finished == len(run_ids) else "running",
+    }
@@ -0,0 +1,27 @@
+# libs/agents/pricing.py
+"""
+USD list prices per 1M tokens, (input, output).  Used for cost accounting
+and budgets only – update when OpenAI changes prices.  Batch API requests
+are billed at BATCH_DISCOUNT of the list price.
+"""
+
+from typing import Dict, Tuple
+
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+# unknown models are costed like the most expensive one we know
+_FALLBACK = max(PRICES.values())
+BATCH_DISCOUNT = 0.5
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int, batch: bool = False) -> float:
+    # dated snapshots ("gpt-4o-mini-2024-07-18") price like their family
+    family = max((m for m in PRICES if model.startswith(m)), key=len, default=None)
+    inp, out = PRICES[family] if family else _FALLBACK
+    cost = (prompt_tokens * inp + completion_tokens * out) / 1_000_000
+    return round(cost * (BATCH_DISCOUNT if batch else 1.0), 6)
@@ -0,0 +1,182 @@
+# libs/agents/progress.py
+"""
+Live progress of one analysis run.
+
+A RunTracker owns an analysis_runs status doc (queued → running → done /
+failed / deferred, plus pending / running / done / failed per section) and
+publishes every change on the Redis channel analysis:run:<run_id>, which
+the agents service relays as Server-Sent Events.  Finishing a run also
+frees the video's in-flight slot (locks.py) and its channel-job slot
+(orchestrator.py).
+
+Extractor calls wrapped in tracked() report their section as soon as it
+finishes.  When the tracker is `live` (a full single-pass run) the value is
+also staged on the run doc (sections.<name>.value), so the dashboard can
+render sentiments before the slowest extractor returns; the analysis doc
+itself is only written once every section is there, so a failed run never
+leaves a partial analysis behind.  Staging checks the run's video lease
+first, so a worker that lost the video stops writing progress for it.  Delta and map-reduce runs only produce
+final values after merging; their sections are reported by finish().
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Awaitable, Dict, Optional
+
+from config.redis import get_redis
+from libs.agents.locks import release_inflight
+from libs.database.youtube.analysis_runs import update_run
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = (
+    "sentiments",
+    "headline",
+    "discussions",
+    "people",
+    "other_insights",
+    "video_requests",
+)
+TERMINAL = ("done", "failed", "deferred")
+
+_tracker: ContextVar[Optional["RunTracker"]] = ContextVar("run_tracker", default=None)
+
+
+def channel_name(run_id: str) -> str:
+    return f"analysis:run:{run_id}"
+
+
+class RunTracker:
+    def __init__(self, run_id: str, video_id: str):
+        self.run_id = run_id
+        self.video_id = video_id
+        self.live = False  # stage sections on the run doc as they finish
+        self.lease = None  # locks.Lease checked before staging a section
+        self.finished: set = set()
+
+    async def _publish(self, event: Dict) -> None:
+        try:
+            await get_redis().publish(channel_name(self.run_id), json.dumps(event, default=str))
+        except Exception as e:  # progress is best effort
+            logger.warning("progress publish failed for run %s: %s", self.run_id, e)
+
+    async def start(self, plan: str) -> None:
+        fields = {f"sections.{s}.status": "running" for s in SECTIONS}
+        await update_run(
+            self.run_id,
+            status="running",
+            plan=plan,
+            started_at=datetime.now(timezone.utc),
+            **fields,
+        )
+        await self._publish({"run_status": "running", "plan": plan})
+
+    async def section_done(self, name: str, value, final: bool = False) -> None:
+        if name in self.finished:
+            return
+        if not (self.live or final):
+            return
+        if self.lease and not final:
+            self.lease.check()  # raises LeaseLost
+        self.finished.add(name)
+        fields = {
+            f"sections.{name}.status": "done",
+            f"sections.{name}.done_at": datetime.now(timezone.utc),
+        }
+        if not final:
+            fields[f"sections.{name}.value"] = value
+        await update_run(self.run_id, **fields)
+        await self._publish({"section": name, "status": "done", "value": value})
+
+    async def section_failed(self, name: str, error: str) -> None:
+        await update_run(
+            self.run_id,
+            **{f"sections.{name}.status": "failed", f"sections.{name}.error": error},
+        )
+        await self._publish({"section": name, "status": "failed", "error": error})
+
+    async def record_timing(self, timing: Dict) -> None:
+        await update_run(self.run_id, timing=timing)
+        await self._publish({"event": "timing", "timing": timing})
+
+    async def finish(
+        self,
+        status: str,
+        fields: Optional[Dict] = None,
+        error: str = None,
+        retry_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Report any sections not streamed yet, then close the run.
+        `retry_at` – when a deferred run should be tried again.
+        """
+        for name, value in (fields or {}).items():
+            await self.section_done(name, value, final=True)
+        # imported here: the orchestrator builds runs from this module
+        from libs.agents.orchestrator import run_finished
+
+        extra = {"error": error} if error else {}
+        if retry_at:
+            extra["retry_at"] = retry_at
+        run = await update_run(
+            self.run_id,
+            status=status,
+            finished_at=datetime.now(timezone.utc),
+            **extra,
+        )
+        await self._publish({"run_status": status, **extra})
+        try:
+            # let the next request for this video start a new run, and the
+            # next video of a channel job take this run's slot
+            await release_inflight(self.video_id, self.run_id)
+            if run:
+                await run_finished(run)
+        except Exception as e:
+            logger.warning("post-run release failed for run %s: %s", self.run_id, e)
+
+
+@contextmanager
+def track(tracker: Optional[RunTracker]):
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+async def tracked(name: str, coro: Awaitable):
+    """
+    Await one extractor and report its section to the current tracker.
+    """
+    tracker = _tracker.get()
+    try:
+        value = await coro
+    except Exception as e:
+        if tracker and tracker.live:
+            await tracker.section_failed(name, str(e)[:500])
+        raise
+    if tracker:
+        await tracker.section_done(name, value)
+    return value
+
+
+async def report_sections(sections: Dict) -> None:
+    """
+    Report several sections at once (the fused extractor returns them all).
+    """
+    tracker = _tracker.get()
+    if tracker:
+        for name, value in sections.items():
+            await tracker.section_done(name, value)
+
+
+async def report_timing(timing: Dict) -> None:
+    """
+    Store the extractor DAG timing (critical path etc.) on the current run.
+    """
+    tracker = _tracker.get()
+    if tracker:
+        await tracker.record_timing(timing)
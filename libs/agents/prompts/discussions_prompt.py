@@ -29,3 +29,18 @@ Example:
 
 No prose, no extra fields, valid JSON only.
 """
+
+DISCUSSION_LABEL_PROMPT = """
+Below are clusters of YouTube comments, each with its most typical comments and most frequent words.
+Name the discussion theme of every cluster in a short phrase, and say whether it is about the video itself ("video"), the creator ("creator") or the wider subject ("topic").
+Use the category "none" for clusters without a clear theme (greetings, spam, mixed chatter).
+Give clusters that discuss the same theme exactly the same name.
+
+Return exactly one JSON array with one object per cluster:
+
+[
+  {"cluster": 0, "name": "audio too quiet", "category": "video"}
+]
+
+No prose, no extra fields, valid JSON only.
+"""
@@ -0,0 +1,99 @@
+# libs/agents/prompts/fused_prompt.py
+"""
+Single-call prompt + structured-output schema that asks for every analysis
+section at once (sentiments, headline, discussions, people, other insights,
+video requests).  The schema mirrors AnalysisSchema, spelled out without
+free-form dicts because strict JSON-schema mode requires closed objects.
+"""
+
+FUSED_PROMPT = """
+Analyse the YouTube comments below and fill in every field of the JSON schema.
+
+sentiments   – for "video", "creator" and "topic": positive / neutral / negative
+               integers 0-100 that sum to 100.
+headline     – one concise, conversational line summing up the three sentiment
+               scores for a dashboard, e.g. "Your viewers really liked Joe".
+discussions  – for each of "video", "creator", "topic": up to five discussion
+               themes with how many times each was mentioned and its sentiment
+               split (sums to 100).
+people       – up to six named people (or entities) repeatedly mentioned, each
+               with a sentiment split and up to three concise remarks.  Only
+               names that literally appear in the comments.
+other_insights – short, direct insight lines not covered above.
+video_requests – explicit video requests from the audience; empty if none.
+"""
+
+_BREAKDOWN = {
+    "type": "object",
+    "properties": {
+        "positive": {"type": "integer"},
+        "neutral": {"type": "integer"},
+        "negative": {"type": "integer"},
+    },
+    "required": ["positive", "neutral", "negative"],
+    "additionalProperties": False,
+}
+
+_DISCUSSION_LIST = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "mentions": {"type": "integer"},
+            "sentiment": _BREAKDOWN,
+        },
+        "required": ["name", "mentions", "sentiment"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _by_category(schema: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": {k: schema for k in ("video", "creator", "topic")},
+        "required": ["video", "creator", "topic"],
+        "additionalProperties": False,
+    }
+
+
+FUSED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "comment_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "sentiments": _by_category(_BREAKDOWN),
+                "headline": {"type": "string"},
+                "discussions": _by_category(_DISCUSSION_LIST),
+                "people": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "sentiment": _BREAKDOWN,
+                            "remarks": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["name", "sentiment", "remarks"],
+                        "additionalProperties": False,
+                    },
+                },
+                "other_insights": {"type": "array", "items": {"type": "string"}},
+                "video_requests": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": [
+                "sentiments",
+                "headline",
+                "discussions",
+                "people",
+                "other_insights",
+                "video_requests",
+            ],
+            "additionalProperties": False,
+        },
+    },
+}
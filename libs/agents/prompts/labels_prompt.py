@@ -0,0 +1,13 @@
+COMMENT_LABELS_PROMPT = """
+Label every numbered YouTube comment below.
+For each comment give:
+  s  its sentiment: "p" positive, "u" neutral, "n" negative
+  a  what it is about: "v" the video itself, "c" the creator, "t" the wider subject, "o" other
+  t  the number of the matching theme from the theme list, or null if none fits
+
+Return exactly one JSON array with one compact array per comment, in order:
+
+[[0, "p", "v", 2], [1, "n", "c", null]]
+
+No prose, no extra fields, valid JSON only.
+"""
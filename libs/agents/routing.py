@@ -0,0 +1,144 @@
+# libs/agents/routing.py
+"""
+Model routes for chat().
+
+A route is "model" or "model@endpoint".  The default endpoint is
+OPENAI_BASE_URL / OPENAI_API_KEY; named ones come from LLM_ENDPOINTS
+({name: {"base_url": ..., "api_key": ...}}).  Anything that picks a model
+– EXTRACTOR_MODELS, use_model(), chat(model=...) – may name a route, so
+e.g. video_requests can run on a small model and discussions on a
+stronger one, or on another provider.
+
+routes_for(route) is the route followed by its LLM_FALLBACKS chain.  chat()
+moves down the chain when a route keeps failing after its own retries,
+and with LLM_HEDGE_AFTER_S set it also starts the next route when the
+current one has not answered within that many seconds – whichever answers
+first wins, so one slow endpoint doesn't set the pipeline's tail latency.
+
+Calls, errors, latency and cost are counted per route in the
+llm:route:<route> hashes (plus per process); failures to count are
+ignored, they never fail a call.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+from config.config import settings
+from config.redis import get_redis
+from libs.agents.governor import governor_state
+
+_PREFIX = "llm:route:"
+_INDEX = "llm:routes"
+
+local_stats: Dict[str, Counter] = defaultdict(Counter)
+
+
+class Route(NamedTuple):
+    model: str
+    endpoint: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"{self.model}@{self.endpoint}" if self.endpoint else self.model
+
+
+def parse_route(route: str) -> Route:
+    model, _, endpoint = route.partition("@")
+    if endpoint and endpoint not in settings.LLM_ENDPOINTS:
+        raise ValueError(f"Unknown LLM endpoint {endpoint!r} in route {route!r}")
+    return Route(model, endpoint or None)
+
+
+def endpoint_config(endpoint: Optional[str]) -> Dict[str, Optional[str]]:
+    """base_url / api_key of an endpoint (None = the default one)."""
+    if endpoint is None:
+        return {"base_url": settings.OPENAI_BASE_URL, "api_key": settings.OPENAI_API_KEY}
+    cfg = settings.LLM_ENDPOINTS[endpoint]
+    return {
+        "base_url": cfg.get("base_url"),
+        "api_key": cfg.get("api_key") or settings.OPENAI_API_KEY,
+    }
+
+
+def routes_for(route: str) -> List[Route]:
+    """The route and its fallbacks, in order, without repeats."""
+    out: List[Route] = []
+    for r in [route, *settings.LLM_FALLBACKS.get(route, [])]:
+        parsed = parse_route(r)
+        if parsed not in out:
+            out.append(parsed)
+    return out
+
+
+async def record_route(
+    route: Route,
+    ok: bool,
+    latency_s: float = 0.0,
+    cost_usd: float = 0.0,
+    fallback: bool = False,
+    hedge: bool = False,
+    cancelled: bool = False,
+) -> None:
+    """
+    Count one attempt on `route`.  `fallback` – it ran because an earlier
+    route failed; `hedge` – it was started as a hedge; `cancelled` – it lost
+    to another attempt after its request went out (not an error, but its
+    `cost_usd` counts).
+    """
+    name = str(route)
+    fields = {"calls": 1, "errors": 0 if ok or cancelled else 1}
+    if fallback:
+        fields["fallbacks"] = 1
+    if hedge:
+        fields["hedges"] = 1
+    if cancelled:
+        fields["cancelled"] = 1
+    local_stats[name].update(fields)
+    if ok:
+        local_stats[name]["latency_s"] += latency_s
+    if ok or cancelled:
+        local_stats[name]["cost_usd"] += cost_usd
+    try:
+        pipe = get_redis().pipeline()
+        pipe.sadd(_INDEX, name)
+        for field, n in fields.items():
+            pipe.hincrby(_PREFIX + name, field, n)
+        if ok:
+            pipe.hincrbyfloat(_PREFIX + name, "latency_s", latency_s)
+        if ok or cancelled:
+            pipe.hincrbyfloat(_PREFIX + name, "cost_usd", cost_usd)
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+def _summary(counts: Dict) -> Dict:
+    calls = int(counts.get("calls", 0))
+    errors = int(counts.get("errors", 0))
+    cancelled = int(counts.get("cancelled", 0))
+    ok = calls - errors - cancelled
+    return {
+        "calls": calls,
+        "errors": errors,
+        "error_rate": round(errors / calls, 4) if calls else 0.0,
+        "mean_latency_s": round(float(counts.get("latency_s", 0)) / ok, 3) if ok else None,
+        "cost_usd": round(float(counts.get("cost_usd", 0)), 6),
+        "fallbacks": int(counts.get("fallbacks", 0)),
+        "hedges": int(counts.get("hedges", 0)),
+        "cancelled": cancelled,
+    }
+
+
+async def route_stats() -> Dict:
+    """
+    Cluster-wide per-route counters and governor state (from Redis) plus
+    this process's own counters.
+    """
+    r = get_redis()
+    shared = {}
+    for name in sorted(await r.smembers(_INDEX)):
+        shared[name] = _summary(await r.hgetall(_PREFIX + name))
+        shared[name]["governor"] = await governor_state(name)
+    return {
+        "shared": shared,
+        "process": {name: _summary(c) for name, c in local_stats.items()},
+    }
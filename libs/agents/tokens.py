@@ -0,0 +1,41 @@
+# libs/agents/tokens.py
+"""
+Token counting for prompt budgeting.  Uses tiktoken when it is installed
+and its encoding can be loaded (tiktoken downloads the BPE files on first
+use); otherwise falls back to the usual ~4 characters per token estimate,
+which is close enough for chunk sizing.
+"""
+
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """The model's encoding, or None when it can't be loaded (e.g. offline)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("tiktoken encoding for %s unavailable, estimating tokens: %s", model, e)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    if not text:
+        return 0
+    enc = _encoding(model) if tiktoken is not None else None
+    if enc is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(enc.encode(text, disallowed_special=()))
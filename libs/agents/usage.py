@@ -0,0 +1,135 @@
+# libs/agents/usage.py
+"""
+Token / cost / latency accounting for analysis runs, and daily budgets.
+
+Every chat() call inside capture_usage() yields a record (label = extractor,
+model, tokens, latency, retries, cost).  record_run() stores those per run
+in llm_usage and adds the totals to per-user and per-channel daily roll-ups
+(llm_usage_daily, UTC days).
+
+check_budget() compares today's spend with USER_DAILY_BUDGET_USD /
+CHANNEL_DAILY_BUDGET_USD:
+  "ok"         under budget
+  "downgrade"  over budget, BUDGET_ACTION="downgrade" and still below
+               BUDGET_HARD_FACTOR × budget – run the cheaper fused mode
+  otherwise BudgetExceeded is raised and the worker retries the run after
+  the next UTC midnight
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from config.config import settings
+from libs.database.usage import TOTAL_FIELDS, get_daily_usage, record_usage
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, scope: str, spent: float, budget: float):
+        super().__init__(f"{scope} LLM budget exceeded: ${spent:.4f} of ${budget:.2f} today")
+        self.scope = scope
+        self.retry_at = next_utc_midnight()
+
+
+def utc_day(dt: Optional[datetime] = None) -> str:
+    return (dt or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def next_utc_midnight() -> datetime:
+    tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, time.min, tzinfo=timezone.utc)
+
+
+def summarize(calls: List[Dict]) -> Dict:
+    """
+    → {"totals": {...}, "by_label": {label: {...}}} with TOTAL_FIELDS plus
+    latency_s (sum of call latencies) and cached (calls served from cache).
+    """
+    def _empty():
+        return {f: 0 for f in TOTAL_FIELDS} | {"latency_s": 0.0, "cached": 0}
+
+    totals, by_label = _empty(), defaultdict(_empty)
+    for c in calls:
+        for bucket in (totals, by_label[c.get("label") or "unlabelled"]):
+            bucket["calls"] += 1
+            bucket["prompt_tokens"] += c.get("prompt_tokens", 0)
+            bucket["completion_tokens"] += c.get("completion_tokens", 0)
+            bucket["cost_usd"] += c.get("cost_usd", 0.0)
+            bucket["retries"] += c.get("retries", 0)
+            bucket["latency_s"] += c.get("latency_s", 0.0)
+            bucket["cached"] += bool(c.get("cached"))
+    for bucket in (totals, *by_label.values()):
+        bucket["cost_usd"] = round(bucket["cost_usd"], 6)
+        bucket["latency_s"] = round(bucket["latency_s"], 3)
+    return {"totals": totals, "by_label": dict(by_label)}
+
+
+async def record_run(
+    video_id: str,
+    channel_id: Optional[str],
+    user_id: Optional[str],
+    calls: List[Dict],
+    kind: str = "analysis",
+    **extra,
+) -> Optional[str]:
+    if not calls:
+        return None
+    doc = {
+        "video_id": ObjectId(video_id),
+        "channel_id": ObjectId(channel_id) if channel_id else None,
+        "user_id": ObjectId(user_id) if user_id else None,
+        "kind": kind,
+        "day": utc_day(),
+        "calls": calls,
+        **summarize(calls),
+        **extra,
+    }
+    return await record_usage(doc, {"user": user_id, "channel": channel_id})
+
+
+async def _spent_today(scope: str, key: str) -> float:
+    rows = await get_daily_usage(scope, key, [utc_day()])
+    return rows[0].get("cost_usd", 0.0) if rows else 0.0
+
+
+async def remaining_budget(user_id: Optional[str], channel_id: Optional[str]) -> Optional[float]:
+    """
+    USD left today under the tighter of the user / channel budgets
+    (never negative); None when neither is limited.
+    """
+    left = None
+    for scope, key, budget in (
+        ("user", user_id, settings.USER_DAILY_BUDGET_USD),
+        ("channel", channel_id, settings.CHANNEL_DAILY_BUDGET_USD),
+    ):
+        if not key or budget is None:
+            continue
+        rest = max(budget - await _spent_today(scope, key), 0.0)
+        left = rest if left is None else min(left, rest)
+    return left
+
+
+async def check_budget(user_id: Optional[str], channel_id: Optional[str]) -> str:
+    """
+    "ok" | "downgrade", or raises BudgetExceeded (see the module docstring).
+    """
+    action = "ok"
+    for scope, key, budget in (
+        ("user", user_id, settings.USER_DAILY_BUDGET_USD),
+        ("channel", channel_id, settings.CHANNEL_DAILY_BUDGET_USD),
+    ):
+        if not key or budget is None:
+            continue
+        spent = await _spent_today(scope, key)
+        if spent < budget:
+            continue
+        if (
+            settings.BUDGET_ACTION == "downgrade"
+            and spent < budget * settings.BUDGET_HARD_FACTOR
+        ):
+            action = "downgrade"
+        else:
+            raise BudgetExceeded(scope, spent, budget)
+    return action
@@ -0,0 +1,190 @@
+"""
+Local topic clustering of comments, so discussion themes come with exact
+mention counts.  numpy only, no I/O.
+
+vectorize        TF-IDF over word unigrams + bigrams (stop words dropped),
+                 hashed with a sign bit into `dim` columns, rows L2-normed
+cluster_comments spherical k-means (k-means++ seeding) on those rows; every
+                 step is a batched matrix op.  Comments whose best cosine
+                 similarity is below `min_similarity` (or that have no
+                 usable words) stay unclustered.
+
+Weights (e.g. the multiplicity of collapsed duplicates) count towards the
+cluster sizes and the centroids.
+"""
+
+import math
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from libs.analysis.name_matcher import words
+
+STOP_WORDS = frozenset(
+    """
+    a about after again all also am an and any are as at be because been
+    before being but by can could did do does doing dont for from get got
+    had has have having he her here him his how i if im in into is it its
+    just like me more most my no not now of on one only or other our out
+    over really so some still such than that thats the their them then
+    there these they this those to too u up us very was we were what when
+    where which who why will with would you youre your ur
+    """.split()
+)
+
+
+class Cluster:
+    def __init__(self, members: np.ndarray, size: float, sims: np.ndarray):
+        self.members = members  # comment indices, best match first
+        self.size = size  # weighted comment count
+        self.sims = sims  # cosine similarity to the centroid, per member
+        self.terms: List[str] = []  # most distinctive words / bigrams
+
+    def exemplars(self, texts: Sequence[str], n: int) -> List[str]:
+        """The `n` distinct texts closest to the centroid."""
+        out, seen = [], set()
+        for i in self.members:
+            key = texts[i].strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                out.append(texts[i])
+                if len(out) == n:
+                    break
+        return out
+
+
+def _features(text: str) -> List[str]:
+    toks = [w for w in words(text) if len(w) > 2 and w not in STOP_WORDS and not w.isdigit()]
+    return toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+
+
+def vectorize(
+    texts: Sequence[str], dim: int = 256
+) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    """
+    → (X [n × dim] float32 with unit rows (zero rows for empty texts),
+       vocab, doc index per (doc, term) pair, term id per pair)
+    """
+    vocab: Dict[str, int] = {}
+    docs, terms = [], []
+    for i, text in enumerate(texts):
+        for f in _features(text):
+            docs.append(i)
+            terms.append(vocab.setdefault(f, len(vocab)))
+    n, v = len(texts), len(vocab)
+    X = np.zeros((n, dim), dtype=np.float32)
+    if not v:
+        return X, [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    pair, tf = np.unique(
+        np.asarray(docs, dtype=np.int64) * v + np.asarray(terms, dtype=np.int64),
+        return_counts=True,
+    )
+    doc, term = pair // v, pair % v
+    df = np.bincount(term, minlength=v)
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+
+    vocab_list = list(vocab)
+    h = np.array([zlib.crc32(t.encode("utf-8")) for t in vocab_list], dtype=np.int64)
+    bucket, sign = h % dim, np.where((h >> 31) & 1, -1.0, 1.0)
+    np.add.at(X, (doc, bucket[term]), (sign[term] * (1.0 + np.log(tf)) * idf[term]))
+
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    np.divide(X, norms, out=X, where=norms > 0)
+    return X, vocab_list, doc, term
+
+
+def _kmeans_pp(X: np.ndarray, w: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centers = [X[rng.choice(len(X), p=w / w.sum())]]
+    dist = np.full(len(X), np.inf)
+    for _ in range(1, k):
+        dist = np.minimum(dist, 1.0 - X @ centers[-1])
+        p = np.clip(dist, 0, None) * w
+        if p.sum() <= 0:
+            break
+        centers.append(X[rng.choice(len(X), p=p / p.sum())])
+    return np.stack(centers)
+
+
+def _centroids(X: np.ndarray, w: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    starts = np.searchsorted(sorted_labels, np.arange(k))
+    C = np.zeros((k, X.shape[1]), dtype=X.dtype)
+    present = np.unique(sorted_labels)
+    sums = np.add.reduceat(X[order] * w[order, None], starts[present], axis=0)
+    C[present] = sums
+    norms = np.linalg.norm(C, axis=1, keepdims=True)
+    np.divide(C, norms, out=C, where=norms > 0)
+    return C
+
+
+def _top_terms(
+    labels: np.ndarray, k: int, vocab: List[str], doc: np.ndarray, term: np.ndarray, n: int = 5
+) -> List[List[str]]:
+    """c-TF-IDF: words frequent in a cluster and rare in the others."""
+    v = len(vocab)
+    if not v:
+        return [[] for _ in range(k)]
+    lab = labels[doc]
+    keep = lab >= 0
+    counts = np.bincount(lab[keep] * v + term[keep], minlength=k * v).reshape(k, v)
+    spread = (counts > 0).sum(axis=0)
+    score = counts * np.log(1.0 + k / np.maximum(spread, 1))
+    top = np.argsort(-score, axis=1)[:, :n]
+    return [[vocab[t] for t in row if counts[c, t] > 0] for c, row in enumerate(top)]
+
+
+def cluster_comments(
+    texts: Sequence[str],
+    weights: Optional[Sequence[float]] = None,
+    max_clusters: int = 15,
+    dim: int = 256,
+    min_similarity: float = 0.1,
+    min_size: float = 2,
+    iterations: int = 25,
+    seed: int = 0,
+) -> List[Cluster]:
+    """
+    Clusters of at least `min_size` (weighted) comments, biggest first.
+    k grows with the data (≈ √(n/2)) up to `max_clusters`.
+    """
+    w_all = np.ones(len(texts)) if weights is None else np.asarray(weights, dtype=np.float64)
+    X_all, vocab, doc, term = vectorize(texts, dim)
+    rows = np.flatnonzero(np.linalg.norm(X_all, axis=1) > 0)
+    if len(rows) < 2:
+        return []
+    X, w = X_all[rows], w_all[rows]
+    k = max(2, min(max_clusters, int(math.sqrt(len(rows) / 2)), len(rows)))
+
+    rng = np.random.default_rng(seed)
+    C = _kmeans_pp(X, w, k, rng)
+    k = len(C)
+    labels = np.full(len(rows), -1)
+    for _ in range(iterations):
+        new = np.argmax(X @ C.T, axis=1)
+        if np.array_equal(new, labels):
+            break
+        labels = new
+        C = _centroids(X, w, labels, k)
+
+    sims = np.einsum("ij,ij->i", X, C[labels])
+    labels = np.where(sims >= min_similarity, labels, -1)
+
+    full = np.full(len(texts), -1)
+    full[rows] = labels
+    terms = _top_terms(full, k, vocab, doc, term)
+
+    out = []
+    for c in range(k):
+        idx = np.flatnonzero(labels == c)
+        size = float(w[idx].sum())
+        if not len(idx) or size < min_size:
+            continue
+        order = np.argsort(-sims[idx], kind="stable")
+        cluster = Cluster(rows[idx[order]], size, sims[idx[order]])
+        cluster.terms = terms[c]
+        out.append(cluster)
+    out.sort(key=lambda cl: -cl.size)
+    return out
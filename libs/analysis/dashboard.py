@@ -38,7 +38,12 @@ async def build_homepage_summary(
     if not analyses:
         return {"detail": "no analyses in DB for selected videos"}
 
-    a_map = {str(a["comment_id"]): a["analysis"] for a in analyses}
+    # skip docs without sentiments (left by an interrupted earlier run)
+    a_map = {
+        str(a["comment_id"]): a["analysis"]
+        for a in analyses
+        if (a.get("analysis") or {}).get("sentiments")
+    }
     vids = {v["id"]: v for v in await get_videos_by_ids(video_ids)}
     valid = set(a_map) & set(vids)
     if not valid:
@@ -0,0 +1,184 @@
+"""
+Tiny rule-based sentiment scorer for places where an LLM call is too slow
+or too expensive (e.g. live-stream monitoring, provisional dashboards).
+No I/O.
+
+score_text   one comment, pure python
+score_batch  many comments at once; same rules, vectorised with numpy
+breakdown    positive / neutral / negative percentages plus a confidence
+"""
+
+import re
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# word → valence in [-1, 1]
+LEXICON: Dict[str, float] = {
+    # positive
+    "love": 0.9, "loved": 0.9, "loving": 0.8, "amazing": 0.9, "awesome": 0.9,
+    "great": 0.7, "good": 0.5, "best": 0.8, "nice": 0.5, "cool": 0.5,
+    "funny": 0.6, "hilarious": 0.8, "lol": 0.4, "lmao": 0.5, "haha": 0.4,
+    "beautiful": 0.8, "perfect": 0.9, "fire": 0.6, "goat": 0.7, "legend": 0.7,
+    "underrated": 0.5, "helpful": 0.7, "thanks": 0.6, "thank": 0.6,
+    "wholesome": 0.8, "incredible": 0.9, "brilliant": 0.9, "enjoyed": 0.7,
+    "pog": 0.6, "poggers": 0.6, "w": 0.5, "hype": 0.5, "insane": 0.4,
+    # negative
+    "hate": -0.9, "hated": -0.9, "awful": -0.9, "terrible": -0.9, "bad": -0.6,
+    "worst": -0.9, "boring": -0.7, "cringe": -0.7, "trash": -0.8, "garbage": -0.8,
+    "clickbait": -0.7, "annoying": -0.7, "sad": -0.4, "disappointed": -0.7,
+    "disappointing": -0.7, "stupid": -0.7, "fake": -0.6, "scam": -0.9,
+    "lag": -0.4, "laggy": -0.5, "quiet": -0.2, "unsubscribed": -0.8, "l": -0.5,
+    "ratio": -0.4, "mid": -0.4, "overrated": -0.5, "ugh": -0.4,
+    # emoji
+    "❤️": 0.8, "❤": 0.8, "😂": 0.5, "🤣": 0.5, "😍": 0.9, "🔥": 0.6,
+    "👍": 0.5, "🙏": 0.5, "😭": 0.1, "👎": -0.6, "😡": -0.8, "🤮": -0.9,
+    "💀": 0.2, "😴": -0.5,
+}
+
+NEGATIONS = {"not", "no", "never", "dont", "don't", "isnt", "isn't", "wasnt", "wasn't", "cant", "can't"}
+INTENSIFIERS = {"very": 1.3, "so": 1.2, "really": 1.3, "super": 1.4, "extremely": 1.5}
+
+_TOKEN_RE = re.compile(r"[\w']+|[^\w\s]", re.UNICODE)
+
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def score_text(text: str) -> float:
+    """
+    Mean valence of the lexicon hits in `text`, in [-1, 1]; 0.0 if none.
+    A negation flips (and dampens) the next hit; an intensifier boosts it.
+    """
+    total, hits = 0.0, 0
+    flip, boost = False, 1.0
+    for tok in tokenize(text):
+        if tok in NEGATIONS:
+            flip = True
+            continue
+        if tok in INTENSIFIERS:
+            boost = INTENSIFIERS[tok]
+            continue
+        val = LEXICON.get(tok)
+        if val is None:
+            continue
+        val *= boost
+        if flip:
+            val *= -0.7
+        total += val
+        hits += 1
+        flip, boost = False, 1.0
+    if not hits:
+        return 0.0
+    return max(-1.0, min(1.0, total / hits))
+
+
+# |score| below this counts as neutral
+NEUTRAL_BAND = 0.05
+
+# one integer code per known token: lexicon ids first, then NEGATION, then
+# one code per intensifier; everything else is -1
+_NEG = len(LEXICON)
+_CODES: Dict[str, int] = {tok: i for i, tok in enumerate(LEXICON)}
+_CODES.update({tok: _NEG for tok in NEGATIONS})
+_CODES.update({tok: _NEG + 1 + i for i, tok in enumerate(INTENSIFIERS)})
+_VALENCE = np.array(list(LEXICON.values()) + [0.0] * (1 + len(INTENSIFIERS)))
+_BOOST = np.array([0.0] * (len(LEXICON) + 1) + list(INTENSIFIERS.values()))
+_DOC_SEP = "\x00"  # a [^\w\s] token, so tokenize() keeps it as a marker
+_CODES[_DOC_SEP] = -2
+
+
+def score_batch(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorised score_text over `texts`.
+    Returns (scores in [-1, 1], lexicon hits per text).
+
+    All texts are tokenised in one pass and laid out in one flat array.
+    Every lexicon hit closes a "segment"; the modifiers that apply to a hit
+    are the ones in its segment – any negation flips it, the last
+    intensifier boosts it – which is exactly score_text's left-to-right
+    state machine.
+    """
+    n = len(texts)
+    if n == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    joined = _DOC_SEP.join(t.replace(_DOC_SEP, " ") for t in texts)
+    tokens = tokenize(joined)
+    codes = np.array([_CODES.get(t, -1) for t in tokens], dtype=np.int64)
+    sep = codes == -2
+    doc = np.cumsum(sep)  # text index of every token
+
+    keep = ~sep
+    codes, doc = codes[keep], doc[keep]
+    total = len(codes)
+    if total == 0:
+        return np.zeros(n), np.zeros(n, dtype=np.int64)
+
+    is_neg = codes == _NEG
+    is_hit = (codes >= 0) & (codes < _NEG)
+    boost = np.where(codes > _NEG, _BOOST[np.maximum(codes, 0)], 0.0)
+
+    boundary = np.ones(total, dtype=bool)
+    boundary[1:] = (doc[1:] != doc[:-1]) | is_hit[:-1]
+    seg = np.cumsum(boundary) - 1
+    seg_start = np.flatnonzero(boundary)
+
+    flipped = np.bincount(seg, weights=is_neg, minlength=len(seg_start)) > 0
+    last_int = np.maximum.accumulate(np.where(boost > 0, np.arange(total), -1))
+
+    hit = np.flatnonzero(is_hit)
+    val = _VALENCE[codes[hit]]
+    applies = last_int[hit] >= seg_start[seg[hit]]
+    val = val * np.where(applies, boost[np.maximum(last_int[hit], 0)], 1.0)
+    val = np.where(flipped[seg[hit]], val * -0.7, val)
+
+    hits = np.bincount(doc[hit], minlength=n)
+    sums = np.bincount(doc[hit], weights=val, minlength=n)
+    scores = np.divide(sums, hits, out=np.zeros(n), where=hits > 0)
+    return np.clip(scores, -1.0, 1.0), hits
+
+
+def breakdown(
+    texts: Sequence[str], weights: Optional[Sequence[float]] = None
+) -> Dict:
+    """
+    Weighted positive / neutral / negative percentages (summing to 100) for
+    `texts`, plus:
+
+      confidence  0–1: share of (weighted) comments with a lexicon hit, times
+                  how decisive those comments are, times a sample-size
+                  factor that reaches 1 at 50 comments
+      coverage    share of comments with at least one lexicon hit
+      scores      per-comment scores (same order as `texts`)
+    """
+    scores, hits = score_batch(texts)
+    w = np.ones(len(texts)) if weights is None else np.asarray(weights, dtype=np.float64)
+    total_w = w.sum()
+    if total_w <= 0:
+        return {
+            "positive": 0, "neutral": 100, "negative": 0,
+            "confidence": 0.0, "coverage": 0.0, "scores": [],
+        }
+
+    pos = w[scores > NEUTRAL_BAND].sum()
+    neg = w[scores < -NEUTRAL_BAND].sum()
+    raw = np.array([pos, total_w - pos - neg, neg]) * 100.0 / total_w
+    # largest remainder so the three ints sum to 100
+    pct = np.floor(raw).astype(int)
+    for i in np.argsort(-(raw - pct), kind="stable")[: 100 - pct.sum()]:
+        pct[i] += 1
+
+    covered = w[hits > 0].sum() / total_w
+    decisive = (
+        w[(hits > 0) & (np.abs(scores) >= 0.2)].sum() / max(w[hits > 0].sum(), 1e-9)
+    )
+    size = min(1.0, total_w / 50.0)
+    return {
+        "positive": int(pct[0]),
+        "neutral": int(pct[1]),
+        "negative": int(pct[2]),
+        "confidence": round(float(covered * decisive * size), 3),
+        "coverage": round(float(covered), 3),
+        "scores": scores.round(3).tolist(),
+    }
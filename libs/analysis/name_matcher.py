@@ -0,0 +1,90 @@
+"""
+One-pass multi-name matcher (word-level Aho-Corasick) used to ground the
+people extractor's output in the actual comments.
+
+Names and text are NFKC-normalised, case-folded and split into \\w+ words,
+so a name only matches on word boundaries ("Joe" matches "joe's" but not
+"joey").  The automaton is built once from all names and the comments are
+scanned once, whatever the number of names: O(len(text) + matches).
+"""
+
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+
+_WORD = re.compile(r"\w+")
+# multiplicity suffix of collapsed duplicates, see chunking.thread_lines
+_MULTIPLICITY = re.compile(r" \(x(\d+)\)$")
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+class NameMatcher:
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]  # name indices ending at a state
+        for i, name in enumerate(self.names):
+            toks = words(name)
+            if not toks:
+                continue
+            state = 0
+            for tok in toks:
+                nxt = self._goto[state].get(tok)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][tok] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(i)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> List[int]:
+        """Name index for every (possibly overlapping) match in `text`."""
+        hits, state = [], 0
+        for tok in words(text):
+            while state and tok not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(tok, 0)
+            hits.extend(self._out[state])
+        return hits
+
+    def count_lines(
+        self, lines: Sequence[str], max_indices: int = 20
+    ) -> Tuple[List[int], List[List[int]]]:
+        """
+        Scan comment lines once.  Returns (mentions per name, indices of the
+        first `max_indices` lines mentioning each name).  A line ending in
+        "(xN)" stands for N identical comments and counts N times.
+        """
+        mentions = [0] * len(self.names)
+        indices: List[List[int]] = [[] for _ in self.names]
+        for idx, line in enumerate(lines):
+            m = _MULTIPLICITY.search(line)
+            weight = int(m.group(1)) if m else 1
+            seen = set()
+            for name_idx in self.scan(line):
+                mentions[name_idx] += weight
+                if name_idx not in seen:
+                    seen.add(name_idx)
+                    if len(indices[name_idx]) < max_indices:
+                        indices[name_idx].append(idx)
+        return mentions, indices
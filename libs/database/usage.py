@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from config.database import db
+
+_indexes_ready = False
+
+# numeric fields summed into llm_usage_daily
+TOTAL_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cost_usd", "retries")
+
+
+async def _ensure_indexes() -> None:
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    await db.llm_usage.create_index([("video_id", ASCENDING), ("created_at", ASCENDING)])
+    await db.llm_usage_daily.create_index(
+        [("scope", ASCENDING), ("key", ASCENDING), ("day", ASCENDING)], unique=True
+    )
+    _indexes_ready = True
+
+
+async def record_usage(doc: Dict, scopes: Dict[str, Optional[str]]) -> str:
+    """
+    Store one run's usage doc and add its totals to the daily roll-ups of
+    every scope given, e.g. {"user": user_id, "channel": channel_id}.
+    """
+    await _ensure_indexes()
+    doc = {**doc, "created_at": datetime.now(timezone.utc)}
+    res = await db.llm_usage.insert_one(doc)
+
+    inc = {f: doc["totals"].get(f, 0) for f in TOTAL_FIELDS}
+    inc["runs"] = 1
+    ops = [
+        UpdateOne(
+            {"scope": scope, "key": ObjectId(key), "day": doc["day"]},
+            {"$inc": inc},
+            upsert=True,
+        )
+        for scope, key in scopes.items()
+        if key
+    ]
+    if ops:
+        await db.llm_usage_daily.bulk_write(ops, ordered=False)
+    return str(res.inserted_id)
+
+
+async def get_daily_usage(scope: str, key: str, days: List[str]) -> List[dict]:
+    cursor = db.llm_usage_daily.find(
+        {"scope": scope, "key": ObjectId(key), "day": {"$in": days}},
+        {"_id": 0, "scope": 0, "key": 0},
+    ).sort("day", ASCENDING)
+    return [d async for d in cursor]
+
+
+async def get_video_usage(video_id: str, limit: int = 20) -> List[dict]:
+    cursor = (
+        db.llm_usage.find({"video_id": ObjectId(video_id)}, {"calls": 0})
+        .sort("created_at", -1)
+        .limit(limit)
+    )
+    return [d async for d in cursor]
+
+
+async def get_label_history(limit: int = 200) -> Dict[str, Dict]:
+    """
+    Per-extractor totals over the last `limit` usage docs:
+    {label: {calls, cached, completion_tokens, latency_s}}.
+    """
+    cursor = db.llm_usage.aggregate(
+        [
+            {"$sort": {"created_at": -1}},
+            {"$limit": limit},
+            {"$project": {"by_label": {"$objectToArray": "$by_label"}}},
+            {"$unwind": "$by_label"},
+            {
+                "$group": {
+                    "_id": "$by_label.k",
+                    "calls": {"$sum": "$by_label.v.calls"},
+                    "cached": {"$sum": "$by_label.v.cached"},
+                    "completion_tokens": {"$sum": "$by_label.v.completion_tokens"},
+                    "latency_s": {"$sum": "$by_label.v.latency_s"},
+                }
+            },
+        ]
+    )
+    return {d.pop("_id"): d async for d in cursor}
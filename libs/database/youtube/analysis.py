@@ -1,6 +1,41 @@
+import logging
 from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from config.database import db
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_indexes_ready = False
+
+
+async def _ensure_indexes() -> None:
+    """
+    One analysis doc (and one coverage-keys doc) per video: concurrent
+    upserts of the same comment_id can otherwise both insert.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    for coll in (db.comment_analysis, db.analysis_coverage):
+        try:
+            await coll.create_index([("comment_id", ASCENDING)], unique=True)
+        except OperationFailure as e:  # existing duplicates – keep writing
+            logger.warning("%s unique index not created: %s", coll.name, e)
+    _indexes_ready = True
+
+
+def _split_coverage(coverage: Dict) -> Tuple[Dict, List[str]]:
+    """
+    (coverage block for the analysis doc, covered thread keys).  The keys
+    live in analysis_coverage so the analysis doc stays small; the block
+    keeps their count as `covered`.
+    """
+    keys = list(coverage.get("comment_keys", []))
+    block = {k: v for k, v in coverage.items() if k != "comment_keys"}
+    block["covered"] = len(keys)
+    return block, keys
 
 
 def _build_doc(
@@ -34,6 +69,28 @@ async def create_analysis(**kwargs) -> str:
     return str(res.inserted_id)
 
 
+async def upsert_analysis(comment_id: str, **fields) -> str:
+    """
+    Set the given analysis.* sections, creating the doc if needed.
+    Returns the doc id.
+    """
+    await _ensure_indexes()
+    for attempt in range(2):
+        try:
+            doc = await db.comment_analysis.find_one_and_update(
+                {"comment_id": ObjectId(comment_id)},
+                {"$set": {f"analysis.{k}": v for k, v in fields.items()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+                projection={"_id": 1},
+            )
+            return str(doc["_id"])
+        except DuplicateKeyError:
+            # lost the insert race; the doc exists now, so this is an update
+            if attempt:
+                raise
+
+
 async def update_analysis(comment_id: str, **fields) -> int:
     """
     Patch only the provided top-level keys inside analysis.* .
@@ -47,10 +104,101 @@ async def update_analysis(comment_id: str, **fields) -> int:
     return res.modified_count
 
 
+async def bulk_upsert_analyses(
+    analyses: Dict[str, Dict], coverage: Optional[Dict[str, Dict]] = None
+) -> int:
+    """
+    Upsert many analysis docs in one round trip.
+    `analyses` maps video_id → the _build_doc() fields (minus comment_id);
+    `coverage` optionally maps video_id → coverage block.
+    Returns the number of docs inserted or modified.
+    """
+    if not analyses:
+        return 0
+    await _ensure_indexes()
+    coverage = coverage or {}
+    ops, key_ops = [], []
+    for video_id, fields in analyses.items():
+        doc = _build_doc(comment_id=video_id, **fields)
+        update = {"analysis": doc["analysis"]}
+        if video_id in coverage:
+            update["coverage"], keys = _split_coverage(coverage[video_id])
+            key_ops.append(
+                UpdateOne(
+                    {"comment_id": doc["comment_id"]}, {"$set": {"keys": keys}}, upsert=True
+                )
+            )
+        ops.append(
+            UpdateOne({"comment_id": doc["comment_id"]}, {"$set": update}, upsert=True)
+        )
+    if key_ops:
+        await db.analysis_coverage.bulk_write(key_ops, ordered=False)
+    res = await db.comment_analysis.bulk_write(ops, ordered=False)
+    return res.upserted_count + res.modified_count
+
+
+async def set_coverage(comment_id: str, coverage: Dict) -> int:
+    """
+    Record which comment threads the stored analysis covers (incremental
+    runs).  `coverage["comment_keys"]` goes to analysis_coverage.
+    """
+    await _ensure_indexes()
+    block, keys = _split_coverage(coverage)
+    await db.analysis_coverage.update_one(
+        {"comment_id": ObjectId(comment_id)}, {"$set": {"keys": keys}}, upsert=True
+    )
+    res = await db.comment_analysis.update_one(
+        {"comment_id": ObjectId(comment_id)}, {"$set": {"coverage": block}}
+    )
+    return res.modified_count
+
+
+async def get_analysis_with_coverage(comment_id: str):
+    """
+    The analysis doc with the covered thread keys loaded back into
+    `coverage.comment_keys` (what incremental runs plan with).  Docs written
+    before the keys moved out still carry them inline.
+    """
+    doc = await get_analysis_by_comment_id(comment_id)
+    coverage = (doc or {}).get("coverage")
+    if coverage and "comment_keys" not in coverage:
+        keys_doc = await db.analysis_coverage.find_one({"comment_id": ObjectId(comment_id)})
+        coverage["comment_keys"] = keys_doc["keys"] if keys_doc else []
+    return doc
+
+
 async def get_analysis_by_comment_id(comment_id: str):
     return await db.comment_analysis.find_one({"comment_id": ObjectId(comment_id)})
 
 
+async def get_coverage_summaries(video_ids: List[str]) -> Dict[str, Dict]:
+    """
+    {video_id: {"covered": threads covered, "full_at": last full run}} for
+    the videos that have an analysis doc (coverage keys are not loaded).
+    """
+    cursor = db.comment_analysis.aggregate(
+        [
+            {"$match": {"comment_id": {"$in": [ObjectId(v) for v in video_ids]}}},
+            {
+                "$project": {
+                    "comment_id": 1,
+                    "covered": {
+                        "$ifNull": [
+                            "$coverage.covered",
+                            {"$size": {"$ifNull": ["$coverage.comment_keys", []]}},
+                        ]
+                    },
+                    "full_at": "$coverage.full_at",
+                }
+            },
+        ]
+    )
+    return {
+        str(d["comment_id"]): {"covered": d["covered"], "full_at": d.get("full_at")}
+        async for d in cursor
+    }
+
+
 async def get_analyses_by_video_ids(video_ids: List[str]) -> List[dict]:
     """
     Fetch all analysis docs whose comment_id (== video_id) is in `video_ids`.
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from config.database import db
+
+
+async def create_batch(openai_batch_id: str, input_file_id: str, video_ids: List[str]) -> str:
+    now = datetime.now(timezone.utc)
+    res = await db.analysis_batches.insert_one(
+        {
+            "openai_batch_id": openai_batch_id,
+            "input_file_id": input_file_id,
+            "video_ids": [ObjectId(v) for v in video_ids],
+            "status": "submitted",
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    return str(res.inserted_id)
+
+
+async def update_batch(batch_id: str, **fields) -> int:
+    fields["updated_at"] = datetime.now(timezone.utc)
+    res = await db.analysis_batches.update_one(
+        {"_id": ObjectId(batch_id)}, {"$set": fields}
+    )
+    return res.modified_count
+
+
+async def get_batch(batch_id: str) -> Optional[dict]:
+    return await db.analysis_batches.find_one({"_id": ObjectId(batch_id)})
+
+
+async def save_batch_parts(batch_id: str, keys: Dict[str, List[str]]) -> None:
+    """
+    The thread keys submitted per video, one doc each (a batch's keys can
+    outgrow a single document).
+    """
+    if keys:
+        await db.analysis_batch_parts.create_index([("batch_id", 1), ("video_id", 1)])
+        await db.analysis_batch_parts.insert_many(
+            [
+                {"batch_id": ObjectId(batch_id), "video_id": ObjectId(v), "keys": k}
+                for v, k in keys.items()
+            ]
+        )
+
+
+async def get_batch_keys(batch_id: str, video_id: str) -> Optional[List[str]]:
+    doc = await db.analysis_batch_parts.find_one(
+        {"batch_id": ObjectId(batch_id), "video_id": ObjectId(video_id)}
+    )
+    return doc["keys"] if doc else None
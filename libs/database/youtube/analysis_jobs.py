@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from config.database import db
+
+
+async def create_job(
+    job_id: str, channel_id: str, user_id: str, runs: List[Dict], skipped: int
+) -> str:
+    """
+    One channel-wide analysis request.  `runs` holds
+    {"video_id", "run_id", "joined"} per selected video (joined = the video
+    was already in flight and its existing run was reused).
+    """
+    now = datetime.now(timezone.utc)
+    res = await db.analysis_jobs.insert_one(
+        {
+            "_id": ObjectId(job_id),
+            "channel_id": ObjectId(channel_id),
+            "user_id": ObjectId(user_id) if user_id else None,
+            "runs": runs,
+            "skipped": skipped,
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    return str(res.inserted_id)
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    return await db.analysis_jobs.find_one({"_id": ObjectId(job_id)})
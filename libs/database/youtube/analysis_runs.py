@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument
+
+from config.database import db
+
+
+async def create_run(
+    video_id: str,
+    sections: Iterable[str],
+    user_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    **extra,
+) -> str:
+    """
+    New run status doc; every section starts out "pending".
+    `run_id` lets the caller pick the id up front (in-flight dedup);
+    `extra` fields are stored as given.
+    """
+    now = datetime.now(timezone.utc)
+    res = await db.analysis_runs.insert_one(
+        {
+            "_id": ObjectId(run_id) if run_id else ObjectId(),
+            "video_id": ObjectId(video_id),
+            "user_id": ObjectId(user_id) if user_id else None,
+            "status": "queued",
+            "sections": {s: {"status": "pending"} for s in sections},
+            "created_at": now,
+            "updated_at": now,
+            **extra,
+        }
+    )
+    return str(res.inserted_id)
+
+
+async def update_run(run_id: str, **fields) -> Optional[dict]:
+    """
+    $set top-level fields or dotted paths ("sections.people.status");
+    returns the doc after the update.
+    """
+    fields["updated_at"] = datetime.now(timezone.utc)
+    return await db.analysis_runs.find_one_and_update(
+        {"_id": ObjectId(run_id)},
+        {"$set": fields},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def get_run(run_id: str) -> Optional[dict]:
+    return await db.analysis_runs.find_one({"_id": ObjectId(run_id)})
+
+
+async def get_latest_run(video_id: str) -> Optional[dict]:
+    return await db.analysis_runs.find_one(
+        {"video_id": ObjectId(video_id)}, sort=[("created_at", DESCENDING)]
+    )
+
+
+async def count_run_statuses(run_ids: List[str]) -> Dict[str, int]:
+    """{status: number of runs} over the given runs."""
+    cursor = db.analysis_runs.aggregate(
+        [
+            {"$match": {"_id": {"$in": [ObjectId(r) for r in run_ids]}}},
+            {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+        ]
+    )
+    return {d["_id"]: d["n"] async for d in cursor}
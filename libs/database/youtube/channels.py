@@ -36,3 +36,13 @@ async def upsert_channel(channel_data: dict) -> str:
         {"youtube_channel_id": channel_data["youtube_channel_id"]}
     )
     return str(doc["_id"])
+
+
+async def update_channel_statistics(channel_id: str, statistics: dict) -> int:
+    """
+    Overwrite the cached `statistics` block with a fresh reading.
+    """
+    result = await db.channels.update_one(
+        {"_id": ObjectId(channel_id)}, {"$set": {"statistics": statistics}}
+    )
+    return result.modified_count
@@ -0,0 +1,134 @@
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+# label fields the query API filters on
+FILTERS = ("about", "sentiment", "theme")
+_WRITE_BATCH = 1000
+
+_indexes_ready = False
+
+
+async def _ensure_indexes() -> None:
+    """
+    One label doc per (video, thread).  Each single filter, and about /
+    theme combined with sentiment, has an index ending in the (like_count
+    desc, comment_id) sort, so a page is an index range scan whatever the
+    video size.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    sort = [("like_count", DESCENDING), ("comment_id", ASCENDING)]
+    try:
+        await db.comment_labels.create_index(
+            [("video_id", ASCENDING), ("comment_id", ASCENDING)], unique=True
+        )
+        for prefix in (
+            (),
+            ("sentiment",),
+            ("about",),
+            ("theme",),
+            ("about", "sentiment"),
+            ("theme", "sentiment"),
+        ):
+            await db.comment_labels.create_index(
+                [("video_id", ASCENDING)] + [(f, ASCENDING) for f in prefix] + sort
+            )
+    except OperationFailure as e:
+        logger.warning("comment_labels indexes not created: %s", e)
+    _indexes_ready = True
+
+
+async def replace_labels(video_id: str, labels: List[Dict]) -> int:
+    """
+    Upsert the labels of a video (one dict per thread, keyed by
+    comment_id) and drop labels of threads that are no longer there.
+    """
+    await _ensure_indexes()
+    vid = ObjectId(video_id)
+    now = datetime.now(timezone.utc)
+    for i in range(0, len(labels), _WRITE_BATCH):
+        ops = [
+            UpdateOne(
+                {"video_id": vid, "comment_id": lab["comment_id"]},
+                {"$set": {**lab, "video_id": vid, "labeled_at": now}},
+                upsert=True,
+            )
+            for lab in labels[i : i + _WRITE_BATCH]
+        ]
+        await db.comment_labels.bulk_write(ops, ordered=False)
+    await db.comment_labels.delete_many({"video_id": vid, "labeled_at": {"$lt": now}})
+    return len(labels)
+
+
+async def delete_labels_by_video_id(video_id: str) -> int:
+    result = await db.comment_labels.delete_many({"video_id": ObjectId(video_id)})
+    return result.deleted_count
+
+
+def _encode_cursor(doc: Dict) -> str:
+    raw = json.dumps([doc["like_count"], doc["comment_id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        likes, comment_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(likes), str(comment_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+async def query_labels(
+    video_id: str,
+    filters: Dict[str, Optional[str]],
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of labelled comments, most liked first.  `filters` maps
+    FILTERS fields to a value (None = any).  Returns (docs, next cursor –
+    None on the last page).  Raises ValueError on a bad cursor.
+    """
+    query: Dict = {"video_id": ObjectId(video_id)}
+    query.update({f: v for f, v in filters.items() if f in FILTERS and v is not None})
+    if cursor:
+        likes, comment_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"like_count": {"$lt": likes}},
+            {"like_count": likes, "comment_id": {"$gt": comment_id}},
+        ]
+    docs = await (
+        db.comment_labels.find(query, {"_id": 0, "video_id": 0, "labeled_at": 0})
+        .sort([("like_count", DESCENDING), ("comment_id", ASCENDING)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+async def count_labels(video_id: str) -> Dict[str, Dict[str, int]]:
+    """{field: {value: threads}} for every FILTERS field of the video."""
+    cursor = db.comment_labels.aggregate(
+        [
+            {"$match": {"video_id": ObjectId(video_id)}},
+            {"$facet": {f: [{"$sortByCount": f"${f}"}] for f in FILTERS}},
+        ]
+    )
+    facets = (await cursor.to_list(length=1) or [{}])[0]
+    return {
+        f: {str(row["_id"]): row["count"] for row in facets.get(f, []) if row["_id"] is not None}
+        for f in FILTERS
+    }
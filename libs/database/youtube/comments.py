@@ -1,18 +1,116 @@
 from config.database import db
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 
 
 async def create_comments(video_id: str, comments: list):
-    result = await db.comments.insert_one(
-        {"video_id": ObjectId(video_id), "comments": comments}
+    """
+    Store (or replace) the crawled threads for a video.  One doc per video.
+    """
+    result = await db.comments.find_one_and_update(
+        {"video_id": ObjectId(video_id)},
+        {"$set": {"comments": comments}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        projection={"_id": 1},
     )
-    return str(result.inserted_id)
+    return str(result["_id"])
+
+
+async def append_comments(video_id: str, comments: list) -> int:
+    """
+    Push newly seen threads onto the video's comments doc (created if
+    missing).  Returns how many were appended.
+    """
+    if not comments:
+        return 0
+    await db.comments.update_one(
+        {"video_id": ObjectId(video_id)},
+        {"$push": {"comments": {"$each": comments}}},
+        upsert=True,
+    )
+    return len(comments)
 
 
 async def get_comments_by_video_id(video_id: str):
     return await db.comments.find_one({"video_id": ObjectId(video_id)})
 
 
+async def get_commented_video_ids() -> list:
+    """
+    Every video id that has stored comments (str).
+    """
+    cursor = db.comments.find({}, {"video_id": 1})
+    return [str(d["video_id"]) async for d in cursor]
+
+
+async def get_thread_counts(video_ids: list) -> dict:
+    """
+    {video_id: number of stored threads} for the given videos that have
+    comments, without loading the threads themselves.
+    """
+    cursor = db.comments.aggregate(
+        [
+            {"$match": {"video_id": {"$in": [ObjectId(v) for v in video_ids]}}},
+            {"$project": {"video_id": 1, "n": {"$size": {"$ifNull": ["$comments", []]}}}},
+        ]
+    )
+    return {str(d["video_id"]): d["n"] async for d in cursor}
+
+
 async def delete_comments_by_video_id(video_id: str):
     result = await db.comments.delete_one({"video_id": ObjectId(video_id)})
     return result.deleted_count > 0
+
+
+async def bulk_write_comments(merge: dict, keep: dict = None) -> int:
+    """
+    One round trip for many videos.  `merge` maps video_id → threads added
+    to the stored list; a stored thread with the same id is replaced, so a
+    re-crawled thread is never stored twice.  `keep` maps video_id → the
+    thread ids to keep, dropping every other stored thread of that video
+    (a full refresh once a crawl has seen all of its threads).
+    Returns the number of videos touched.
+    """
+    ops = []
+    for vid, threads in merge.items():
+        if not threads:
+            continue
+        ids = [t["id"] for t in threads]
+        stored = {"$ifNull": ["$comments", []]}
+        ops.append(
+            UpdateOne(
+                {"video_id": ObjectId(vid)},
+                [
+                    {
+                        "$set": {
+                            "comments": {
+                                "$concatArrays": [
+                                    {
+                                        "$filter": {
+                                            "input": stored,
+                                            "cond": {"$not": [{"$in": ["$$this.id", ids]}]},
+                                        }
+                                    },
+                                    # literal: comment text may start with "$"
+                                    {"$literal": threads},
+                                ]
+                            }
+                        }
+                    }
+                ],
+                upsert=True,
+            )
+        )
+    for vid, ids in (keep or {}).items():
+        ops.append(
+            UpdateOne(
+                {"video_id": ObjectId(vid)},
+                {"$pull": {"comments": {"id": {"$nin": list(ids)}}}},
+            )
+        )
+    if not ops:
+        return 0
+    # ordered: a video's merge must land before its prune
+    await db.comments.bulk_write(ops)
+    return len({v for v, t in merge.items() if t} | set(keep or {}))
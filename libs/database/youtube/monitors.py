@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config.database import db
+
+
+async def start_monitor(video_id: str, fields: dict) -> None:
+    """
+    (Re)initialise the monitor doc for a video.  Clears any stop request.
+    """
+    await db.comment_monitors.update_one(
+        {"video_id": ObjectId(video_id)},
+        {
+            "$set": {
+                **fields,
+                "status": "queued",
+                "stop_requested": False,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+        upsert=True,
+    )
+
+
+async def update_monitor(video_id: str, **fields) -> Optional[dict]:
+    """
+    Patch the monitor doc and return it *after* the update, so the poller
+    learns about stop requests in the same round trip.
+    """
+    fields["updated_at"] = datetime.now(timezone.utc)
+    return await db.comment_monitors.find_one_and_update(
+        {"video_id": ObjectId(video_id)},
+        {"$set": fields},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def request_stop(video_id: str) -> bool:
+    res = await db.comment_monitors.update_one(
+        {"video_id": ObjectId(video_id), "status": {"$in": ["queued", "running"]}},
+        {"$set": {"stop_requested": True}},
+    )
+    return res.modified_count > 0
+
+
+async def get_monitor(video_id: str):
+    return await db.comment_monitors.find_one({"video_id": ObjectId(video_id)})
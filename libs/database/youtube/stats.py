@@ -0,0 +1,147 @@
+# libs/database/youtube/stats.py
+#
+# Append-only statistics history for videos and channels.  Each refresh adds
+# one snapshot to a MongoDB time-series collection (timeField "ts", metaField
+# "meta"), so Mongo buckets and compresses points per video / channel and
+# range scans over a single series stay cheap.
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import CollectionInvalid
+
+from config.database import db
+
+VIDEO_STATS = "video_stats"
+CHANNEL_STATS = "channel_stats"
+
+VIDEO_FIELDS = ("view_count", "like_count", "comment_count")
+CHANNEL_FIELDS = ("viewCount", "subscriberCount", "videoCount")
+
+_UNITS = {"hour", "day"}
+_ensured = False
+
+
+async def ensure_stats_collections() -> None:
+    """
+    Create the time-series collections (+ a meta/ts index) if missing.
+    Safe to call repeatedly; only the first call per process hits Mongo.
+    """
+    global _ensured
+    if _ensured:
+        return
+
+    for name, meta_key in ((VIDEO_STATS, "video_id"), (CHANNEL_STATS, "channel_id")):
+        try:
+            await db.create_collection(
+                name,
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"},
+            )
+        except CollectionInvalid:
+            pass  # already there
+        await db[name].create_index([(f"meta.{meta_key}", 1), ("ts", 1)])
+
+    _ensured = True
+
+
+async def record_video_stats(snapshots: List[Dict], ts: Optional[datetime] = None) -> int:
+    """
+    Append one point per video.  Each snapshot needs `video_id` plus any of
+    view_count / like_count / comment_count.  Returns points written.
+    """
+    if not snapshots:
+        return 0
+    await ensure_stats_collections()
+    ts = ts or datetime.now(timezone.utc)
+    docs = [
+        {
+            "ts": ts,
+            "meta": {"video_id": ObjectId(s["video_id"])},
+            **{k: s.get(k) for k in VIDEO_FIELDS if s.get(k) is not None},
+        }
+        for s in snapshots
+    ]
+    res = await db[VIDEO_STATS].insert_many(docs, ordered=False)
+    return len(res.inserted_ids)
+
+
+async def record_channel_stats(
+    channel_id: str, statistics: Dict, ts: Optional[datetime] = None
+) -> None:
+    """
+    Append one point for the channel's `statistics` block (ints expected).
+    """
+    await ensure_stats_collections()
+    await db[CHANNEL_STATS].insert_one(
+        {
+            "ts": ts or datetime.now(timezone.utc),
+            "meta": {"channel_id": ObjectId(channel_id)},
+            **{k: statistics.get(k) for k in CHANNEL_FIELDS if statistics.get(k) is not None},
+        }
+    )
+
+
+async def _series(
+    coll: str, meta_key: str, oid: ObjectId, fields, days: int, unit: str
+) -> List[Dict]:
+    if unit not in _UNITS:
+        raise ValueError(f"unit must be one of {sorted(_UNITS)}")
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    pipeline = [
+        {"$match": {f"meta.{meta_key}": oid, "ts": {"$gte": since}}},
+        {"$sort": {"ts": 1}},
+        {
+            "$group": {
+                "_id": {"$dateTrunc": {"date": "$ts", "unit": unit}},
+                # downsample to the last reading inside each bucket
+                **{f: {"$last": f"${f}"} for f in fields},
+            }
+        },
+        {"$sort": {"_id": 1}},
+    ]
+    return [
+        {"timestamp": p["_id"].replace(tzinfo=timezone.utc).isoformat()}
+        | {f: p.get(f) for f in fields}
+        async for p in db[coll].aggregate(pipeline)
+    ]
+
+
+def with_growth(series: List[Dict], fields) -> Dict:
+    """
+    Attach per-point `<field>_delta` (vs. previous point) and an overall
+    first→last growth summary.
+    """
+    prev: Dict = {}
+    for point in series:
+        for f in fields:
+            cur = point.get(f)
+            point[f"{f}_delta"] = (
+                cur - prev[f] if cur is not None and prev.get(f) is not None else None
+            )
+            if cur is not None:
+                prev[f] = cur
+
+    growth = {}
+    for f in fields:
+        values = [p[f] for p in series if p.get(f) is not None]
+        growth[f] = values[-1] - values[0] if len(values) > 1 else 0
+
+    return {"series": series, "growth": growth}
+
+
+async def get_video_stats_series(video_id: str, days: int = 90, unit: str = "day") -> Dict:
+    series = await _series(
+        VIDEO_STATS, "video_id", ObjectId(video_id), VIDEO_FIELDS, days, unit
+    )
+    return with_growth(series, VIDEO_FIELDS)
+
+
+async def get_channel_stats_series(
+    channel_id: str, days: int = 90, unit: str = "day"
+) -> Dict:
+    series = await _series(
+        CHANNEL_STATS, "channel_id", ObjectId(channel_id), CHANNEL_FIELDS, days, unit
+    )
+    return with_growth(series, CHANNEL_FIELDS)
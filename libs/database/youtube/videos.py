@@ -1,6 +1,29 @@
+import logging
 from typing import Dict, List
 from config.database import db
 from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+_DUPLICATE_KEY = 11000
+_indexes_ready = False
+
+
+async def _ensure_indexes() -> None:
+    """
+    One video doc per YouTube id: concurrent upserts of the same
+    youtube_video_id can otherwise both insert.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        await db.videos.create_index([("youtube_video_id", ASCENDING)], unique=True)
+    except OperationFailure as e:  # existing duplicates – keep writing
+        logger.warning("videos unique index not created: %s", e)
+    _indexes_ready = True
 
 
 async def create_video(
@@ -46,11 +69,66 @@ async def create_videos(videos: List[Dict]) -> List[str]:
     return [str(_id) for _id in result.inserted_ids]
 
 
+async def upsert_videos(videos: List[Dict]) -> Dict[str, str]:
+    """
+    Bulk upsert by youtube_video_id so a re-sync refreshes metadata and
+    stats instead of inserting duplicates.
+    Returns {youtube_video_id: str(_id)} for every video passed in.
+    """
+    if not videos:
+        return {}
+    await _ensure_indexes()
+    ops = [
+        UpdateOne(
+            {"youtube_video_id": v["youtube_video_id"]},
+            {
+                "$set": {
+                    "name": v["name"],
+                    "description": v.get("description"),
+                    "channel_id": ObjectId(v["channel_id"]),
+                    "publish_time": v["publish_time"],
+                    "view_count": v["view_count"],
+                    "like_count": v.get("like_count"),
+                    "comment_count": v.get("comment_count"),
+                    "duration": v.get("duration"),
+                }
+            },
+            upsert=True,
+        )
+        for v in videos
+    ]
+    for attempt in range(2):
+        try:
+            await db.videos.bulk_write(ops, ordered=False)
+            break
+        except BulkWriteError as e:
+            # lost an insert race; the docs exist now, so a retry updates them
+            errors = e.details.get("writeErrors", [])
+            if attempt or any(err.get("code") != _DUPLICATE_KEY for err in errors):
+                raise
+
+    cursor = db.videos.find(
+        {"youtube_video_id": {"$in": [v["youtube_video_id"] for v in videos]}},
+        {"_id": 1, "youtube_video_id": 1},
+    )
+    return {d["youtube_video_id"]: str(d["_id"]) async for d in cursor}
+
+
 async def get_videos_by_channel_id(channel_id: str):
     cursor = db.videos.find({"channel_id": ObjectId(channel_id)})
     return [video async for video in cursor]
 
 
+async def get_video_id_map(channel_id: str) -> Dict[str, str]:
+    """
+    {youtube_video_id: str(_id)} for every stored video of a channel.
+    """
+    cursor = db.videos.find(
+        {"channel_id": ObjectId(channel_id)}, {"_id": 1, "youtube_video_id": 1}
+    )
+    return {v["youtube_video_id"]: str(v["_id"]) async for v in cursor}
+
+
 async def get_video_by_id(video_id: str) -> Dict | None:
     v = await db.videos.find_one({"_id": ObjectId(video_id)})
     if not v:
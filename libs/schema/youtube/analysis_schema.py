@@ -32,6 +32,8 @@ class PersonInsight(BaseModel):
     name: str
     sentiment: Dict[str, int]  # positive / neutral / negative %
     remarks: List[str] = []  # up-to-three short remarks
+    mentions: Optional[int] = None  # grounded count from the comments
+    comment_keys: List[str] = []  # threads (comment_key) that mention the person
     
 class DiscussionItem(BaseModel):
     name: str
@@ -39,9 +41,9 @@ class DiscussionItem(BaseModel):
     sentiment: SentimentBreakdown
 
 
-class AnalysisSchema(BaseModel):
-    id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
-    comment_id: PyObjectId
+class AnalysisSections(BaseModel):
+    """The analysis sections alone, e.g. a fused LLM reply."""
+
     sentiments: Sentiments
     headline: str
     discussions: Dict[str, List[DiscussionItem]]  # video / topic / creator
@@ -49,6 +51,11 @@ class AnalysisSchema(BaseModel):
     other_insights: List[str] = []
     video_requests: List[str] = []
 
+
+class AnalysisSchema(AnalysisSections):
+    id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
+    comment_id: PyObjectId
+
     class Config:
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
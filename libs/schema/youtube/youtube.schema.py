@@ -62,8 +62,13 @@ class Statistics(BaseModel):
     videoCount: int
 
 class CommentThread(BaseModel):
+    id: Optional[str] = None  # YouTube thread / live-chat message id
     text: str
     replies: List[str]
+    published_at: Optional[str] = None
+    like_count: Optional[int] = None
+    reply_count: Optional[int] = None
+    source: Optional[str] = None  # "live_chat" for monitored chat messages
 
 # ---------------------------------------------------------------------------#
 # channel                                                                    #
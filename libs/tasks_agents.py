@@ -5,8 +5,60 @@ _worker = import_module("apps.agents.worker")
 celery_app = _worker.celery
 
 
-def enqueue_analyze_comments(video_id: str):
+def enqueue_analyze_comments(
+    video_id: str,
+    use_cache: bool = True,
+    full: bool = False,
+    deep: bool = False,
+    user_id: str = None,
+    run_id: str = None,
+):
     """
     Queues analysis of comments for the given video_id on Celery.
+    `full=True` skips incremental mode and re-analyses every comment;
+    `deep=True` always asks the LLM for sentiments.  Usage and budgets are
+    accounted to `user_id` (and the video's channel); progress goes to the
+    analysis_runs doc `run_id`.
     """
-    celery_app.send_task("agents.analyze_comments", args=[str(video_id)], queue="agents_queue")
+    celery_app.send_task(
+        "agents.analyze_comments",
+        args=[str(video_id), use_cache, full, deep, user_id, run_id],
+        queue="agents_queue",
+    )
+
+
+def enqueue_label_comments(video_id: str, tier: str = None, user_id: str = None):
+    """
+    Queues per-comment labelling of the video (libs/agents/comments_analyzer/labels.py);
+    `tier` defaults to settings.LABELS_TIER.
+    """
+    celery_app.send_task(
+        "agents.label_comments",
+        args=[str(video_id), tier, user_id],
+        queue="agents_queue",
+    )
+
+
+def enqueue_analysis_batch(video_ids: list, user_id: str = None):
+    """
+    Queues an OpenAI Batch API re-analysis of `video_ids` (libs/agents/batch.py),
+    charged to `user_id` when given.
+    """
+    celery_app.send_task(
+        "agents.submit_analysis_batch",
+        args=[[str(v) for v in video_ids], user_id],
+        queue="agents_queue",
+    )
+
+
+def enqueue_resume_channel(channel_id: str, eta):
+    """
+    Queues the dispatch of a paused channel's analysis queue at `eta`
+    (libs/agents/orchestrator.py).
+    """
+    celery_app.send_task(
+        "agents.resume_channel",
+        args=[str(channel_id)],
+        eta=eta,
+        queue="agents_queue",
+    )
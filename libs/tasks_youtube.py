@@ -17,3 +17,19 @@ def enqueue_sync_channel(channel_id: str):
 def enqueue_grab_comments(video_id: str, limit: int):
     # video_id should already be a string, but we’ll str() it just in case
     celery_app.send_task("youtube.grab_comments", args=[str(video_id), limit], queue="youtube_queue")
+
+
+def enqueue_grab_channel_comments(channel_id: str, limit: int):
+    celery_app.send_task(
+        "youtube.grab_channel_comments", args=[str(channel_id), limit], queue="youtube_queue"
+    )
+
+
+def enqueue_monitor_video(video_id: str, minutes: int):
+    # hard limit a little past the watch window so a stuck poller can't linger
+    celery_app.send_task(
+        "youtube.monitor_video",
+        args=[str(video_id), minutes],
+        queue="youtube_queue",
+        time_limit=minutes * 60 + 120,
+    )
@@ -30,6 +30,7 @@ from libs.database.youtube.channels import (
     get_channel_by_id as db_get_channel_by_id,
     upsert_channel,
 )
+from libs.database.youtube.stats import record_channel_stats
 from libs.youtube.get_youtube_channel_info import get_channel_info_by_handle
 
 
@@ -82,6 +83,7 @@ async def subscribe_channel(user_id: str, handle: str, is_owner: bool = False) -
 
     # upsert via the new DB helper, get back a string ID
     channel_id = await upsert_channel(channel_data)
+    await record_channel_stats(channel_id, channel_data["statistics"])
 
     # attempt to subscribe the user; if False, they were already subscribed
     added = await subscribe_user_to_channel(user_id, channel_id, is_owner)
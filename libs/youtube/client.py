@@ -0,0 +1,28 @@
+# libs/youtube/client.py
+#
+# One place to construct the YouTube Data API client so every crawler can be
+# pointed at a local stand-in (apps/fake_youtube) instead of Google.
+
+import os
+from typing import Optional
+
+from googleapiclient.discovery import build
+
+
+def build_youtube(api_key: str, endpoint: Optional[str] = None):
+    """
+    Return a `youtube/v3` client.
+
+    If `endpoint` (or the YOUTUBE_API_ENDPOINT env var) is set, requests go
+    there instead of https://youtube.googleapis.com/ – e.g.
+    "http://127.0.0.1:8090/" for the fake server.
+    """
+    endpoint = endpoint or os.getenv("YOUTUBE_API_ENDPOINT")
+    options = {"api_endpoint": endpoint} if endpoint else None
+    return build(
+        "youtube",
+        "v3",
+        developerKey=api_key,
+        client_options=options,
+        cache_discovery=False,
+    )
@@ -1,9 +1,11 @@
 # libs/youtube/get_all_videos_from_channel.py
 from fastapi import HTTPException, status
-from googleapiclient.discovery import build
+from libs.youtube.client import build_youtube
 from typing import List, Dict
-from libs.database.youtube.channels import get_channel_by_id
-from libs.database.youtube.videos import create_videos
+from libs.database.youtube.channels import get_channel_by_id, update_channel_statistics
+from libs.database.youtube.videos import upsert_videos
+from libs.database.youtube.stats import record_channel_stats, record_video_stats
+from libs.youtube.quota import charge
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,8 +15,11 @@ async def get_all_videos_from_channel(api_key: str, channel_id: str) -> List[Dic
     """
     Crawl every video in the channel’s “uploads” playlist, pull rich metadata,
     stash to Mongo, and return the list we saved.
+
+    Every sync also appends a stats snapshot per video and one for the
+    channel (see libs/database/youtube/stats.py).
     """
-    youtube = build("youtube", "v3", developerKey=api_key)
+    youtube = build_youtube(api_key)
 
     # 1) look up our Channel doc
     ch_doc = await get_channel_by_id(channel_id)
@@ -24,16 +29,29 @@ async def get_all_videos_from_channel(api_key: str, channel_id: str) -> List[Dic
             detail=f"Channel document {channel_id!r} not found",
         )
 
-    uploads_pid = (
+    # statistics ride along for free: same call, same quota cost
+    await charge("channels.list")
+    ch_item = (
         youtube.channels()
-        .list(part="contentDetails", id=ch_doc["youtube_channel_id"])
-        .execute()["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        .list(part="contentDetails,statistics", id=ch_doc["youtube_channel_id"])
+        .execute()["items"][0]
     )
+    uploads_pid = ch_item["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    raw_stats = ch_item.get("statistics", {})
+    ch_stats = {
+        k: (int(v) if k != "hiddenSubscriberCount" else v)
+        for k, v in raw_stats.items()
+    }
+    if ch_stats:
+        await update_channel_statistics(channel_id, ch_stats)
+        await record_channel_stats(channel_id, ch_stats)
 
     videos: List[Dict] = []
     next_page = None
 
     while True:
+        await charge("playlistItems.list")
         playlist_resp = (
             youtube.playlistItems()
             .list(
@@ -52,6 +70,7 @@ async def get_all_videos_from_channel(api_key: str, channel_id: str) -> List[Dic
         if not video_ids:
             break
 
+        await charge("videos.list")
         details_resp = (
             youtube.videos()
             .list(
@@ -92,6 +111,13 @@ async def get_all_videos_from_channel(api_key: str, channel_id: str) -> List[Dic
             break
 
     if videos:
-        await create_videos(videos)
+        ids = await upsert_videos(videos)
+        await record_video_stats(
+            [
+                {"video_id": ids[v["youtube_video_id"]], **v}
+                for v in videos
+                if v["youtube_video_id"] in ids
+            ]
+        )
 
     return videos
@@ -0,0 +1,99 @@
+# libs/youtube/get_channel_comments.py
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+
+from libs.database.youtube.channels import get_channel_by_id
+from libs.database.youtube.comments import bulk_write_comments
+from libs.database.youtube.videos import get_video_id_map
+from libs.youtube.client import build_youtube
+from libs.youtube.get_youtube_comments import thread_to_entry
+from libs.youtube.quota import charge
+
+FLUSH_EVERY = 1_000  # buffered threads before a bulk write
+
+
+async def get_channel_comments(
+    api_key: str, channel_id: str, max_threads: int = 10_000
+) -> Dict[str, int]:
+    """
+    Refresh comments for every video of a channel in one paging loop over
+    commentThreads(allThreadsRelatedToChannelId=…), instead of one crawl task
+    (and one video lookup) per video.
+
+    Threads are routed to our video docs by `snippet.videoId` and merged
+    into the stored lists in bulk batches (deduplicated by thread id).  The
+    channel feed interleaves videos, so a video's list is only known to be
+    complete once the crawl has paged to the end: then the threads it no
+    longer returned are dropped, making the run a full refresh.  A crawl cut
+    short by `max_threads` only merges.  Threads for videos we haven't
+    synced are skipped.
+
+    Returns counters: threads, videos, api_calls, unrouted.
+    """
+    ch_doc = await get_channel_by_id(channel_id)
+    if not ch_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel document {channel_id!r} not found",
+        )
+
+    # one query instead of a get_video_by_id per video
+    video_map = await get_video_id_map(channel_id)
+    youtube = build_youtube(api_key)
+
+    stats: Counter = Counter()
+    buffer: Dict[str, List[Dict]] = defaultdict(list)
+    buffered = 0
+    seen: Dict[str, set] = defaultdict(set)  # video → thread ids this run
+
+    async def _flush() -> None:
+        nonlocal buffered
+        await bulk_write_comments(buffer)
+        buffer.clear()
+        buffered = 0
+
+    complete = False
+    page_token = None
+    while stats["threads"] + stats["unrouted"] < max_threads:
+        await charge("commentThreads.list")
+        stats["api_calls"] += 1
+        resp = (
+            youtube.commentThreads()
+            .list(
+                part="snippet,replies",
+                allThreadsRelatedToChannelId=ch_doc["youtube_channel_id"],
+                maxResults=100,
+                pageToken=page_token,
+                textFormat="plainText",
+            )
+            .execute()
+        )
+
+        for item in resp.get("items", []):
+            vid = video_map.get(item["snippet"].get("videoId"))
+            if not vid:
+                stats["unrouted"] += 1
+                continue
+            buffer[vid].append(thread_to_entry(item))
+            seen[vid].add(item["id"])
+            buffered += 1
+            stats["threads"] += 1
+
+        if buffered >= FLUSH_EVERY:
+            await _flush()
+
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            complete = True
+            break
+
+    if buffered:
+        await _flush()
+    if complete and seen:
+        # every thread of these videos was seen: drop the ones that are gone
+        await bulk_write_comments({}, keep=seen)
+
+    stats["videos"] = len(seen)
+    return dict(stats)
@@ -1,4 +1,4 @@
-from googleapiclient.discovery import build
+from libs.youtube.client import build_youtube
 from typing import Dict, Optional
 import os
 
@@ -20,7 +20,7 @@ def get_channel_info_by_handle(handle: str, api_key: Optional[str] = None) -> Di
     if not key:
         raise ValueError("An API key must be provided or set in YOUTUBE_API_KEY")
 
-    youtube = build("youtube", "v3", developerKey=key)
+    youtube = build_youtube(key)
 
     # 1) Attempt legacy-username lookup
     resp = (
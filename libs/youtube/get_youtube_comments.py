@@ -1,8 +1,28 @@
 from fastapi import HTTPException, status
-from googleapiclient.discovery import build
+from libs.youtube.client import build_youtube
 from typing import List, Dict, Any
 from libs.database.youtube.comments import create_comments
 from libs.database.youtube.videos import get_video_by_id
+from libs.youtube.quota import charge
+
+
+def thread_to_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape one commentThread resource into the entry we store in Mongo.
+    """
+    sn = item["snippet"]["topLevelComment"]["snippet"]
+    return {
+        "id": item["id"],
+        "text": sn["textDisplay"],
+        # embedded replies (YouTube returns up to a handful per thread)
+        "replies": [
+            r["snippet"]["textDisplay"]
+            for r in item.get("replies", {}).get("comments", [])
+        ],
+        "published_at": sn.get("publishedAt"),
+        "like_count": sn.get("likeCount", 0),
+        "reply_count": item["snippet"].get("totalReplyCount", 0),
+    }
 
 
 async def get_youtube_comments(
@@ -13,10 +33,12 @@ async def get_youtube_comments(
     embedded replies (YouTube returns up to two per thread).
 
     Returns a list of dicts, each with:
+      - 'id': the YouTube comment-thread id
       - 'text': the comment text
       - 'replies': list of the embedded reply texts
+      - 'published_at', 'like_count', 'reply_count'
     """
-    youtube = build("youtube", "v3", developerKey=api_key)
+    youtube = build_youtube(api_key)
 
     video = await get_video_by_id(video_id)
     if not video:
@@ -30,12 +52,13 @@ async def get_youtube_comments(
     page_token = None
 
     while len(comments) < max_comments:
+        await charge("commentThreads.list")
         resp = (
             youtube.commentThreads()
             .list(
                 part="snippet,replies",
                 videoId=yt_id,
-                maxResults=max_comments,
+                maxResults=min(max_comments, 100),
                 pageToken=page_token,
                 order="relevance",
                 textFormat="plainText",
@@ -44,16 +67,7 @@ async def get_youtube_comments(
         )
 
         for item in resp.get("items", []):
-            top = item["snippet"]["topLevelComment"]
-            sn = top["snippet"]
-
-            entry = {"text": sn["textDisplay"], "replies": []}
-
-            # <-- correct path here
-            for r in item.get("replies", {}).get("comments", []):
-                entry["replies"].append(r["snippet"]["textDisplay"])
-
-            comments.append(entry)
+            comments.append(thread_to_entry(item))
             if len(comments) >= max_comments:
                 break
 
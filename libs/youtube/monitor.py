@@ -0,0 +1,307 @@
+# libs/youtube/monitor.py
+"""
+Near-real-time comment monitoring for live streams and premieres.
+
+While a stream is live we poll its live chat; otherwise (premieres, fresh
+uploads) we poll commentThreads newest-first and stop paging as soon as we
+hit an id we've already stored.  Only unseen items are appended to the
+video's comments doc.
+
+The poll interval adapts: it halves while new items keep arriving and backs
+off ×1.5 when quiet, but never drops below the floor implied by
+MONITOR_MAX_UNITS_PER_MINUTE for the pages the last poll fetched (or the
+chat's own pollingIntervalMillis), so a watched stream costs a bounded
+number of API units per minute.  Every call is charged to the shared quota
+ledger first; when the day's budget is gone the monitor stores what it
+already fetched and stops with status "quota_exhausted".
+
+A running monitor keeps a Redis heartbeat that expires a little after its
+next poll is due, so a worker that is killed outright doesn't leave the
+video "running" forever: once the heartbeat is gone a new monitor can start.
+
+Rolling aggregates (message rate, mean lexicon sentiment) are kept
+incrementally in O(1) per message and written to the comment_monitors doc
+on each tick.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from config.config import settings
+from config.redis import get_redis
+from libs.analysis.lexicon import score_text
+from libs.database.youtube.comments import append_comments, get_comments_by_video_id
+from libs.database.youtube.monitors import update_monitor
+from libs.database.youtube.videos import get_video_by_id
+from libs.youtube.client import build_youtube
+from libs.youtube.get_youtube_comments import thread_to_entry
+from libs.youtube.quota import QUOTA_COST, QuotaExceeded, charge
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES_PER_POLL = 3
+SEEN_IDS_MAX = 5_000
+HEARTBEAT_GRACE_S = 60  # heartbeat outlives the next due poll by this much
+QUEUED_HEARTBEAT_S = 600  # a queued monitor counts as active this long
+
+
+def _heartbeat_key(video_id: str) -> str:
+    return f"youtube:monitor:{video_id}:alive"
+
+
+async def heartbeat(video_id: str, ttl_s: float) -> None:
+    """Mark the monitor of `video_id` alive for `ttl_s` seconds."""
+    await get_redis().set(_heartbeat_key(video_id), 1, px=int(ttl_s * 1000))
+
+
+async def monitor_alive(video_id: str) -> bool:
+    return bool(await get_redis().exists(_heartbeat_key(video_id)))
+
+
+class RollingWindow:
+    """
+    Sliding time window of (ts, score) pairs with a running sum.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._items: deque = deque()
+        self._sum = 0.0
+
+    def add(self, ts: float, score: float) -> None:
+        self._items.append((ts, score))
+        self._sum += score
+
+    def evict(self, now: float) -> None:
+        cutoff = now - self.seconds
+        while self._items and self._items[0][0] < cutoff:
+            self._sum -= self._items.popleft()[1]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def rate_per_min(self) -> float:
+        return self.count * 60.0 / self.seconds
+
+    def mean(self) -> Optional[float]:
+        return self._sum / self.count if self._items else None
+
+
+class _SeenIds:
+    """Bounded set of recently stored ids (oldest forgotten first)."""
+
+    def __init__(self, maxlen: int = SEEN_IDS_MAX):
+        self._order: deque = deque()
+        self._ids = set()
+        self.maxlen = maxlen
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._ids
+
+    def add(self, item_id: str) -> bool:
+        if item_id in self._ids:
+            return False
+        self._ids.add(item_id)
+        self._order.append(item_id)
+        if len(self._order) > self.maxlen:
+            self._ids.discard(self._order.popleft())
+        return True
+
+
+def _poll_live_chat(youtube, chat_id: str, page_token: Optional[str]):
+    resp = (
+        youtube.liveChatMessages()
+        .list(liveChatId=chat_id, part="snippet", pageToken=page_token, maxResults=2000)
+        .execute()
+    )
+    items = [
+        {
+            "id": m["id"],
+            "text": m["snippet"].get("displayMessage", ""),
+            "replies": [],
+            "published_at": m["snippet"].get("publishedAt"),
+            "source": "live_chat",
+        }
+        for m in resp.get("items", [])
+        if m["snippet"].get("type") == "textMessageEvent"
+    ]
+    floor = resp.get("pollingIntervalMillis", 0) / 1000.0
+    return items, resp.get("nextPageToken"), floor
+
+
+async def _poll_comments(
+    youtube, yt_id: str, seen: _SeenIds
+) -> Tuple[List[Dict], int, bool]:
+    """
+    Newest-first pages until we reach an already-seen thread.
+    Returns (new threads, pages fetched, quota exhausted) – threads fetched
+    before the quota ran out are still returned.
+    """
+    new: List[Dict] = []
+    page_token = None
+    for page in range(1, MAX_PAGES_PER_POLL + 1):
+        try:
+            await charge("commentThreads.list")
+        except QuotaExceeded:
+            return new, page - 1, True
+        resp = (
+            youtube.commentThreads()
+            .list(
+                part="snippet",
+                videoId=yt_id,
+                maxResults=100,
+                pageToken=page_token,
+                order="time",
+                textFormat="plainText",
+            )
+            .execute()
+        )
+        for item in resp.get("items", []):
+            if item["id"] in seen:
+                return new, page, False
+            new.append(thread_to_entry(item))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return new, page, False
+    return new, MAX_PAGES_PER_POLL, False
+
+
+async def monitor_video(api_key: str, video_id: str, minutes: int) -> str:
+    """
+    Poll `video_id` for up to `minutes`.  Returns the final status:
+    finished | stopped | ended | quota_exhausted | failed.
+    """
+    video = await get_video_by_id(video_id)
+    if not video:
+        await update_monitor(video_id, status="failed", error="video not found")
+        return "failed"
+
+    youtube = build_youtube(api_key)
+    yt_id = video["youtube_video_id"]
+
+    try:
+        await charge("videos.list")
+    except QuotaExceeded:
+        await update_monitor(video_id, status="quota_exhausted")
+        return "quota_exhausted"
+    details = (
+        youtube.videos().list(part="liveStreamingDetails", id=yt_id).execute()
+    ).get("items", [])
+    chat_id = (
+        (details[0].get("liveStreamingDetails") or {}).get("activeLiveChatId")
+        if details
+        else None
+    )
+    mode = "live_chat" if chat_id else "comments"
+
+    unit_cost = QUOTA_COST["liveChatMessages.list" if chat_id else "commentThreads.list"]
+    # seconds of budget one page buys; a poll's floor scales with its pages
+    page_floor = 60.0 * unit_cost / settings.MONITOR_MAX_UNITS_PER_MINUTE
+    floor = max(settings.MONITOR_MIN_INTERVAL_S, page_floor)
+    interval = floor
+
+    seen = _SeenIds()
+    existing = await get_comments_by_video_id(video_id)
+    for c in (existing or {}).get("comments", [])[-SEEN_IDS_MAX:]:
+        if c.get("id"):
+            seen.add(c["id"])
+
+    window = RollingWindow(settings.MONITOR_WINDOW_S)
+    score_sum, total_new, units = 0.0, 0, QUOTA_COST["videos.list"]
+    page_token, api_floor = None, 0.0
+    deadline = time.monotonic() + minutes * 60
+    status = "running"
+    await heartbeat(video_id, interval + HEARTBEAT_GRACE_S)
+    await update_monitor(
+        video_id,
+        status=status,
+        mode=mode,
+        started_at=datetime.now(timezone.utc),
+        floor_interval_s=floor,
+    )
+
+    try:
+        while time.monotonic() < deadline:
+            pages, exhausted = 1, False
+            try:
+                if chat_id:
+                    await charge("liveChatMessages.list")
+                    units += unit_cost
+                    batch, page_token, api_floor = _poll_live_chat(
+                        youtube, chat_id, page_token
+                    )
+                else:
+                    batch, pages, exhausted = await _poll_comments(youtube, yt_id, seen)
+                    units += pages * unit_cost
+            except QuotaExceeded:
+                status = "quota_exhausted"
+                break
+            except HttpError as exc:
+                if chat_id and exc.resp.status in (403, 404):
+                    status = "ended"  # chat closed / stream over
+                    break
+                raise
+
+            now = time.time()
+            fresh = [m for m in batch if seen.add(m["id"])]
+            for m in fresh:
+                score = score_text(m["text"])
+                window.add(now, score)
+                score_sum += score
+            window.evict(now)
+
+            floor = max(settings.MONITOR_MIN_INTERVAL_S, page_floor * pages)
+            if fresh:
+                total_new += await append_comments(video_id, fresh)
+                interval = max(floor, api_floor, interval / 2)
+            else:
+                interval = min(
+                    max(settings.MONITOR_MAX_INTERVAL_S, floor),
+                    max(interval * 1.5, api_floor, floor),
+                )
+
+            doc = await update_monitor(
+                video_id,
+                status="running",
+                interval_s=round(interval, 2),
+                floor_interval_s=round(floor, 2),
+                total_new=total_new,
+                window_count=window.count,
+                rate_per_min=round(window.rate_per_min(), 2),
+                window_sentiment=window.mean(),
+                session_sentiment=score_sum / total_new if total_new else None,
+                units_spent=units,
+                last_poll_at=datetime.now(timezone.utc),
+            )
+            if exhausted:
+                status = "quota_exhausted"
+                break
+            if doc and doc.get("stop_requested"):
+                status = "stopped"
+                break
+
+            await heartbeat(video_id, interval + HEARTBEAT_GRACE_S)
+            await asyncio.sleep(interval)
+        else:
+            status = "finished"
+    except Exception:
+        status = "failed"
+        logger.exception("monitor for video %s crashed", video_id)
+        raise
+    finally:
+        await update_monitor(
+            video_id,
+            status=status,
+            units_spent=units,
+            finished_at=datetime.now(timezone.utc),
+        )
+        await get_redis().delete(_heartbeat_key(video_id))
+
+    return status
@@ -0,0 +1,60 @@
+# libs/youtube/quota.py
+#
+# Shared YouTube Data API quota ledger.  Every crawler charges the units a
+# call costs *before* making it; the running total lives in Redis under a
+# per-day key so all workers see the same budget.  Google resets quota at
+# midnight Pacific time, so the day key uses that zone too.
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from config.config import settings
+from config.redis import get_redis
+
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COST = {
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "videos.list": 1,
+    "commentThreads.list": 1,
+    "liveChatMessages.list": 5,
+    "search.list": 100,
+}
+
+_PACIFIC = ZoneInfo("America/Los_Angeles")
+
+
+class QuotaExceeded(Exception):
+    """Raised when a charge would push today's spend past the daily budget."""
+
+
+def _day_key() -> str:
+    return f"yt:quota:{datetime.now(_PACIFIC):%Y-%m-%d}"
+
+
+async def charge(method: str, calls: int = 1) -> int:
+    """
+    Reserve the units for `calls` invocations of `method`.
+    Returns today's new total, or raises QuotaExceeded (nothing is charged).
+    """
+    units = QUOTA_COST[method] * calls
+    r = get_redis()
+    key = _day_key()
+    total = await r.incrby(key, units)
+    if total == units:
+        await r.expire(key, 2 * 24 * 3600)
+    if total > settings.YOUTUBE_DAILY_QUOTA:
+        await r.decrby(key, units)
+        raise QuotaExceeded(
+            f"{method} needs {units} units; "
+            f"{settings.YOUTUBE_DAILY_QUOTA - (total - units)} left today"
+        )
+    return total
+
+
+async def spent_today() -> int:
+    return int(await get_redis().get(_day_key()) or 0)
+
+
+async def remaining_today() -> int:
+    return max(settings.YOUTUBE_DAILY_QUOTA - await spent_today(), 0)
@@ -0,0 +1,22 @@
+import os
+
+# settings (config/config.py) requires these; tests never reach the services
+for _name, _value in {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "MONGO_DB": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+    "YOUTUBE_API_KEY": "test",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "OPENAI_API_KEY": "test",
+    "MAILER_API_KEY": "test",
+    "MAILER_FROM_EMAIL": "test@example.com",
+    "JWT_SECRET_KEY": "test",
+    "SESSION_SECRET_KEY": "test",
+    "USERS_SERVICE_URL": "http://localhost",
+    "YOUTUBE_SERVICE_URL": "http://localhost",
+    "AGENTS_SERVICE_URL": "http://localhost",
+}.items():
+    os.environ.setdefault(_name, _value)
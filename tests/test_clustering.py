@@ -0,0 +1,41 @@
+from libs.analysis.clustering import cluster_comments
+
+AUDIO = [
+    "the audio quality was terrible",
+    "terrible audio quality throughout",
+    "audio quality needs work, mic sounds terrible",
+    "please fix the audio quality",
+]
+EDITING = [
+    "amazing editing and transitions",
+    "editing transitions are amazing",
+    "loved the editing transitions",
+    "those transitions, amazing editing",
+]
+
+
+def test_cluster_comments_separates_topics():
+    texts = AUDIO + EDITING
+    clusters = cluster_comments(texts)
+    groups = sorted(sorted(int(i) for i in c.members) for c in clusters)
+    assert groups == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    for c in clusters:
+        assert c.terms
+
+
+def test_cluster_comments_counts_weights():
+    texts = AUDIO + EDITING
+    weights = [5, 1, 1, 1, 1, 1, 1, 1]
+    clusters = cluster_comments(texts, weights=weights)
+    assert [c.size for c in clusters] == [8.0, 4.0]
+    assert set(clusters[0].members) == {0, 1, 2, 3}
+
+
+def test_cluster_comments_skips_texts_without_words():
+    assert cluster_comments(["!!!", "ok", "🔥"]) == []
+
+
+def test_cluster_comments_is_seeded():
+    first = cluster_comments(AUDIO + EDITING, seed=3)
+    again = cluster_comments(AUDIO + EDITING, seed=3)
+    assert [list(c.members) for c in first] == [list(c.members) for c in again]
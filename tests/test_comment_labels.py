@@ -0,0 +1,23 @@
+import base64
+
+import pytest
+
+from libs.database.youtube.comment_labels import _decode_cursor, _encode_cursor
+
+
+def _b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def test_cursor_round_trip():
+    cursor = _encode_cursor({"like_count": 42, "comment_id": "Ugx-abc_123", "text": "hi"})
+    assert _decode_cursor(cursor) == (42, "Ugx-abc_123")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["!!!", "é", _b64("not json"), _b64("null"), _b64("[1]"), _b64('["many", "x"]')],
+)
+def test_decode_cursor_rejects_bad_cursor(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from libs.agents.extractors.fused import parse_fused
+
+_BREAKDOWN = {"positive": 60, "neutral": 30, "negative": 10}
+
+REPLY = {
+    "sentiments": {"video": _BREAKDOWN, "creator": _BREAKDOWN, "topic": _BREAKDOWN},
+    "headline": "Viewers loved the build",
+    "discussions": {
+        "video": [{"name": "editing", "mentions": 3, "sentiment": _BREAKDOWN}],
+        "creator": [],
+        "topic": [],
+    },
+    "people": [
+        {"name": "Joe", "sentiment": _BREAKDOWN, "remarks": ["funny"]},
+        {"name": "Nobody", "sentiment": _BREAKDOWN, "remarks": []},
+    ],
+    "other_insights": [" more tutorials ", ""],
+    "video_requests": ["part two"],
+}
+COMMENTS = "Joe was great\nloved the editing (x2)"
+
+
+def test_parse_fused_accepts_schema_shaped_reply():
+    out = parse_fused(json.dumps(REPLY), COMMENTS, "64b7f0c2a1b2c3d4e5f60718")
+    assert out["sentiments"]["video"] == _BREAKDOWN
+    assert out["headline"] == "Viewers loved the build"
+    assert out["discussions"]["video"][0]["name"] == "editing"
+    assert [p["name"] for p in out["people"]] == ["Joe"]
+    assert out["other_insights"] == ["more tutorials"]
+    assert out["video_requests"] == ["part two"]
+
+
+def test_parse_fused_rejects_missing_section():
+    reply = {k: v for k, v in REPLY.items() if k != "sentiments"}
+    with pytest.raises(ValueError):
+        parse_fused(json.dumps(reply), COMMENTS, "64b7f0c2a1b2c3d4e5f60718")
+
+
+def test_parse_fused_rejects_non_object():
+    with pytest.raises(ValueError):
+        parse_fused("[]", COMMENTS, "64b7f0c2a1b2c3d4e5f60718")
+
+
+def test_parse_fused_points_people_at_threads():
+    out = parse_fused(
+        json.dumps(REPLY), COMMENTS, "64b7f0c2a1b2c3d4e5f60718", line_keys=["t1", "t2"]
+    )
+    assert out["people"][0]["comment_keys"] == ["t1"]
@@ -0,0 +1,61 @@
+from libs.agents.comments_analyzer.merge import merge_partials, to_percent
+
+
+def _breakdown(pos, neu, neg):
+    return {"positive": pos, "neutral": neu, "negative": neg}
+
+
+def _partial(sent, discussions, people, insights):
+    return {
+        "sentiments": {"video": sent, "creator": sent, "topic": sent},
+        "discussions": {"video": discussions, "creator": [], "topic": []},
+        "people": people,
+        "other_insights": insights,
+        "video_requests": [],
+    }
+
+
+def test_to_percent_sums_to_100():
+    out = to_percent({"positive": 1, "neutral": 1, "negative": 1})
+    assert sum(out.values()) == 100
+    assert out == {"positive": 34, "neutral": 33, "negative": 33}
+
+
+def test_to_percent_without_scores_is_neutral():
+    assert to_percent({}) == {"positive": 0, "neutral": 100, "negative": 0}
+
+
+def test_merge_partials_weights_by_comment_count():
+    a = _partial(
+        _breakdown(100, 0, 0),
+        [{"name": "Editing", "mentions": 3, "sentiment": _breakdown(100, 0, 0)}],
+        [{"name": "Joe", "sentiment": _breakdown(100, 0, 0), "remarks": ["funny"], "mentions": 2}],
+        ["More tutorials"],
+    )
+    b = _partial(
+        _breakdown(0, 0, 100),
+        [{"name": "editing!", "mentions": 1, "sentiment": _breakdown(0, 0, 100)}],
+        [{"name": "joe", "sentiment": _breakdown(0, 0, 100), "remarks": ["Funny"], "mentions": 1}],
+        ["more tutorials", "longer videos"],
+    )
+    out = merge_partials([(a, 3), (b, 1)])
+
+    assert out["sentiments"]["video"] == _breakdown(75, 0, 25)
+    [theme] = out["discussions"]["video"]
+    assert theme["name"] == "Editing"
+    assert theme["mentions"] == 4
+    assert theme["sentiment"] == _breakdown(75, 0, 25)
+    [joe] = out["people"]
+    assert joe["name"] == "Joe"
+    assert joe["remarks"] == ["funny"]
+    assert joe["mentions"] == 3
+    assert out["other_insights"] == ["More tutorials", "longer videos"]
+
+
+def test_merge_partials_is_order_independent_for_sentiments():
+    a = _partial(_breakdown(60, 30, 10), [], [], [])
+    b = _partial(_breakdown(10, 30, 60), [], [], [])
+    assert (
+        merge_partials([(a, 2), (b, 5)])["sentiments"]
+        == merge_partials([(b, 5), (a, 2)])["sentiments"]
+    )
@@ -0,0 +1,55 @@
+from libs.agents.comments_analyzer.preprocess import is_spam, preprocess_threads
+
+
+def test_preprocess_collapses_exact_duplicates():
+    threads = [
+        {"text": "Great video!"},
+        {"text": "great   video"},
+        {"text": "Thanks for sharing"},
+    ]
+    out, report = preprocess_threads(threads)
+    assert [t["text"] for t in out] == ["Great video!", "Thanks for sharing"]
+    assert out[0]["count"] == 2
+    assert "count" not in out[1]
+    assert report.duplicates == 1
+    assert report.threads_out == 2
+
+
+def test_preprocess_collapses_near_duplicates():
+    text = (
+        "this is honestly the best tutorial i have ever watched "
+        "on the whole topic of home electrical wiring so far"
+    )
+    threads = [{"text": text}, {"text": text + "!!"}, {"text": text + " really"}]
+    out, report = preprocess_threads(threads)
+    assert len(out) == 1
+    assert out[0]["count"] == 3
+    assert report.duplicates == 1
+    assert report.near_duplicates == 1
+
+
+def test_preprocess_drops_spam_and_keeps_emoji():
+    threads = [
+        {"text": "sub4sub anyone?"},
+        {"text": "message me on whatsapp +1 555 123 4567"},
+        {"text": "https://a.example https://b.example"},
+        {"text": "🔥🔥🔥🔥🔥🔥"},
+    ]
+    out, report = preprocess_threads(threads)
+    assert [t["text"] for t in out] == ["🔥🔥🔥"]
+    assert report.spam == 3
+
+
+def test_preprocess_keeps_threads_with_replies_apart():
+    threads = [
+        {"text": "Great video", "replies": ["agreed", "Agreed!", "check out my channel"]},
+        {"text": "Great video"},
+    ]
+    out, report = preprocess_threads(threads)
+    assert len(out) == 2
+    assert out[0]["replies"] == ["agreed"]
+    assert report.spam == 1
+
+
+def test_is_spam_allows_plain_mentions():
+    assert not is_spam("I saw this on telegram yesterday")
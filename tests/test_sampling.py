@@ -0,0 +1,45 @@
+import numpy as np
+
+from libs.agents.comments_analyzer.sampling import _round_counts, sample_threads
+
+
+def _threads(n):
+    return [
+        {"text": f"comment number {i} about the video", "like_count": i % 7, "count": 1 + i % 3}
+        for i in range(n)
+    ]
+
+
+def test_round_counts_sums_to_total():
+    counts = _round_counts(np.array([2.4, 3.3, 4.3]), 10)
+    assert counts.sum() == 10
+    assert list(counts) == [3, 3, 4]
+
+
+def test_round_counts_takes_floor_overshoot_from_largest():
+    counts = _round_counts(np.array([0.2, 0.2, 5.6]), 4)
+    assert counts.sum() == 4
+    assert counts.min() >= 1
+    assert list(counts) == [1, 1, 2]
+
+
+def test_sample_threads_returns_input_when_it_fits():
+    threads = _threads(5)
+    sample, report = sample_threads(threads, 10_000, "vid")
+    assert sample is threads
+    assert report.threads_out == 5
+
+
+def test_sample_threads_reweights_to_population():
+    threads = _threads(200)
+    sample, report = sample_threads(threads, 500, "vid")
+    assert 0 < len(sample) < len(threads)
+    assert sum(t.get("count", 1) for t in sample) == sum(t["count"] for t in threads)
+    assert report.threads_out == len(sample)
+
+
+def test_sample_threads_is_seeded():
+    threads = _threads(200)
+    first, _ = sample_threads(threads, 500, "vid")
+    again, _ = sample_threads(threads, 500, "vid")
+    assert first == again